@@ -1,17 +1,64 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from sqlmodel import SQLModel, create_engine
+from sqlalchemy import inspect
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateColumn
+from app.core.tracing import tracer
 
-# Use SQLite for simplicity. 
+# Use SQLite for simplicity.
 # check_same_thread=False is needed for FastAPI's async environment with SQLite
 sqlite_file_name = "tutu_code_ark_v1.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
 engine = create_engine(
-    sqlite_url, 
+    sqlite_url,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool
 )
 
+# All Session work after startup runs on this single dedicated thread (routes
+# are async and go through run_db; startup runs before any request is served).
+# SQLite serialises writers anyway, and a single worker keeps the shared
+# StaticPool connection from being used by two threads at the same time, so
+# no route may take a Session on FastAPI's threadpool.
+db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tutu-db")
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+
+def _add_missing_columns():
+    """
+    create_all() never alters tables that already exist, so databases created by
+    older versions would miss newly added columns and indexes. Add them in place.
+
+    New NOT NULL columns must declare a server_default for this to work on SQLite.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}')
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking database callable on the DB executor without stalling the event loop.
+
+    The callable is expected to open (and close) its own Session, e.g. one of the
+    ProjectStore helpers. The caller's context (current trace span) is carried over.
+    """
+    def call():
+        with tracer.child(f"db.{getattr(func, '__name__', 'call')}"):
+            return func(*args, **kwargs)
 
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, contextvars.copy_context().run, call)
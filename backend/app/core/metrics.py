@@ -0,0 +1,233 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Updating a metric is a dict lookup plus a locked add, so instrumentation can stay
+on in production. Gauges that mirror existing state (queue sizes, connection
+counts...) use set_function() and are only evaluated when /metrics is scraped.
+"""
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def labels(self, *labelvalues: str) -> "_BoundCounter":
+        return _BoundCounter(self, labelvalues)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+class _BoundCounter:
+    __slots__ = ("_counter", "_labelvalues")
+
+    def __init__(self, counter: Counter, labelvalues: Tuple[str, ...]):
+        self._counter = counter
+        self._labelvalues = labelvalues
+
+    def inc(self, amount: float = 1):
+        self._counter.inc(amount, *self._labelvalues)
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], object]] = None
+        super().__init__(name, documentation, labelnames)
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def set_function(self, function: Callable[[], object]):
+        """
+        Compute the value at scrape time. For labelled gauges the function returns
+        a {label value(s): value} mapping.
+        """
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                return []
+            if isinstance(result, dict):
+                items = [((k,) if not isinstance(k, tuple) else k, v) for k, v in result.items()]
+            else:
+                items = [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+class Histogram(_Metric):
+    type_name = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labelvalues -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labelvalues: str):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        samples = []
+        for key, state in items:
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, ("le", _format_value(bound))), cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), state[-2]))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), state[-1]))
+        return samples
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+registry = MetricsRegistry()
+
+def count_inotify_watches() -> int:
+    """Number of inotify watches held by this process (Linux only, 0 elsewhere)"""
+    total = 0
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}") != "anon_inode:inotify":
+                continue
+            with open(f"/proc/self/fdinfo/{fd}") as f:
+                total += sum(1 for line in f if line.startswith("inotify wd:"))
+        except OSError:
+            continue
+    return total
+
+# --- Application metrics ---
+
+SYNC_STAGE_SECONDS = Histogram(
+    "codeark_sync_stage_duration_seconds",
+    "Duration of each sync stage (status, scan, add, commit, push, total)",
+    ["stage", "trigger"],
+)
+SYNC_RUNS = Counter("codeark_sync_runs_total", "Sync attempts by trigger and outcome", ["trigger", "outcome"])
+SYNC_BYTES_PUSHED = Counter("codeark_sync_bytes_pushed_total", "Bytes written by git push")
+
+WATCHER_EVENTS_RECEIVED = Counter("codeark_watcher_events_received_total", "File system events delivered by watchdog")
+WATCHER_EVENTS_FILTERED = Counter("codeark_watcher_events_filtered_total", "File system events dropped by the watcher filters")
+WATCHER_EVENTS_COALESCED = Counter("codeark_watcher_events_coalesced_total", "File system events merged into an already pending sync")
+
+PENDING_SYNCS = Gauge("codeark_pending_syncs", "Projects with changes waiting for their sync time")
+WATCHED_PROJECTS = Gauge("codeark_watched_projects", "Projects with an active file system observer")
+INOTIFY_WATCHES = Gauge("codeark_inotify_watches", "inotify watches held by the backend process")
+WATCHER_OVERFLOWS = Counter("codeark_watcher_overflows_total", "inotify event queue overflows, each losing an unknown number of events")
+RECONCILE_CHECKS = Counter(
+    "codeark_reconcile_checks_total",
+    "Dirty checks for changes the watcher missed, by trigger (startup, overflow) and result (dirty, clean, error)",
+    ["trigger", "result"],
+)
+WEBSOCKET_CLIENTS = Gauge("codeark_websocket_clients", "Connected WebSocket log clients", ["scope"])
+QUEUE_DEPTH = Gauge("codeark_queue_depth", "Items waiting in internal queues", ["queue"])
+WORKER_TASKS = Counter("codeark_worker_tasks_total", "Tasks run in the worker process pool by task (status, has_changes, scan)", ["task"])
+
+SCAN_CACHE_LOOKUPS = Counter("codeark_scan_cache_lookups_total", "Pre-commit scan stat-cache lookups by result (hit, miss)", ["result"])
+SCAN_CACHE_ENTRIES = Gauge("codeark_scan_cache_entries", "Files held in the pre-commit scan cache")
+CONTENT_SNIFF_LOOKUPS = Counter("codeark_content_sniff_lookups_total", "Content-type sniffing cache lookups by result (hit, miss)", ["result"])
+DISK_USAGE_RESCANS = Counter("codeark_disk_usage_rescans_total", "Disk usage index refreshes by kind (full walk, single directory)", ["kind"])
+DISK_USAGE_DIRS = Gauge("codeark_disk_usage_directories", "Directories held in the disk usage indexes")
+IGNORE_MATCHER_LOADS = Counter("codeark_ignore_matcher_loads_total", "Ignore files (re)compiled by the gitignore matcher")
+IGNORE_MATCHER_PATHS = Counter("codeark_ignore_matcher_paths_total", "Paths checked against compiled ignore rules")
+SECRET_SCAN_FILES = Counter(
+    "codeark_secret_scan_files_total",
+    "Files examined by the secret scanner by verdict (clean, secret, binary, cache_hit, unreadable)",
+    ["verdict"],
+)
+SECRET_SCAN_SECONDS = Histogram(
+    "codeark_secret_scan_file_seconds", "Time spent scanning one file for secrets",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1),
+)
+
+STATUS_CACHE_LOOKUPS = Counter("codeark_status_cache_lookups_total", "Working tree status cache lookups by result (hit, miss)", ["result"])
+STATUS_CACHE_ENTRIES = Gauge("codeark_status_cache_entries", "Projects with a cached working tree status")
+JOBS_FINISHED = Counter("codeark_jobs_finished_total", "Background API jobs by kind and final status", ["kind", "status"])
+JOBS_ACTIVE = Gauge("codeark_jobs_active", "Background API jobs queued or running")
+GITHUB_API_CALLS = Counter("codeark_github_api_calls_total", "GitHub API requests by operation", ["operation"])
+GITHUB_RATE_LIMIT_REMAINING = Gauge("codeark_github_rate_limit_remaining", "Remaining GitHub API requests in the current window")
+GITHUB_RATE_LIMIT = Gauge("codeark_github_rate_limit", "GitHub API request limit for the current window")
+
+INOTIFY_WATCHES.set_function(count_inotify_watches)
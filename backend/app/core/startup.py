@@ -0,0 +1,33 @@
+import time
+from typing import Any, Dict, Optional
+
+class StartupState:
+    """
+    Readiness of the backend process, reported by /health. Stages are recorded as
+    milliseconds since this module was imported (the first thing main.py does):
+
+    - database: tables created / migrated
+    - serving: lifespan done, requests are accepted
+    - watchers: every auto-push project has its file system watcher
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.watchers_total: Optional[int] = None
+        self.watchers_attached = 0
+
+    def mark(self, stage: str):
+        self.stages[stage] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    @property
+    def ready(self) -> bool:
+        return "watchers" in self.stages
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "stages": dict(self.stages),
+            "watchers": {"attached": self.watchers_attached, "total": self.watchers_total},
+        }
+
+startup = StartupState()
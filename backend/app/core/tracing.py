@@ -0,0 +1,212 @@
+"""
+Lightweight in-process tracing.
+
+    with tracer.span("sync.auto", project_id=1):       # starts a trace (sampled)
+        with tracer.child("git.push") as span:        # no-op outside a trace
+            span.set_attribute("bytes", 123)
+
+The current span lives in a ContextVar, so nesting follows the code across
+awaits and into asyncio.to_thread / run_db (both run the callable inside a copy
+of the caller's context). Sampling is decided once per root span; every span of
+an unsampled trace is a shared no-op object.
+
+Finished traces are kept in a bounded in-memory buffer and can optionally be
+appended to a file as OTLP/JSON lines (one ExportTraceServiceRequest per trace).
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Export files set through the API live here, relative to the working directory like the SQLite file
+TRACE_DIR = "tutu_traces"
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpan()
+_current_span: ContextVar[Optional[Any]] = ContextVar("codeark_current_span", default=None)
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns",
+                 "attributes", "error", "thread", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": self.thread,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class Tracer:
+    def __init__(self, sample_rate: float = 1.0, buffer_size: int = 200, export_path: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self._recent: deque = deque(maxlen=buffer_size)
+        self._active: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if parent is _NOOP:
+            return _NOOP
+        if parent is None:
+            if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+                return _UnsampledRoot()
+            trace_id = os.urandom(16).hex()
+            with self._lock:
+                self._active[trace_id] = []
+            return Span(self, name, trace_id, None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def child(self, name: str, **attributes):
+        """Like span(), but never starts a new trace (for low-level steps called from anywhere)"""
+        parent = _current_span.get()
+        if parent is None or parent is _NOOP:
+            return _NOOP
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._active.get(span.trace_id)
+            if spans is None:
+                # Root already finished (e.g. a fire-and-forget child), drop it
+                return
+            spans.append(span)
+            if span.parent_id is not None:
+                return
+            del self._active[span.trace_id]
+            trace = {
+                "trace_id": span.trace_id,
+                "name": span.name,
+                "start": span.start_ns / 1e9,
+                "duration_ms": round(span.duration_ms, 3),
+                "error": span.error,
+                "spans": sorted((s.to_dict() for s in spans), key=lambda s: s["start"]),
+            }
+            self._recent.append(trace)
+        if self.export_path:
+            self._export(spans)
+
+    def recent(self, limit: int = 20, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent finished traces, newest first"""
+        with self._lock:
+            traces = list(self._recent)
+        traces.reverse()
+        if name:
+            traces = [t for t in traces if t["name"] == name]
+        return traces[:limit]
+
+    def _export(self, spans: List[Span]):
+        """Append one OTLP/JSON ExportTraceServiceRequest line for a finished trace"""
+        def attributes(values: Dict[str, Any]):
+            result = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    result.append({"key": key, "value": {"boolValue": value}})
+                elif isinstance(value, int):
+                    result.append({"key": key, "value": {"intValue": str(value)}})
+                elif isinstance(value, float):
+                    result.append({"key": key, "value": {"doubleValue": value}})
+                else:
+                    result.append({"key": key, "value": {"stringValue": str(value)}})
+            return result
+
+        otlp_spans = []
+        for s in spans:
+            item = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": attributes({**s.attributes, "thread.name": s.thread}),
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            otlp_spans.append(item)
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": attributes({"service.name": "tutu-code-ark-backend"})},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+        try:
+            with self._lock, open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+        except OSError as e:
+            print(f"Failed to export trace to {self.export_path}: {e}")
+
+class _UnsampledRoot:
+    """Root of an unsampled trace: marks the context so every child is a no-op too"""
+    __slots__ = ("_token",)
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        self._token = _current_span.set(_NOOP)
+        return _NOOP
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+tracer = Tracer(
+    sample_rate=float(os.environ.get("CODEARK_TRACE_SAMPLE_RATE", "1.0")),
+    buffer_size=int(os.environ.get("CODEARK_TRACE_BUFFER", "200")),
+    export_path=os.environ.get("CODEARK_TRACE_EXPORT_FILE") or None,
+)
@@ -83,6 +83,7 @@ class LogMessages:
         "monitoring_started": "[SUCCESS] File monitoring started, will auto-sync changes",
         "init_complete": "[COMPLETE] Project initialization complete! Project is ready",
         "started_watching": "Started watching: {name}",
+        "watching_polled": "以轮询方式监控 {name}（每 {interval} 秒）",
         
         # 同步
         "sync_detected": "[SYNC] Detected {count} file change(s), starting sync...",
@@ -130,10 +131,32 @@ class LogMessages:
         "error_sync_failed": "[ERROR] 同步失败：{error}",
         "warning_status_error": "[WARNING] 状态已更新为：错误",
         "info_no_changes": "[INFO] 未检测到文件更改，跳过同步",
+        "sync_scan_excluded": "[WARNING] 预提交扫描发现 {count} 个风险文件，已从本次备份中排除：",
+        "sync_scan_quarantined": "[WARNING] 预提交扫描发现 {count} 个风险文件，已隔离（写入 .git/info/exclude）：",
+        "sync_scan_flagged": "[WARNING] 预提交扫描发现 {count} 个风险文件（仍会备份，请检查）：",
+        "sync_quarantine_released": "[INFO] {count} 个已隔离文件复查通过，已解除隔离并加入备份",
+        "sync_scan_deferred": "[INFO] 扫描超出时间预算，{count} 个文件推迟到下次同步",
         
         # 手动推送
         "manual_push_starting": "[PUSH] 开始手动推送项目：{name}",
         "error_push_failed": "[ERROR] 推送失败：{error}",
+
+        # 批量导入
+        "import_starting": "[IMPORT] 正在查找 {root} 下的 Git 仓库...",
+        "import_discovered": "[IMPORT] 已扫描 {dirs} 个目录，找到 {found} 个仓库（{ms:.0f} ms）",
+        "import_complete": "[IMPORT] 已导入 {imported} 个仓库，跳过 {skipped} 个（{rate:.0f} 个/秒）",
+        "progress_discover": "查找仓库",
+        "import_found": "已找到 {found} 个仓库",
+
+        # Git 进度
+        "git_progress": "  📦 {stage}：{percent}({counts}) {detail}",
+        "progress_counting": "统计对象",
+        "progress_compressing": "压缩对象",
+        "progress_writing": "写入对象",
+        "progress_receiving": "接收对象",
+        "progress_resolving": "处理差异",
+        "progress_finding_sources": "查找来源",
+        "progress_checking_out": "检出文件",
     }
     
     # 英文日志消息
@@ -195,6 +218,7 @@ class LogMessages:
         "monitoring_started": "[SUCCESS] File monitoring started, will auto-sync changes",
         "init_complete": "[COMPLETE] Project initialization complete! Project is ready",
         "started_watching": "Started watching: {name}",
+        "watching_polled": "Watching {name} by polling every {interval}s",
         
         # Sync
         "sync_detected": "[SYNC] Detected {count} file change(s), starting sync...",
@@ -242,9 +266,31 @@ class LogMessages:
         "error_sync_failed": "[ERROR] Sync failed: {error}",
         "warning_status_error": "[WARNING] Status updated to: error",
         "info_no_changes": "[INFO] No file changes detected, skipping sync",
+        "sync_scan_excluded": "[WARNING] Pre-commit scan flagged {count} risky file(s), excluded from this backup:",
+        "sync_scan_quarantined": "[WARNING] Pre-commit scan flagged {count} risky file(s), quarantined via .git/info/exclude:",
+        "sync_scan_flagged": "[WARNING] Pre-commit scan flagged {count} risky file(s), backed up anyway, please review:",
+        "sync_quarantine_released": "[INFO] {count} quarantined file(s) passed a re-check and were released into the backup",
+        "sync_scan_deferred": "[INFO] Scan time budget exhausted, {count} file(s) deferred to the next sync",
         
         # Manual push
         "manual_push_starting": "[PUSH] Starting manual push for project: {name}",
         "error_push_failed": "[ERROR] Push failed: {error}",
+
+        # Bulk import
+        "import_starting": "[IMPORT] Looking for Git repositories under {root}...",
+        "import_discovered": "[IMPORT] Scanned {dirs} directories, found {found} repositories ({ms:.0f} ms)",
+        "import_complete": "[IMPORT] Imported {imported} repositories, skipped {skipped} ({rate:.0f} repos/s)",
+        "progress_discover": "Discovering repositories",
+        "import_found": "{found} found",
+
+        # Git progress
+        "git_progress": "  📦 {stage}: {percent}({counts}) {detail}",
+        "progress_counting": "Counting objects",
+        "progress_compressing": "Compressing objects",
+        "progress_writing": "Writing objects",
+        "progress_receiving": "Receiving objects",
+        "progress_resolving": "Resolving deltas",
+        "progress_finding_sources": "Finding sources",
+        "progress_checking_out": "Checking out files",
     }
 
@@ -0,0 +1,25 @@
+from typing import Any, Optional
+from sqlmodel import SQLModel
+from datetime import datetime
+
+class JobResponse(SQLModel):
+    """A long running operation (manual push, auto-init) started through the API (kept in memory only)"""
+    id: str
+    kind: str  # manual_push, auto_init
+    project_id: Optional[int] = None
+    status: str  # queued, running, succeeded, failed, cancelled
+    stage: Optional[str] = None  # e.g. add, commit, push
+    progress: Optional[float] = None  # 0..1 when known
+    cancel_requested: bool = False
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None  # HTTP status the synchronous endpoint would have answered with
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobAccepted(SQLModel):
+    """202 body of endpoints that run as a job"""
+    ok: bool = True
+    job_id: str
+    status: str
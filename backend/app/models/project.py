@@ -1,6 +1,6 @@
-from typing import Optional
-from sqlmodel import Field, SQLModel
-from datetime import datetime
+from typing import Optional, Dict, Tuple
+from sqlmodel import Field, SQLModel, Index
+from datetime import datetime, timedelta
 import json
 
 class ProjectConfig(SQLModel):
@@ -10,38 +10,126 @@ class ProjectConfig(SQLModel):
     sync_fixed_time: str = "00:00" # HH:MM for fixed mode
     max_file_size_mb: int = 50
     blocked_extensions: list[str] = ['.exe', '.dll', '.zip', '.mp4']
+    # Blocked by file content whatever the suffix: archive, executable, media, image, document, binary
+    blocked_content_types: list[str] = ['archive', 'executable', 'media']
     ignore_hidden: bool = True
     ai_commit_message: bool = False
     default_commit_prefix: str = "backup: "
     is_private: bool = True
     strip_secrets: bool = True
+    # What the auto-sync does with files the pre-commit scan flags: warn (report, back up anyway),
+    # exclude (leave them out of the commit), quarantine (also add them to .git/info/exclude), off
+    risky_file_action: str = "warn"
+    scan_budget_ms: int = 2000
+    # How file changes are detected: auto (inotify within the watch budget, snapshot polling
+    # beyond it and on network file systems), native, polling
+    watch_backend: str = "auto"
+    poll_interval: int = 30 # seconds between two polling rounds
+    poll_budget_ms: int = 50 # CPU time per polling visit; big trees take several visits per round
+
+# Parsed configs shared by every Project instance: project_id -> (config_version, config)
+_config_cache: Dict[int, Tuple[int, ProjectConfig]] = {}
+
+def invalidate_config_cache(project_id: int):
+    _config_cache.pop(project_id, None)
+
+def parse_config(project_id: Optional[int], config_version: int, config_json: str) -> ProjectConfig:
+    """ProjectConfig from its stored JSON, cached per (id, config_version); treat the result as read-only"""
+    if project_id is not None:
+        cached = _config_cache.get(project_id)
+        if cached and cached[0] == config_version:
+            return cached[1]
+    try:
+        config = ProjectConfig(**json.loads(config_json))
+    except:
+        config = ProjectConfig()
+    if project_id is not None:
+        _config_cache[project_id] = (config_version, config)
+    return config
+
+def compute_next_sync_due(config: ProjectConfig, last_sync_time: Optional[datetime], now: datetime) -> Optional[datetime]:
+    """
+    When a project with pending changes should be pushed next.
+
+    - interval: last sync + interval (at least 60s), or right away if never synced
+    - fixed: the next HH:MM minute that has not been used for a sync yet
+    - anything else (e.g. the removed "auto" mode): never
+    """
+    if config.sync_mode == 'interval':
+        if not last_sync_time:
+            return now
+        return last_sync_time + timedelta(seconds=max(config.sync_interval, 60))
+
+    if config.sync_mode == 'fixed':
+        try:
+            target_h, target_m = map(int, config.sync_fixed_time.split(':'))
+            due = now.replace(hour=target_h, minute=target_m, second=0, microsecond=0)
+        except (ValueError, AttributeError):
+            return None
+        # Window already over, or we already synced inside it -> tomorrow
+        if now >= due + timedelta(seconds=60) or (last_sync_time and last_sync_time >= due):
+            due += timedelta(days=1)
+        return due
+
+    return None
 
 class Project(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True)
     path: str = Field(index=True, unique=True)
     remote_url: Optional[str] = None
     branch: str = "main"
     
     config_json: str = Field(default="{}")
+    config_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    
+    # Copies of frequently filtered config fields, kept in sync by set_config()
+    auto_push: bool = Field(default=True, index=True, sa_column_kwargs={"server_default": "1"})
+    sync_mode: str = Field(default="auto", index=True, sa_column_kwargs={"server_default": "auto"})
+    next_sync_due: Optional[datetime] = Field(default=None, index=True)
     
     last_sync_time: Optional[datetime] = None
-    status: str = "idle" 
+    status: str = Field(default="idle", index=True)
+
+    __table_args__ = (
+        Index("ix_project_auto_push_next_sync_due", "auto_push", "next_sync_due"),
+        # Keyset pagination of the project list by last sync time
+        Index("ix_project_last_sync_time_id", "last_sync_time", "id"),
+    )
 
     @property
     def config(self) -> ProjectConfig:
-        try:
-            return ProjectConfig(**json.loads(self.config_json))
-        except:
-            return ProjectConfig()
+        """
+        Parsed config, cached per (id, config_version).
+
+        The returned instance is shared - treat it as read-only and go through
+        set_config() (with a copy) to change anything.
+        """
+        return parse_config(self.id, self.config_version, self.config_json)
 
     def set_config(self, config: ProjectConfig):
         self.config_json = config.model_dump_json()
+        self.config_version = (self.config_version or 0) + 1
+        if self.id is not None:
+            invalidate_config_cache(self.id)
+        self.auto_push = config.auto_push
+        self.sync_mode = config.sync_mode
+        self.schedule_next_sync()
+
+    def schedule_next_sync(self, now: Optional[datetime] = None):
+        self.next_sync_due = compute_next_sync_due(self.config, self.last_sync_time, now or datetime.now())
 
 class ProjectCreate(SQLModel):
     path: str
     name: Optional[str] = None
 
+class ProjectImport(SQLModel):
+    """Bulk import of every repository found below a folder"""
+    root: str
+    max_depth: int = 6
+    require_remote: bool = True  # skip repositories without a remote, like POST /projects/ does
+    lang: str = "zh"
+
 class ProjectUpdate(SQLModel):
     name: Optional[str] = None
     config: Optional[ProjectConfig] = None
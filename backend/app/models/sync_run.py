@@ -0,0 +1,73 @@
+from typing import Optional
+from sqlmodel import Field, SQLModel, Index
+from datetime import datetime
+
+class SyncRun(SQLModel, table=True):
+    """One auto or manual sync attempt with per-stage timings (raw history)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project_id: int = Field(index=True)
+    started_at: datetime = Field(index=True)
+    trigger: str = "auto"  # auto, manual
+    outcome: str = "success"  # success, no_changes, skipped, error, cancelled
+
+    status_ms: float = 0.0
+    scan_ms: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
+    add_ms: float = 0.0
+    commit_ms: float = 0.0
+    push_ms: float = 0.0
+    total_ms: float = 0.0
+
+    files_changed: int = 0
+    # Left out of the commit by the pre-commit scan (risky or not scanned within budget)
+    files_excluded: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    bytes_pushed: int = 0
+    error: Optional[str] = None
+
+    __tablename__ = "sync_run"  # type: ignore
+    __table_args__ = (Index("ix_sync_run_project_started", "project_id", "started_at"),)
+
+class SyncRunHourly(SQLModel, table=True):
+    """Hourly rollup of SyncRun rows that have aged out of the raw history"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project_id: int = Field(index=True)
+    hour: datetime = Field(index=True)  # start of the hour
+
+    runs: int = 0
+    successes: int = 0
+    failures: int = 0
+    files_changed: int = 0
+    bytes_pushed: int = 0
+
+    status_ms_sum: float = 0.0
+    scan_ms_sum: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
+    add_ms_sum: float = 0.0
+    commit_ms_sum: float = 0.0
+    push_ms_sum: float = 0.0
+    total_ms_sum: float = 0.0
+    total_ms_max: float = 0.0
+
+    # JSON {stage: bucket counts} (see SyncHistoryService.BUCKETS_MS) for percentile estimates
+    histograms: str = Field(default="{}")
+
+    __tablename__ = "sync_run_hourly"  # type: ignore
+    __table_args__ = (Index("ix_sync_run_hourly_project_hour", "project_id", "hour", unique=True),)
+
+class StageStats(SQLModel):
+    avg_ms: float = 0.0
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+
+class SyncStatsResponse(SQLModel):
+    project_id: int
+    hours: int
+    runs: int
+    successes: int
+    failures: int
+    files_changed: int
+    bytes_pushed: int
+    status: StageStats
+    scan: StageStats
+    add: StageStats
+    commit: StageStats
+    push: StageStats
+    total: StageStats
@@ -0,0 +1,9 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+class TraceConfig(SQLModel):
+    """Runtime tracing settings (not persisted; defaults come from CODEARK_TRACE_* env vars)"""
+    sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+    # OTLP/JSON lines file, None disables the exporter. Set through the API it must be a
+    # bare file name (created under tutu_traces/) or the current path unchanged
+    export_path: Optional[str] = None
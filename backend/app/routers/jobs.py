@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+
+from app.models.job import JobResponse
+from app.services.job_service import job_service
+
+router = APIRouter()
+
+@router.get("/", response_model=List[JobResponse])
+async def list_jobs(
+    project_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Recent jobs, newest first (finished ones are kept for a limited time)"""
+    # async like the others: the job table and its tasks belong to the event loop thread
+    return [job.to_response() for job in job_service.recent(project_id, limit)]
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response()
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Ask a job to stop at its next safe point; a push already in flight still completes"""
+    job = job_service.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response()
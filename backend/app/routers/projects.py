@@ -1,24 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends, Body, Query
-from sqlmodel import Session, select
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Body, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import base64
+import hashlib
+import json
 import os
+import asyncio
+import time
 
-from app.core.database import engine
-from app.models.project import Project, ProjectCreate, ProjectUpdate, ProjectConfig, ProjectAutoInit, ProjectResponse
-from app.services.git_service import GitService
+from app.core.database import run_db
+from app.core.tracing import tracer
+from app.models.project import Project, ProjectCreate, ProjectUpdate, ProjectConfig, ProjectAutoInit, ProjectImport, ProjectResponse, parse_config
+from app.services.git_service import GitService, track_github_call, run_sync
 from app.services.scanner_service import ScannerService
 from app.services.ignore_service import IgnoreService
 from app.services.logger import manager as log_manager
+from app.services.project_store import ProjectStore
+from app.services.event_bus import event_bus, ProjectEvent
+from app.services.sync_history import sync_history, SyncHistoryService
+from app.services.disk_usage import disk_usage
+from app.services.status_cache import status_cache
+from app.services.watcher_service import watcher_service
+from app.services.repo_discovery import RepoDiscovery
+from app.services.job_service import job_service, Job, JobCancelled, checkpoint
+from app.models.sync_run import SyncRun, SyncStatsResponse
+from app.models.job import JobAccepted
 from app.i18n.log_messages import LogMessages
 
 router = APIRouter()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-
 @router.post("/", response_model=ProjectResponse)
-def create_project(project_in: ProjectCreate, session: Session = Depends(get_session)):
+async def create_project(project_in: ProjectCreate):
     """
     Manual mode: Add an existing local project to TuTu's Code Ark management
     
@@ -36,7 +50,7 @@ def create_project(project_in: ProjectCreate, session: Session = Depends(get_ses
         )
     
     # Check if already exists in database
-    existing = session.exec(select(Project).where(Project.path == project_in.path)).first()
+    existing = await run_db(ProjectStore.get_by_path, project_in.path)
     if existing:
         return ProjectResponse(
             id=existing.id,
@@ -50,7 +64,7 @@ def create_project(project_in: ProjectCreate, session: Session = Depends(get_ses
         )
     
     # Auto-detect git info
-    git_info = GitService.get_repo_info(project_in.path)
+    git_info = await asyncio.to_thread(GitService.get_repo_info, project_in.path)
     
     # Provide helpful feedback
     if not git_info.get("is_repo"):
@@ -72,9 +86,8 @@ def create_project(project_in: ProjectCreate, session: Session = Depends(get_ses
         branch=git_info.get("branch") or "main"
     )
     
-    session.add(project)
-    session.commit()
-    session.refresh(project)
+    project = await run_db(ProjectStore.add, project)
+    event_bus.publish(ProjectEvent(ProjectEvent.CREATED, project.id, project))
     return ProjectResponse(
         id=project.id,
         name=project.name,
@@ -86,8 +99,80 @@ def create_project(project_in: ProjectCreate, session: Session = Depends(get_ses
         config=project.config
     )
 
-@router.post("/auto-init", response_model=ProjectResponse)
-async def auto_init_project(init_data: ProjectAutoInit, session: Session = Depends(get_session)):
+@router.post("/import", status_code=202)
+async def import_projects(data: ProjectImport, wait: bool = Query(False)):
+    """
+    Bulk import: find every Git repository below `root` and register them all in
+    one transaction. Runs as a job (202 + job id, or `wait=true`); discovery
+    progress is streamed to the log WebSocket.
+    """
+    if not os.path.isdir(data.root):
+        raise HTTPException(status_code=404, detail=f"Path not found: {data.root}")
+    job = job_service.submit("import", lambda: _import_projects(data))
+    return await _job_reply(job, wait)
+
+async def _import_projects(data: ProjectImport):
+    t = lambda key, **kwargs: LogMessages.t(key, data.lang, **kwargs)
+    root = os.path.abspath(data.root)
+    started = time.perf_counter()
+    await log_manager.broadcast(t("import_starting", root=root), "info")
+
+    async with log_manager.stream(lang=data.lang) as stream:
+        def on_progress(dirs: int, found: int):
+            stream.progress("discover", dirs, None, t("import_found", found=found))
+        found = await run_sync(RepoDiscovery.discover, root, data.max_depth, on_progress)
+        stream.progress("discover", found["scanned_dirs"], None, t("import_found", found=len(found["repos"])), done=True)
+    await log_manager.broadcast(
+        t("import_discovered", dirs=found["scanned_dirs"], found=len(found["repos"]), ms=found["discover_ms"]), "info"
+    )
+
+    projects, skipped = await run_sync(RepoDiscovery.to_projects, found["repos"], data.require_remote)
+    checkpoint("register")
+    created, existing = await run_db(ProjectStore.add_many, projects)
+    skipped.extend({"path": path, "reason": "exists"} for path in existing)
+    for project in created:
+        event_bus.publish(ProjectEvent(ProjectEvent.CREATED, project.id, project))
+
+    elapsed = time.perf_counter() - started
+    rate = len(found["repos"]) / elapsed if elapsed > 0 else 0.0
+    await log_manager.broadcast(t("import_complete", imported=len(created), skipped=len(skipped), rate=rate), "success")
+    return {
+        "root": root,
+        "scanned_dirs": found["scanned_dirs"],
+        "pruned_dirs": found["pruned_dirs"],
+        "found": len(found["repos"]),
+        "imported": [{"id": p.id, "name": p.name, "path": p.path} for p in created],
+        "skipped": skipped,
+        "discover_ms": round(found["discover_ms"], 1),
+        "total_ms": round(elapsed * 1000, 1),
+        "repos_per_second": round(rate, 1),
+    }
+
+async def _job_reply(job: Job, wait: bool):
+    """
+    202 with the job id, or with `wait` the job's result / the error the endpoint
+    used to answer with synchronously
+    """
+    if not wait:
+        return JSONResponse(status_code=202, content={"ok": True, "job_id": job.id, "status": job.status})
+    await job_service.wait(job)
+    if job.status == Job.SUCCEEDED:
+        return JSONResponse(status_code=200, content=job.result)
+    if job.status == Job.CANCELLED:
+        raise HTTPException(status_code=409, detail="Job cancelled")
+    raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+
+@router.post(
+    "/auto-init",
+    status_code=202,
+    response_model=JobAccepted,
+    responses={200: {"model": ProjectResponse, "description": "The created project, with `wait=true`"}},
+)
+async def auto_init_project(init_data: ProjectAutoInit, wait: bool = Query(False)):
+    """
+    Validate the request, then create the GitHub repository and push in the background.
+    Answers 202 with a job id (poll GET /jobs/{id}); `wait=true` keeps the old blocking behaviour.
+    """
     t = lambda key, **kwargs: LogMessages.t(key, init_data.lang, **kwargs)
     
     await log_manager.broadcast(t("starting_init", name=init_data.name), "info")
@@ -96,8 +181,7 @@ async def auto_init_project(init_data: ProjectAutoInit, session: Session = Depen
     github_token = init_data.github_token
     if not github_token:
         await log_manager.broadcast(t("checking_token"), "info")
-        from app.models.settings import AppSettings
-        settings = session.exec(select(AppSettings)).first()
+        settings = await run_db(ProjectStore.get_settings)
         if settings and settings.github_token:
             github_token = settings.github_token
             await log_manager.broadcast(t("using_saved_token"), "success")
@@ -119,29 +203,37 @@ async def auto_init_project(init_data: ProjectAutoInit, session: Session = Depen
              
     # 2. Check database for duplicates
     await log_manager.broadcast(t("step2"), "info")
-    existing = session.exec(select(Project).where(Project.path == init_data.path)).first()
+    existing = await run_db(ProjectStore.get_by_path, init_data.path)
     if existing:
         await log_manager.broadcast(t("error_project_exists"), "error")
         raise HTTPException(status_code=400, detail="Project already managed by TuTu's Code Ark")
     await log_manager.broadcast(t("no_duplicate"), "success")
-         
+
+    job = job_service.submit("auto_init", lambda: _auto_init(init_data, github_token))
+    return await _job_reply(job, wait)
+
+async def _auto_init(init_data: ProjectAutoInit, github_token: str):
+    t = lambda key, **kwargs: LogMessages.t(key, init_data.lang, **kwargs)
+
     # 3. Call GitService for complex initialization
     await log_manager.broadcast(t("step3"), "info")
     try:
-        async def log_callback(msg: str, level: str = "info"):
-            await log_manager.broadcast(msg, level)
-        
-        remote_url = await GitService.init_and_push_to_github(
-            init_data.path, 
-            init_data.name, 
-            github_token,  # Use token from request or settings
-            init_data.is_private,
-            log_callback=log_callback,
-            lang=init_data.lang,  # Pass language parameter
-            gitignore_content=init_data.gitignore_content,  # Pass custom .gitignore content
-            description=init_data.description  # Pass repository description
-        )
+        # Step logs and push progress reach the clients while the worker thread runs
+        async with log_manager.stream(lang=init_data.lang) as stream:
+            remote_url = await GitService.init_and_push_to_github(
+                init_data.path, 
+                init_data.name, 
+                github_token,  # Use token from request or settings
+                init_data.is_private,
+                log_callback=stream.log,
+                lang=init_data.lang,  # Pass language parameter
+                gitignore_content=init_data.gitignore_content,  # Pass custom .gitignore content
+                description=init_data.description,  # Pass repository description
+                progress_callback=stream.progress
+            )
         await log_manager.broadcast(t("git_init_complete", url=remote_url), "success")
+    except JobCancelled:
+        raise
     except Exception as e:
         await log_manager.broadcast(t("error_git_init", error=str(e)), "error")
         raise HTTPException(status_code=500, detail=f"Auto-init failed: {str(e)}")
@@ -160,20 +252,17 @@ async def auto_init_project(init_data: ProjectAutoInit, session: Session = Depen
     config = ProjectConfig(auto_push=True, is_private=init_data.is_private)
     project.set_config(config)
     
-    session.add(project)
-    session.commit()
-    session.refresh(project)
+    project = await run_db(ProjectStore.add, project)
     await log_manager.broadcast(t("saved_to_db", id=project.id), "success")
     
     # 5. Start file monitoring
     await log_manager.broadcast(t("step5"), "info")
-    from app.services.watcher_service import watcher_service
-    watcher_service.watch_project(project)
+    event_bus.publish(ProjectEvent(ProjectEvent.CREATED, project.id, project))
     await log_manager.broadcast(t("monitoring_started"), "success")
     
     await log_manager.broadcast(t("init_complete"), "success")
     
-    return ProjectResponse(
+    return jsonable_encoder(ProjectResponse(
         id=project.id,
         name=project.name,
         path=project.path,
@@ -182,29 +271,127 @@ async def auto_init_project(init_data: ProjectAutoInit, session: Session = Depen
         last_sync_time=project.last_sync_time,
         status=project.status,
         config=project.config
-    )
+    ))
+
+PROJECT_FIELDS = list(ProjectResponse.model_fields)
+
+def _encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/", response_model=List[ProjectResponse])
-def read_projects(session: Session = Depends(get_session)):
-    projects = session.exec(select(Project)).all()
-    # Convert to response model with config
-    return [
-        ProjectResponse(
-            id=p.id,
-            name=p.name,
-            path=p.path,
-            remote_url=p.remote_url,
-            branch=p.branch,
-            last_sync_time=p.last_sync_time,
-            status=p.status,
-            config=p.config
-        )
-        for p in projects
-    ]
+async def read_projects(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    sync_mode: Optional[str] = Query(None),
+    name_prefix: Optional[str] = Query(None),
+    sort: str = Query("id", pattern="^-?(id|last_sync_time)$"),
+    fields: Optional[str] = Query(None, description="Comma separated subset of the response fields"),
+):
+    """
+    Project list with keyset pagination: with `limit`, the X-Next-Cursor header
+    holds the `cursor` for the next page (absent on the last one). `fields` loads
+    only the named columns; config is only parsed when asked for. The ETag covers
+    the page, so an unchanged list is answered with 304.
+    """
+    selected = PROJECT_FIELDS
+    columns = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in PROJECT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id is needed for the cursor, the sort column too; config comes from its JSON column
+        columns = ["id"] + [f for f in selected if f not in ("id", "config")]
+        if sort.lstrip("-") == "last_sync_time" and "last_sync_time" not in columns:
+            columns.append("last_sync_time")
+        if "config" in selected:
+            columns += ["config_version", "config_json"]
+
+    after = _decode_cursor(cursor) if cursor else None
+    rows, next_key = await run_db(
+        ProjectStore.list_page, limit, after, sort, status, sync_mode, name_prefix, columns
+    )
+
+    # Versions instead of contents: a 304 never parses or serializes a config
+    if columns is None:
+        stamp = [(p.id, p.name, p.path, p.remote_url, p.branch, p.last_sync_time, p.status, p.config_version) for p in rows]
+    else:
+        stamp = [tuple(v for k, v in row._mapping.items() if k != "config_json") for row in rows]
+    next_cursor = _encode_cursor(next_key) if next_key else None
+    digest = hashlib.sha1(repr((selected, stamp, next_cursor)).encode()).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    if columns is None:
+        body = [
+            {
+                "id": p.id,
+                "name": p.name,
+                "path": p.path,
+                "remote_url": p.remote_url,
+                "branch": p.branch,
+                "last_sync_time": p.last_sync_time,
+                "status": p.status,
+                "config": p.config.model_dump(),
+            }
+            for p in rows
+        ]
+    else:
+        body = []
+        for row in rows:
+            values = row._mapping
+            item = {f: values[f] for f in selected if f != "config"}
+            if "config" in selected:
+                item["config"] = parse_config(values["id"], values["config_version"], values["config_json"]).model_dump()
+            body.append(item)
+    return JSONResponse(content=jsonable_encoder(body), headers=headers)
+
+@router.get("/status")
+async def get_projects_status(
+    ids: Optional[List[int]] = Query(None),
+    files: bool = Query(False)
+):
+    """
+    Working tree status of many projects (all by default) in one call. Computed
+    concurrently on a bounded pool and cached until the watcher sees a change or a
+    sync finishes. Counts only unless `files=true`.
+    """
+    projects = await run_db(ProjectStore.list_all)
+    if ids:
+        wanted = set(ids)
+        projects = [p for p in projects if p.id in wanted]
+    statuses = await status_cache.get_many([(p.id, p.path) for p in projects])
+    results = []
+    for project in projects:
+        status, cached = statuses[project.id]
+        item = {"project_id": project.id, "cached": cached}
+        if "error" in status:
+            item["error"] = status["error"]
+        else:
+            item["count"] = status["count"]
+            if files:
+                item["changed_files"] = status["changed_files"]
+        results.append(item)
+    return results
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def read_project(project_id: int, session: Session = Depends(get_session)):
-    project = session.get(Project, project_id)
+async def read_project(project_id: int):
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return ProjectResponse(
@@ -219,21 +406,66 @@ def read_project(project_id: int, session: Session = Depends(get_session)):
     )
 
 @router.get("/{project_id}/status")
-def get_project_status(project_id: int, session: Session = Depends(get_session)):
-    project = session.get(Project, project_id)
+async def get_project_status(project_id: int):
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return GitService.get_status(project.path)
+    status, _ = await status_cache.get(project_id, project.path)
+    return status
+
+@router.get("/{project_id}/disk-usage")
+async def get_disk_usage(project_id: int, top: int = Query(20, ge=1, le=500)):
+    """
+    Heaviest untracked / changed subtrees of the working tree, e.g. to suggest
+    .gitignore additions. Served from the incremental index of watched projects.
+    """
+    project = await run_db(ProjectStore.get, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not os.path.isdir(project.path):
+        raise HTTPException(status_code=400, detail=f"Path does not exist: {project.path}")
+
+    def build():
+        try:
+            entries = GitService.get_porcelain_status(project.path)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return disk_usage.report(project_id, project.path, entries, top)
+
+    return await asyncio.to_thread(build)
+
+def _delete_github_repo(remote_url: str, github_token: str):
+    try:
+        from github import Github, GithubException
+        g = Github(github_token)
+        user = g.get_user()
+
+        # Extract repo name from URL
+        # URL format: https://github.com/username/repo.git or https://github.com/username/repo
+        repo_name = remote_url.split("/")[-1].replace(".git", "")
+
+        try:
+            repo = user.get_repo(repo_name)
+            track_github_call(g, "get_repo")
+            repo.delete()
+            track_github_call(g, "delete_repo")
+        except GithubException as e:
+            if e.status == 404:
+                # Repo already deleted or doesn't exist
+                pass
+            else:
+                raise HTTPException(status_code=500, detail=f"Failed to delete GitHub repository: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete remote repository: {str(e)}")
 
 @router.delete("/{project_id}")
-def delete_project(
+async def delete_project(
     project_id: int, 
     delete_remote: bool = Query(False, description="是否同时删除远程仓库"),
-    github_token: str = Query(None, description="GitHub Token (删除远程仓库时需要)"),
-    session: Session = Depends(get_session)
+    github_token: str = Query(None, description="GitHub Token (删除远程仓库时需要)")
 ):
-    project = session.get(Project, project_id)
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -242,42 +474,23 @@ def delete_project(
         if not github_token:
             raise HTTPException(status_code=400, detail="GitHub token required to delete remote repository")
         
-        try:
-            from github import Github, GithubException
-            g = Github(github_token)
-            user = g.get_user()
-            
-            # Extract repo name from URL
-            # URL format: https://github.com/username/repo.git or https://github.com/username/repo
-            repo_name = project.remote_url.split("/")[-1].replace(".git", "")
-            
-            try:
-                repo = user.get_repo(repo_name)
-                repo.delete()
-            except GithubException as e:
-                if e.status == 404:
-                    # Repo already deleted or doesn't exist
-                    pass
-                else:
-                    raise HTTPException(status_code=500, detail=f"Failed to delete GitHub repository: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to delete remote repository: {str(e)}")
+        await asyncio.to_thread(_delete_github_repo, project.remote_url, github_token)
     
-    session.delete(project)
-    session.commit()
+    await run_db(ProjectStore.delete, project_id)
+    await run_db(sync_history.delete_project_history, project_id)
+    event_bus.publish(ProjectEvent(ProjectEvent.DELETED, project_id))
     return {"ok": True, "message": "Project deleted successfully"}
 
 # --- Config & Scan Endpoints ---
 
 @router.put("/{project_id}/config", response_model=ProjectResponse)
-async def update_project_config(project_id: int, config: ProjectConfig, session: Session = Depends(get_session)):
-    project = session.get(Project, project_id)
+async def update_project_config(project_id: int, config: ProjectConfig):
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Get language setting
-    from app.models.settings import AppSettings
-    settings = session.exec(select(AppSettings)).first()
+    settings = await run_db(ProjectStore.get_settings)
     lang = settings.language if settings and hasattr(settings, 'language') else "zh"
     t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
     
@@ -300,10 +513,7 @@ async def update_project_config(project_id: int, config: ProjectConfig, session:
             "info"
         )
         
-        # Get GitHub token from settings
-        from app.models.settings import AppSettings
-        settings = session.exec(select(AppSettings)).first()
-        
+        # GitHub token comes from the settings loaded above
         print(f"[DEBUG] Settings found: {settings is not None}")
         if settings:
             print(f"[DEBUG] Has GitHub token: {bool(settings.github_token)}")
@@ -343,10 +553,10 @@ async def update_project_config(project_id: int, config: ProjectConfig, session:
     else:
         print(f"[DEBUG] Skipping GitHub update - no visibility change or not a GitHub repo")
     
-    project.set_config(config)
-    session.add(project)
-    session.commit()
-    session.refresh(project)
+    project = await run_db(ProjectStore.save_config, project_id, config)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    event_bus.publish(ProjectEvent(ProjectEvent.UPDATED, project.id, project))
     return ProjectResponse(
         id=project.id,
         name=project.name,
@@ -359,14 +569,14 @@ async def update_project_config(project_id: int, config: ProjectConfig, session:
     )
 
 @router.get("/{project_id}/config", response_model=ProjectConfig)
-def get_project_config(project_id: int, session: Session = Depends(get_session)):
-    project = session.get(Project, project_id)
+async def get_project_config(project_id: int):
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project.config
 
 @router.post("/{project_id}/scan")
-async def scan_project_changes(project_id: int, lang: str = Query("zh"), session: Session = Depends(get_session)):
+async def scan_project_changes(project_id: int, lang: str = Query("zh")):
     """
     Pre-flight check: scans changed files against project policy.
     """
@@ -374,13 +584,13 @@ async def scan_project_changes(project_id: int, lang: str = Query("zh"), session
     
     await log_manager.broadcast(t("scan_starting", id=project_id), "info")
     
-    project = session.get(Project, project_id)
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         await log_manager.broadcast(t("error_project_not_found", id=project_id), "error")
         raise HTTPException(status_code=404, detail="Project not found")
     
     await log_manager.broadcast(t("scan_getting_status", path=project.path), "info")
-    status = GitService.get_status(project.path)
+    status = await GitService.get_status_async(project.path)
     if "error" in status:
         await log_manager.broadcast(t("error_git_status", error=status['error']), "error")
         raise HTTPException(status_code=400, detail=status["error"])
@@ -388,7 +598,7 @@ async def scan_project_changes(project_id: int, lang: str = Query("zh"), session
     changed_files = status.get("changed_files", [])
     await log_manager.broadcast(t("scan_found_files", count=len(changed_files)), "info")
     
-    result = ScannerService.scan_directory(project.path, project.config, changed_files)
+    result = await ScannerService.scan_directory_async(project.path, project.config, changed_files)
     
     if result.safe:
         await log_manager.broadcast(t("scan_passed"), "success")
@@ -398,57 +608,101 @@ async def scan_project_changes(project_id: int, lang: str = Query("zh"), session
     return {"safe": result.safe, "risks": result.risks}
 
 @router.post("/{project_id}/ignore")
-def add_ignore_rule(project_id: int, files: List[str] = Body(...), session: Session = Depends(get_session)):
-    project = session.get(Project, project_id)
+async def add_ignore_rule(project_id: int, files: List[str] = Body(...), fold: bool = Query(False)):
+    """`fold=true` writes "dir/" and "dir/*.ext" where possible, which also ignores files added there later"""
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    for file_path in files:
-        IgnoreService.add_to_gitignore(project.path, file_path)
-        
-    return {"ok": True, "message": f"Added {len(files)} files to .gitignore"}
+    result = await asyncio.to_thread(IgnoreService.add_many_to_gitignore, project.path, files, fold)
+    return {
+        "ok": True,
+        "message": f"Added {len(result['added'])} rules for {len(files)} files to .gitignore",
+        **result,
+    }
+
+@router.get("/{project_id}/quarantine")
+async def get_quarantined_files(project_id: int):
+    """Files the pre-commit scan quarantined through .git/info/exclude"""
+    project = await run_db(ProjectStore.get, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"files": await asyncio.to_thread(IgnoreService.quarantined, project.path)}
+
+@router.post("/{project_id}/quarantine/release")
+async def release_quarantined_files(project_id: int, files: Optional[List[str]] = Body(None, embed=True)):
+    """Let quarantined files (all of them without `files`) back into the backup"""
+    project = await run_db(ProjectStore.get, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    released = await asyncio.to_thread(IgnoreService.release_quarantine, project.path, files)
+    if released:
+        # Released files are untracked changes now; no file event will announce them
+        watcher_service._on_file_change(project_id)
+    return {"ok": True, "released": released}
 
 @router.get("/{project_id}/gitignore")
-def get_gitignore(project_id: int, session: Session = Depends(get_session)):
+async def get_gitignore(project_id: int):
     """Get .gitignore content for a project"""
-    project = session.get(Project, project_id)
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    content = IgnoreService.get_gitignore_content(project.path)
+    content = await asyncio.to_thread(IgnoreService.get_gitignore_content, project.path)
     return {"content": content}
 
 @router.put("/{project_id}/gitignore")
-def update_gitignore(project_id: int, content: str = Body(..., embed=True), session: Session = Depends(get_session)):
+async def update_gitignore(project_id: int, content: str = Body(..., embed=True)):
     """Update .gitignore content for a project"""
-    project = session.get(Project, project_id)
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    IgnoreService.save_gitignore_content(project.path, content)
+    await asyncio.to_thread(IgnoreService.save_gitignore_content, project.path, content)
     return {"ok": True, "message": ".gitignore updated successfully"}
 
-@router.post("/{project_id}/manual-push")
-async def manual_push_project(project_id: int, lang: str = Query("zh"), session: Session = Depends(get_session)):
-    """Manually trigger a git push for the project"""
-    t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
-    
-    project = session.get(Project, project_id)
+@router.post("/{project_id}/manual-push", status_code=202)
+async def manual_push_project(project_id: int, lang: str = Query("zh"), wait: bool = Query(False)):
+    """
+    Manually trigger a git push for the project. Answers 202 with a job id (poll
+    GET /jobs/{id}); a push already running for the project is joined, not repeated.
+    """
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+
+    job = job_service.active("manual_push", project_id)
+    if job is None:
+        async def work():
+            with tracer.span("sync.manual", project_id=project_id):
+                return await _manual_push(project, lang)
+        job = job_service.submit("manual_push", work, project_id)
+    return await _job_reply(job, wait)
+
+async def _manual_push(project: Project, lang: str):
+    t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
+    project_id = project.id
     
     await log_manager.broadcast(t("manual_push_starting", name=project.name), "info", project_id)
     
+    run = SyncRun(project_id=project_id, started_at=datetime.now(), trigger="manual")
+    started = time.perf_counter()
+    
     # Check if there are changes to push
     try:
-        git_info = GitService.get_status(project.path)
+        git_info = await GitService.get_status_async(project.path)
+        run.status_ms = (time.perf_counter() - started) * 1000
         if "error" in git_info:
             await log_manager.broadcast(t("error_git_status", error=git_info['error']), "error", project_id)
             raise HTTPException(status_code=400, detail=git_info["error"])
         
         changed_count = git_info.get("count", 0)
+        run.files_changed = changed_count
         if changed_count == 0:
             await log_manager.broadcast(t("info_no_changes"), "info", project_id)
+            run.outcome = "no_changes"
+            run.total_ms = (time.perf_counter() - started) * 1000
+            sync_history.record(run)
             return {
                 "ok": True,
                 "message": "No changes to push",
@@ -456,44 +710,74 @@ async def manual_push_project(project_id: int, lang: str = Query("zh"), session:
             }
         
         await log_manager.broadcast(t("sync_detected", count=changed_count), "info", project_id)
+    except JobCancelled:
+        raise
     except Exception as e:
         await log_manager.broadcast(t("warning_status_check_failed", error=str(e)), "error", project_id)
         raise HTTPException(status_code=500, detail=str(e))
     
     # Update status to syncing
-    project.status = "syncing"
-    session.add(project)
-    session.commit()
+    await run_db(ProjectStore.update_status, project_id, "syncing")
     
+    stats: Dict[str, Any] = {}
     try:
-        result = await GitService.sync(project.path, "Manual backup by TuTu's Code Ark")
+        async with log_manager.stream(project_id, lang) as stream:
+            result = await GitService.sync(project.path, "Manual backup by TuTu's Code Ark", stats=stats, on_progress=stream.progress)
         
         # Update status to idle
-        project.status = "idle"
-        from datetime import datetime
-        project.last_sync_time = datetime.now()
-        session.add(project)
-        session.commit()
+        updated = await run_db(ProjectStore.update_status, project_id, "idle", datetime.now())
+        if updated:
+            event_bus.publish(ProjectEvent(ProjectEvent.UPDATED, project_id, updated))
         
         await log_manager.broadcast(t("push_success"), "success", project_id)
+        run.outcome = "success"
         return {
             "ok": True,
             "message": result,
             "pushed": True
         }
+    except JobCancelled:
+        # Stopped before the push: nothing left the machine
+        await run_db(ProjectStore.update_status, project_id, "idle")
+        run.outcome = "cancelled"
+        raise
     except Exception as e:
         # Update status to error
-        project.status = "error"
-        session.add(project)
-        session.commit()
+        await run_db(ProjectStore.update_status, project_id, "error")
+        run.outcome = "error"
+        run.error = str(e)[:500]
         
         await log_manager.broadcast(t("error_push_failed", error=str(e)), "error", project_id)
         raise HTTPException(status_code=500, detail=f"Push failed: {str(e)}")
+    finally:
+        run.add_ms = stats.get("add_ms", 0.0)
+        run.commit_ms = stats.get("commit_ms", 0.0)
+        run.push_ms = stats.get("push_ms", 0.0)
+        run.bytes_pushed = stats.get("bytes_pushed", 0)
+        run.total_ms = (time.perf_counter() - started) * 1000
+        sync_history.record(run)
+        status_cache.invalidate(project_id)
+
+@router.get("/{project_id}/history", response_model=List[SyncRun])
+async def get_sync_history(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="Only runs started at or after this time")
+):
+    """Recent sync runs (newest first) with per-stage timings"""
+    await sync_history.flush()
+    return await run_db(SyncHistoryService.get_history, project_id, limit, since)
+
+@router.get("/{project_id}/history/stats", response_model=SyncStatsResponse)
+async def get_sync_stats(project_id: int, hours: int = Query(24, ge=1, le=24 * 90)):
+    """Run counts, averages and p50/p95 per sync stage over the last `hours`"""
+    await sync_history.flush()
+    return await run_db(SyncHistoryService.get_stats, project_id, hours, datetime.now())
 
 @router.post("/{project_id}/sync-visibility")
-async def sync_repo_visibility(project_id: int, session: Session = Depends(get_session)):
+async def sync_repo_visibility(project_id: int):
     """Sync repository visibility status from GitHub to local database"""
-    project = session.get(Project, project_id)
+    project = await run_db(ProjectStore.get, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -501,8 +785,7 @@ async def sync_repo_visibility(project_id: int, session: Session = Depends(get_s
         raise HTTPException(status_code=400, detail="Not a GitHub repository")
     
     # Get GitHub token and language
-    from app.models.settings import AppSettings
-    settings = session.exec(select(AppSettings)).first()
+    settings = await run_db(ProjectStore.get_settings)
     
     if not settings or not settings.github_token:
         raise HTTPException(status_code=400, detail="GitHub token required")
@@ -518,13 +801,11 @@ async def sync_repo_visibility(project_id: int, session: Session = Depends(get_s
             settings.github_token
         )
         
-        # Update local config
-        config = project.config
-        config.is_private = is_private
-        project.set_config(config)
-        session.add(project)
-        session.commit()
-        session.refresh(project)
+        # Update local config (project.config is shared, update a copy)
+        config = project.config.model_copy(update={"is_private": is_private})
+        updated = await run_db(ProjectStore.save_config, project_id, config)
+        if updated:
+            event_bus.publish(ProjectEvent(ProjectEvent.UPDATED, project_id, updated))
         
         visibility = t("visibility_private") if is_private else t("visibility_public")
         await log_manager.broadcast(
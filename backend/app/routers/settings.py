@@ -1,16 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from sqlmodel import Session, select
 from datetime import datetime
 
-from app.core.database import engine
+from app.core.database import engine, run_db
 from app.models.settings import AppSettings, SettingsUpdate, SettingsResponse
 
 router = APIRouter()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-
 def get_or_create_settings(session: Session) -> AppSettings:
     """Get existing settings or create default"""
     settings = session.exec(select(AppSettings)).first()
@@ -21,10 +17,41 @@ def get_or_create_settings(session: Session) -> AppSettings:
         session.refresh(settings)
     return settings
 
+def _load_settings() -> AppSettings:
+    with Session(engine) as session:
+        return get_or_create_settings(session)
+
+def _save_settings(settings_update: SettingsUpdate) -> AppSettings:
+    with Session(engine) as session:
+        settings = get_or_create_settings(session)
+
+        # Update fields
+        if settings_update.github_token is not None:
+            settings.github_token = settings_update.github_token if settings_update.github_token.strip() else None
+
+        if settings_update.language is not None:
+            settings.language = settings_update.language
+
+        settings.last_updated = datetime.now()
+
+        session.add(settings)
+        session.commit()
+        session.refresh(settings)
+        return settings
+
+def _clear_github_token():
+    with Session(engine) as session:
+        settings = get_or_create_settings(session)
+        settings.github_token = None
+        settings.last_updated = datetime.now()
+
+        session.add(settings)
+        session.commit()
+
 @router.get("/", response_model=SettingsResponse)
-def get_settings(session: Session = Depends(get_session)):
+async def get_settings():
     """Get application settings (sensitive data masked)"""
-    settings = get_or_create_settings(session)
+    settings = await run_db(_load_settings)
     
     # Mask token for security
     token_preview = None
@@ -43,22 +70,9 @@ def get_settings(session: Session = Depends(get_session)):
     )
 
 @router.put("/", response_model=SettingsResponse)
-def update_settings(settings_update: SettingsUpdate, session: Session = Depends(get_session)):
+async def update_settings(settings_update: SettingsUpdate):
     """Update application settings"""
-    settings = get_or_create_settings(session)
-    
-    # Update fields
-    if settings_update.github_token is not None:
-        settings.github_token = settings_update.github_token if settings_update.github_token.strip() else None
-    
-    if settings_update.language is not None:
-        settings.language = settings_update.language
-    
-    settings.last_updated = datetime.now()
-    
-    session.add(settings)
-    session.commit()
-    session.refresh(settings)
+    settings = await run_db(_save_settings, settings_update)
     
     # Return masked response
     token_preview = None
@@ -77,20 +91,14 @@ def update_settings(settings_update: SettingsUpdate, session: Session = Depends(
     )
 
 @router.get("/github-token")
-def get_github_token(session: Session = Depends(get_session)):
+async def get_github_token():
     """Get the actual GitHub token (for internal API use only)"""
-    settings = get_or_create_settings(session)
+    settings = await run_db(_load_settings)
     return {"github_token": settings.github_token}
 
 @router.delete("/github-token")
-def clear_github_token(session: Session = Depends(get_session)):
+async def clear_github_token():
     """Clear the saved GitHub token"""
-    settings = get_or_create_settings(session)
-    settings.github_token = None
-    settings.last_updated = datetime.now()
-    
-    session.add(settings)
-    session.commit()
-    
+    await run_db(_clear_github_token)
     return {"ok": True, "message": "GitHub token cleared"}
 
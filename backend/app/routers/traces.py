@@ -0,0 +1,34 @@
+import os
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Dict, Any, Optional
+
+from app.core.tracing import tracer, TRACE_DIR
+from app.models.tracing import TraceConfig
+
+router = APIRouter()
+
+@router.get("/")
+def get_recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    name: Optional[str] = Query(None, description="Only traces whose root span has this name, e.g. sync.auto")
+) -> List[Dict[str, Any]]:
+    """Recently finished traces (newest first) with their nested spans"""
+    return tracer.recent(limit, name)
+
+@router.get("/config", response_model=TraceConfig)
+def get_trace_config():
+    return TraceConfig(sample_rate=tracer.sample_rate, export_path=tracer.export_path)
+
+@router.put("/config", response_model=TraceConfig)
+def update_trace_config(config: TraceConfig):
+    """Tune the sampling rate or (re)configure the OTLP file exporter at runtime"""
+    export_path = config.export_path or None
+    if export_path is not None and export_path != tracer.export_path:
+        # Only a plain file name: any local client may call this, it must not pick the file to append to
+        if export_path in (".", "..") or "/" in export_path or "\\" in export_path:
+            raise HTTPException(status_code=400, detail=f"export_path must be a file name, created under {TRACE_DIR}/")
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        export_path = os.path.join(TRACE_DIR, export_path)
+    tracer.sample_rate = config.sample_rate
+    tracer.export_path = export_path
+    return TraceConfig(sample_rate=tracer.sample_rate, export_path=tracer.export_path)
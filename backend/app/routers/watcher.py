@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from app.core.metrics import count_inotify_watches
+from app.services.watch_budget import watch_budget
+from app.services.watcher_service import watcher_service
+
+router = APIRouter()
+
+@router.get("/allocation")
+def get_watch_allocation() -> Dict[str, Any]:
+    """
+    How the inotify watch budget is shared: per project the watch mode (native or
+    polling), its directory count, last activity and snapshot polling progress,
+    plus the kernel limit and the watches this process actually holds.
+    """
+    report = watch_budget.report()
+    report["in_use"] = count_inotify_watches()
+    polls = watcher_service.poll_stats()
+    for project in report["projects"]:
+        project["poll"] = polls.get(project["project_id"])
+    return report
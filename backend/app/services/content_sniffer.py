@@ -0,0 +1,160 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from app.core.metrics import CONTENT_SNIFF_LOOKUPS
+
+# Policy categories understood by ProjectConfig.blocked_content_types
+CONTENT_TYPES = ("archive", "executable", "media", "image", "document", "binary")
+
+SNIFF_BYTES = 512
+
+# (offset, magic, category, kind); checked in order, first match wins
+_SIGNATURES = [
+    (0, b"PK\x03\x04", "archive", "zip"),
+    (0, b"PK\x05\x06", "archive", "zip"),
+    (0, b"\x1f\x8b", "archive", "gzip"),
+    (0, b"BZh", "archive", "bzip2"),
+    (0, b"\xfd7zXZ\x00", "archive", "xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "archive", "7z"),
+    (0, b"Rar!\x1a\x07", "archive", "rar"),
+    (0, b"\x28\xb5\x2f\xfd", "archive", "zstd"),
+    (0, b"\x04\x22\x4d\x18", "archive", "lz4"),
+    (0, b"MSCF", "archive", "cab"),
+    (257, b"ustar", "archive", "tar"),
+
+    (0, b"\x7fELF", "executable", "elf"),
+    (0, b"MZ", "executable", "pe"),
+    (0, b"\xfe\xed\xfa\xce", "executable", "mach-o"),
+    (0, b"\xfe\xed\xfa\xcf", "executable", "mach-o"),
+    (0, b"\xce\xfa\xed\xfe", "executable", "mach-o"),
+    (0, b"\xcf\xfa\xed\xfe", "executable", "mach-o"),
+    (0, b"\xca\xfe\xba\xbe", "executable", "mach-o/java class"),
+    (0, b"\x00asm", "executable", "wasm"),
+    (0, b"dex\n", "executable", "dex"),
+
+    (0, b"\x89PNG\r\n\x1a\n", "image", "png"),
+    (0, b"\xff\xd8\xff", "image", "jpeg"),
+    (0, b"GIF87a", "image", "gif"),
+    (0, b"GIF89a", "image", "gif"),
+    (0, b"II*\x00", "image", "tiff"),
+    (0, b"MM\x00*", "image", "tiff"),
+    (0, b"8BPS", "image", "psd"),
+    (0, b"\x00\x00\x01\x00", "image", "ico"),
+
+    (0, b"ID3", "media", "mp3"),
+    (0, b"OggS", "media", "ogg"),
+    (0, b"fLaC", "media", "flac"),
+    (0, b"\x1a\x45\xdf\xa3", "media", "matroska/webm"),
+    (0, b"FLV\x01", "media", "flv"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "media", "asf/wmv"),
+
+    (0, b"%PDF-", "document", "pdf"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "document", "ole (doc/xls/msi)"),
+    (0, b"SQLite format 3\x00", "binary", "sqlite"),
+]
+
+def _pe_header(head: bytes) -> bool:
+    # DOS stub: e_lfanew (offset 0x3c) points at the "PE\0\0" signature
+    if len(head) < 0x40:
+        return False
+    offset = int.from_bytes(head[0x3c:0x40], "little")
+    return head[offset:offset + 4] == b"PE\x00\x00"
+
+def _bzip2_header(head: bytes) -> bool:
+    # Block size digit, then the first block's magic (or the end of an empty stream)
+    return head[3:4] in (b"1", b"2", b"3", b"4", b"5", b"6", b"7", b"8", b"9") and head[4:10] in (b"1AY&SY", b"\x17rE8P\x90")
+
+def _id3_header(head: bytes) -> bool:
+    # ID3v2.2-2.4, then a 4 byte "syncsafe" tag size (high bit of every byte clear)
+    return len(head) >= 10 and head[3] in (2, 3, 4) and head[4] != 0xff and all(b < 0x80 for b in head[6:10])
+
+# Magics short or printable enough to start a text file: the rest of the header must check out too
+_STRUCTURE_CHECKS = {
+    b"MZ": _pe_header,
+    b"BZh": _bzip2_header,
+    b"ID3": _id3_header,
+    b"\x1f\x8b": lambda head: head[2:3] == b"\x08", # deflate, the only gzip method
+    b"MSCF": lambda head: head[4:8] == b"\x00\x00\x00\x00",
+    b"OggS": lambda head: head[4:5] == b"\x00",
+    b"8BPS": lambda head: head[4:6] in (b"\x00\x01", b"\x00\x02"),
+    b"dex\n": lambda head: head[4:7].isdigit() and head[7:8] == b"\x00",
+}
+
+# RIFF containers: format id at offset 8
+_RIFF_FORMATS = {b"WAVE": ("media", "wav"), b"AVI ": ("media", "avi"), b"WEBP": ("image", "webp")}
+# ISO BMFF (mp4/mov/heic...): major brand at offset 8
+_IMAGE_BRANDS = {b"heic", b"heix", b"mif1", b"msf1", b"avif"}
+# ZIP based formats that are documents rather than archives
+_ZIP_DOCUMENTS = {".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub", ".vsdx"}
+
+# Control characters that do not occur in text (everything below 0x20 except \t \n \f \r \b ESC)
+_TEXT_CONTROLS = {0x08, 0x09, 0x0a, 0x0c, 0x0d, 0x1b}
+_NON_TEXT = bytes(b for b in range(0x20) if b not in _TEXT_CONTROLS) + b"\x7f"
+
+class ContentSniffer:
+    """
+    Classifies files by their leading bytes (at most SNIFF_BYTES are read), so a
+    renamed archive or an extensionless binary is recognised regardless of its suffix.
+
+    Verdicts are memoized per path and invalidated by size / mtime / inode, so
+    each new or changed file costs one small read and unchanged files none.
+    """
+    CACHE_MAX_ENTRIES = 200_000
+
+    # full path -> (st_size, st_mtime_ns, st_ino, (category, kind) or None)
+    _cache: Dict[str, Tuple[int, int, int, Optional[Tuple[str, str]]]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def sniff(head: bytes, rel_path: str = "") -> Optional[Tuple[str, str]]:
+        """(category, kind) for the leading bytes of a file, None for text"""
+        if not head:
+            return None
+        for offset, magic, category, kind in _SIGNATURES:
+            if head.startswith(magic, offset):
+                check = _STRUCTURE_CHECKS.get(magic)
+                if check is not None and not check(head):
+                    continue
+                if kind == "zip" and os.path.splitext(rel_path)[1].lower() in _ZIP_DOCUMENTS:
+                    return "document", os.path.splitext(rel_path)[1].lower().lstrip(".")
+                return category, kind
+        if head.startswith(b"RIFF") and head[8:12] in _RIFF_FORMATS:
+            return _RIFF_FORMATS[head[8:12]]
+        if head[4:8] == b"ftyp":
+            brand = head[8:12]
+            return ("image", brand.decode("ascii", "replace")) if brand in _IMAGE_BRANDS else ("media", "mp4/mov")
+        if len(head) > 2 and head[0] == 0xff and head[1] in (0xfb, 0xf3, 0xf2):
+            return "media", "mp3"
+
+        if b"\x00" in head:
+            return "binary", "unknown"
+        non_text = sum(1 for b in head if b in _NON_TEXT)
+        if non_text / len(head) > 0.3:
+            return "binary", "unknown"
+        return None
+
+    @classmethod
+    def classify(cls, full_path: str, st: Optional[os.stat_result] = None, rel_path: str = "") -> Optional[Tuple[str, str]]:
+        """Memoized sniff() of a file on disk; pass the caller's stat result to save a syscall"""
+        if st is None:
+            st = os.lstat(full_path)
+        cached = cls._cache.get(full_path)
+        if cached is not None and cached[:3] == (st.st_size, st.st_mtime_ns, st.st_ino):
+            CONTENT_SNIFF_LOOKUPS.inc(1, "hit")
+            return cached[3]
+        CONTENT_SNIFF_LOOKUPS.inc(1, "miss")
+
+        with open(full_path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+        verdict = cls.sniff(head, rel_path or full_path)
+        with cls._lock:
+            if len(cls._cache) >= cls.CACHE_MAX_ENTRIES and full_path not in cls._cache:
+                for key in list(cls._cache)[:cls.CACHE_MAX_ENTRIES // 10]:
+                    del cls._cache[key]
+            cls._cache[full_path] = (st.st_size, st.st_mtime_ns, st.st_ino, verdict)
+        return verdict
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._cache.clear()
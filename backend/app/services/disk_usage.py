@@ -0,0 +1,313 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Any
+from app.core.metrics import DISK_USAGE_RESCANS, DISK_USAGE_DIRS
+
+class _Node:
+    """One directory: bytes/files directly inside it plus the totals of its whole subtree"""
+    __slots__ = ("own_bytes", "own_files", "children", "bytes", "files")
+
+    def __init__(self, own_bytes: int, own_files: int, children: Set[str]):
+        self.own_bytes = own_bytes
+        self.own_files = own_files
+        self.children = children
+        self.bytes = own_bytes
+        self.files = own_files
+
+def _parent(rel: str) -> str:
+    return rel.rpartition("/")[0]
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+def _size_display(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f} MB"
+
+class DiskUsageIndex:
+    """
+    Per-directory size index of one working tree (".git" excluded).
+
+    Built once with an os.scandir walk; afterwards file system events only mark
+    directories dirty and refresh() re-lists just those directories, so keeping
+    the index current costs one scandir per touched directory, not a full walk.
+    """
+    # Beyond this many dirty directories a full rebuild is cheaper than replaying them
+    MAX_DIRTY = 20_000
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.nodes: Dict[str, _Node] = {}
+        self.built_at: Optional[float] = None
+        self.updated_at: Optional[float] = None
+        self._dirty: Set[str] = set()
+        self._stale = True
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def mark(self, path: str, is_directory: bool = False):
+        """Record that the listing of the directory holding `path` (and `path` itself if a directory) changed"""
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if rel == ".":
+            rel = ""
+        elif rel.startswith("../") or rel == ".." or ".git" in rel.split("/"):
+            return
+        with self._lock:
+            if self._stale:
+                return
+            self._dirty.add(_parent(rel) if rel else "")
+            if is_directory:
+                self._dirty.add(rel)
+            if len(self._dirty) > self.MAX_DIRTY:
+                self._dirty.clear()
+                self._stale = True
+
+    def refresh(self):
+        """Bring the index up to date: full build when stale, otherwise replay dirty directories"""
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        with self._lock:
+            stale = self._stale
+            dirty = self._dirty
+            self._dirty = set()
+            self._stale = False
+        if stale:
+            DISK_USAGE_RESCANS.inc(1, "full")
+            self.nodes = {}
+            # A missing root leaves the index empty
+            self._walk("")
+            self.built_at = self.updated_at = time.time()
+            return
+        if not dirty:
+            return
+
+        fresh: Set[str] = set()
+        # Shallow first: a new directory is walked whole when its parent is re-listed,
+        # after which its own dirty entries have nothing left to do
+        for rel in sorted(dirty, key=lambda r: (r.count("/") if r else -1, r)):
+            if rel not in self.nodes or self._under(rel, fresh):
+                continue
+            fresh.update(self._rescan(rel))
+        DISK_USAGE_RESCANS.inc(len(dirty), "dir")
+        self.updated_at = time.time()
+
+    def subtree(self, rel: str) -> Tuple[int, int]:
+        """(bytes, files) below a directory, (0, 0) if it is not indexed"""
+        node = self.nodes.get(rel.strip("/"))
+        return (node.bytes, node.files) if node else (0, 0)
+
+    @staticmethod
+    def _under(rel: str, prefixes: Set[str]) -> bool:
+        if not prefixes:
+            return False
+        while True:
+            if rel in prefixes:
+                return True
+            if not rel:
+                return False
+            rel = _parent(rel)
+
+    def _list(self, rel: str) -> Optional[Tuple[int, int, Set[str]]]:
+        """(bytes, files, sub directories) directly inside a directory, None if it is gone"""
+        own_bytes = own_files = 0
+        children = set()
+        try:
+            with os.scandir(os.path.join(self.root, rel)) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != ".git":
+                                children.add(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            own_bytes += entry.stat(follow_symlinks=False).st_size
+                            own_files += 1
+                    except OSError:
+                        continue
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except OSError:
+            # Unreadable directory: count it as empty rather than failing the whole index
+            pass
+        return own_bytes, own_files, children
+
+    def _walk(self, rel: str) -> Optional[_Node]:
+        """Index a whole subtree; returns its root node with totals filled in"""
+        listing = self._list(rel)
+        if listing is None:
+            return None
+        order = []
+        stack = [(rel, listing)]
+        while stack:
+            current, (own_bytes, own_files, children) = stack.pop()
+            self.nodes[current] = _Node(own_bytes, own_files, children)
+            order.append(current)
+            for name in list(children):
+                child = _join(current, name)
+                child_listing = self._list(child)
+                if child_listing is None:
+                    children.discard(name)
+                    continue
+                stack.append((child, child_listing))
+        # Children come after their parent in `order`, so reversed order folds totals bottom-up
+        for current in reversed(order):
+            if current != rel:
+                node = self.nodes[current]
+                parent = self.nodes[_parent(current)]
+                parent.bytes += node.bytes
+                parent.files += node.files
+        return self.nodes[rel]
+
+    def _drop(self, rel: str) -> Optional[_Node]:
+        node = self.nodes.pop(rel, None)
+        if node is not None:
+            stack = [_join(rel, name) for name in node.children]
+            while stack:
+                current = stack.pop()
+                child = self.nodes.pop(current, None)
+                if child is not None:
+                    stack.extend(_join(current, name) for name in child.children)
+        return node
+
+    def _propagate(self, rel: str, delta_bytes: int, delta_files: int):
+        """Apply a size change of `rel`'s subtree to rel and every ancestor"""
+        if not delta_bytes and not delta_files:
+            return
+        while True:
+            node = self.nodes.get(rel)
+            if node is not None:
+                node.bytes += delta_bytes
+                node.files += delta_files
+            if not rel:
+                return
+            rel = _parent(rel)
+
+    def _rescan(self, rel: str) -> List[str]:
+        """Re-list one directory and fix the totals; returns sub directories walked from scratch"""
+        node = self.nodes[rel]
+        listing = self._list(rel)
+        if listing is None:
+            if not rel:
+                return []
+            self._drop(rel)
+            parent = self.nodes.get(_parent(rel))
+            if parent is not None:
+                parent.children.discard(rel.rpartition("/")[2])
+            self._propagate(_parent(rel), -node.bytes, -node.files)
+            return []
+
+        own_bytes, own_files, children = listing
+        delta_bytes = own_bytes - node.own_bytes
+        delta_files = own_files - node.own_files
+        node.own_bytes, node.own_files = own_bytes, own_files
+        walked = []
+        for name in node.children - children:
+            gone = self._drop(_join(rel, name))
+            if gone is not None:
+                delta_bytes -= gone.bytes
+                delta_files -= gone.files
+        for name in children - node.children:
+            child = _join(rel, name)
+            added = self._walk(child)
+            if added is None:
+                children.discard(name)
+                continue
+            walked.append(child)
+            delta_bytes += added.bytes
+            delta_files += added.files
+        node.children = children
+        self._propagate(rel, delta_bytes, delta_files)
+        return walked
+
+class DiskUsageService:
+    """
+    Disk usage per project. Indexes of watched projects are kept and updated from
+    watcher events; for other projects every report walks the tree afresh.
+    """
+    def __init__(self):
+        self._indexes: Dict[int, DiskUsageIndex] = {}
+        self._live: Set[int] = set()
+        self._lock = threading.Lock()
+        DISK_USAGE_DIRS.set_function(lambda: sum(len(index.nodes) for index in list(self._indexes.values())))
+
+    def attach(self, project_id: int):
+        """The watcher feeds this project's events from now on"""
+        self._live.add(project_id)
+
+    def detach(self, project_id: int):
+        self._live.discard(project_id)
+        self._indexes.pop(project_id, None)
+
+    def invalidate(self, project_id: int):
+        """Events were lost: the next report walks the tree again"""
+        self._indexes.pop(project_id, None)
+
+    def on_path(self, project_id: int, path: str, is_directory: bool = False):
+        """Watcher hook; runs on the observer thread, so it only marks state"""
+        index = self._indexes.get(project_id)
+        if index is not None:
+            index.mark(path, is_directory)
+
+    def get_index(self, project_id: int, path: str) -> DiskUsageIndex:
+        with self._lock:
+            index = self._indexes.get(project_id)
+            if index is None or index.root != os.path.abspath(path):
+                index = DiskUsageIndex(path)
+                if project_id in self._live:
+                    self._indexes[project_id] = index
+        index.refresh()
+        return index
+
+    def report(self, project_id: int, path: str, entries: List[Tuple[str, str]], top: int = 20) -> Dict[str, Any]:
+        """
+        Heaviest untracked / changed subtrees of a project.
+
+        `entries` are (status, path) pairs from `git status --porcelain`, where fully
+        untracked directories appear once with a trailing slash; their size comes
+        straight from the index. Remaining files are grouped by parent directory.
+        """
+        index = self.get_index(project_id, path)
+        subtrees: List[Dict[str, Any]] = []
+        groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for status, rel in entries:
+            kind = "untracked" if status == "??" else "changed"
+            if rel.endswith("/"):
+                size, files = index.subtree(rel)
+                subtrees.append({
+                    "path": rel, "kind": kind, "bytes": size, "files": files,
+                    "size_display": _size_display(size), "suggestion": "/" + rel,
+                })
+                continue
+            try:
+                size = os.lstat(os.path.join(index.root, rel)).st_size
+            except OSError:
+                continue
+            directory = _parent(rel)
+            group = groups.get((directory, kind))
+            if group is None:
+                group = groups[(directory, kind)] = {"path": directory + "/" if directory else "/", "kind": kind, "bytes": 0, "files": 0, "largest": []}
+            group["bytes"] += size
+            group["files"] += 1
+            group["largest"].append((size, rel))
+
+        for group in groups.values():
+            largest = sorted(group["largest"], reverse=True)[:5]
+            group["largest"] = [{"path": rel, "bytes": size, "size_display": _size_display(size)} for size, rel in largest]
+            group["size_display"] = _size_display(group["bytes"])
+            group["suggestion"] = "/" + largest[0][1] if group["kind"] == "untracked" and group["files"] == 1 else None
+            subtrees.append(group)
+
+        subtrees.sort(key=lambda s: s["bytes"], reverse=True)
+        total_bytes, total_files = index.subtree("")
+        return {
+            "total_bytes": total_bytes,
+            "total_files": total_files,
+            "total_display": _size_display(total_bytes),
+            "live": project_id in self._live,
+            "built_at": index.built_at,
+            "updated_at": index.updated_at,
+            "subtrees": subtrees[:top],
+        }
+
+disk_usage = DiskUsageService()
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Callable, List, Optional
+from app.models.project import Project
+
+class ProjectEvent:
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    def __init__(self, kind: str, project_id: int, project: Optional[Project] = None):
+        self.kind = kind
+        self.project_id = project_id
+        # Detached snapshot of the row after the change (None for deletions)
+        self.project = project
+
+class EventBus:
+    """
+    In-process publish/subscribe for project lifecycle events.
+
+    Subscribers are plain callables and always run on the event loop thread,
+    so routers may publish from FastAPI's threadpool as well as from async handlers.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[ProjectEvent], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self, callback: Callable[[ProjectEvent], None]):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ProjectEvent], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, event: ProjectEvent):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._dispatch(event)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: ProjectEvent):
+        for callback in self._subscribers[:]:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in event subscriber for {event.kind} project {event.project_id}: {e}")
+
+event_bus = EventBus()
@@ -1,13 +1,102 @@
 import asyncio
-from git import Repo, GitCommandError
-from typing import List, Dict, Any
+import contextvars
+import functools
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 import os
-from github import Github, GithubException
 from app.i18n.log_messages import LogMessages
+from app.core.tracing import tracer
+from app.core.metrics import GITHUB_API_CALLS, GITHUB_RATE_LIMIT_REMAINING, GITHUB_RATE_LIMIT
+from app.services.job_service import checkpoint, current_job
+from app.services.worker_pool import worker_pool
+
+_SIZE_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+_SIZE_RE = re.compile(r"([\d.]+)\s*(bytes|KiB|MiB|GiB)")
+
+# Blocking git / GitHub work (status, add, commit, push, API calls). Bounded, so a
+# burst of pushes cannot take every thread of the default executor.
+sync_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tutu-sync")
+
+async def run_sync(func, *args):
+    """Run a blocking git callable on sync_executor; the caller's context (trace span, job) is carried over"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(sync_executor, contextvars.copy_context().run, functools.partial(func, *args))
+
+@functools.lru_cache(maxsize=None)
+def _push_progress_class():
+    # GitPython costs a noticeable part of a cold start, so it (and this subclass) load on
+    # first push. The cache builds the class once per process; every push reuses it
+    from git import RemoteProgress
+
+    class PushProgress(RemoteProgress):
+        """
+        Collects what git reports while pushing or fetching (e.g. "Writing objects: ...,
+        195.55 KiB | 12.22 MiB/s"). GitPython parses git's progress output line by line;
+        each line is passed on to `on_progress(stage, cur, total, detail, done)` and, for
+        a push inside a job, turned into the job's progress.
+        """
+        STAGES = {
+            RemoteProgress.COUNTING: "counting",
+            RemoteProgress.COMPRESSING: "compressing",
+            RemoteProgress.WRITING: "writing",
+            RemoteProgress.RECEIVING: "receiving",
+            RemoteProgress.RESOLVING: "resolving",
+            RemoteProgress.FINDING_SOURCES: "finding_sources",
+            RemoteProgress.CHECKING_OUT: "checking_out",
+        }
+        # Share of a push each stage stands for: (start, weight)
+        JOB_WEIGHTS = {
+            RemoteProgress.COUNTING: (0.0, 0.1),
+            RemoteProgress.COMPRESSING: (0.1, 0.2),
+            RemoteProgress.WRITING: (0.3, 0.7),
+        }
+
+        def __init__(self, on_progress=None):
+            super().__init__()
+            self.bytes_written = 0
+            self.on_progress = on_progress
+            # update() runs on GitPython's stderr reader thread, which does not inherit the job context
+            self.job = current_job.get()
+
+        def update(self, op_code, cur_count, max_count=None, message=''):
+            stage = op_code & self.OP_MASK
+            if stage == self.WRITING and message:
+                match = _SIZE_RE.search(message)
+                if match:
+                    self.bytes_written = int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+            cur = int(cur_count or 0)
+            total = int(max_count) if max_count else None
+            if self.job is not None and total and stage in self.JOB_WEIGHTS:
+                start, weight = self.JOB_WEIGHTS[stage]
+                self.job.progress = round(start + weight * min(cur / total, 1.0), 3)
+            if self.on_progress is not None and stage in self.STAGES:
+                try:
+                    self.on_progress(self.STAGES[stage], cur, total, message or "", bool(op_code & self.END))
+                except Exception as e:
+                    print(f"Progress callback error: {e}")
+
+    return PushProgress
+
+def push_progress(on_progress=None):
+    """A new PushProgress instance; the class itself is created once (see _push_progress_class)"""
+    return _push_progress_class()(on_progress)
+
+def track_github_call(g: "Github", operation: str):
+    """Count a finished GitHub API request and refresh the rate-limit gauges from its response headers"""
+    GITHUB_API_CALLS.labels(operation).inc()
+    try:
+        remaining, limit = g.rate_limiting
+        GITHUB_RATE_LIMIT_REMAINING.set(remaining)
+        GITHUB_RATE_LIMIT.set(limit)
+    except Exception:
+        pass
 
 class GitService:
     @staticmethod
     def is_valid_repo(path: str) -> bool:
+        from git import Repo, GitCommandError
         try:
             _ = Repo(path)
             return True
@@ -16,6 +105,7 @@ class GitService:
 
     @staticmethod
     def get_repo_info(path: str) -> Dict[str, Any]:
+        from git import Repo, GitCommandError
         if not os.path.exists(path):
             raise ValueError(f"Path does not exist: {path}")
             
@@ -42,11 +132,17 @@ class GitService:
     
     @staticmethod
     def get_status(path: str) -> Dict[str, Any]:
+        from git import Repo
+        checkpoint("status")
         try:
-            repo = Repo(path)
-            # Get changed files
-            changed = [item.a_path for item in repo.index.diff(None)]
-            changed.extend(repo.untracked_files)
+            with tracer.child("git.status") as span:
+                repo = Repo(path)
+                # Read-only: no opportunistic index refresh, whose write would look like a change to the watcher
+                repo.git.update_environment(GIT_OPTIONAL_LOCKS="0")
+                # Get changed files
+                changed = [item.a_path for item in repo.index.diff(None)]
+                changed.extend(repo.untracked_files)
+                span.set_attribute("files", len(changed))
             return {
                 "changed_files": changed,
                 "count": len(changed)
@@ -55,12 +151,62 @@ class GitService:
             return {"error": str(e)}
 
     @staticmethod
-    async def sync(path: str, message: str = "Backup by TuTu's Code Ark") -> str:
+    def get_porcelain_status(path: str) -> List[Tuple[str, str]]:
+        """(XY status, path) per change; a fully untracked directory is one "dir/" entry"""
+        from git import Repo
+        repo = Repo(path)
+        fields = repo.git.status("--porcelain", "-z", "--untracked-files=normal").split("\0")
+        entries = []
+        i = 0
+        while i < len(fields):
+            field = fields[i]
+            i += 1
+            if len(field) < 4:
+                continue
+            status = field[:2]
+            entries.append((status, field[3:]))
+            # Renames and copies carry their source path in the next field
+            if status[0] in "RC":
+                i += 1
+        return entries
+
+    @staticmethod
+    def has_changes(path: str) -> bool:
+        """
+        Cheap dirty check: one `git status` without taking the index lock. With the
+        untracked cache (written into the index by our syncs) git only lists
+        directories whose mtime changed when looking for untracked files.
+        """
+        from git import Repo
+        repo = Repo(path)
+        repo.git.update_environment(GIT_OPTIONAL_LOCKS="0")
+        return bool(repo.git(c="core.untrackedCache=true").status("--porcelain", "-z", "--untracked-files=normal"))
+
+    @staticmethod
+    async def get_status_async(path: str) -> Dict[str, Any]:
+        # index.diff / untracked_files walk the whole tree, keep them off the event loop
+        if worker_pool.enabled:
+            checkpoint("status")
+            return await worker_pool.status(path)
+        return await run_sync(GitService.get_status, path)
+
+    @staticmethod
+    async def sync(path: str, message: str = "Backup by TuTu's Code Ark", stats: Optional[Dict[str, Any]] = None,
+                   exclude: Optional[List[str]] = None, on_progress=None) -> str:
         # Run blocking git operations in a thread
-        return await asyncio.to_thread(GitService._sync_sync, path, message)
+        return await run_sync(GitService._sync_sync, path, message, stats, exclude, on_progress)
 
     @staticmethod
-    def _sync_sync(path: str, message: str) -> str:
+    def _sync_sync(path: str, message: str, stats: Optional[Dict[str, Any]] = None, exclude: Optional[List[str]] = None,
+                   on_progress=None) -> str:
+        """
+        Add, commit and push everything except the `exclude` paths. If `stats` is
+        given it is filled with add_ms / commit_ms / push_ms and bytes_pushed;
+        `on_progress` receives git's push progress (see PushProgress).
+        """
+        from git import Repo
+        if stats is None:
+            stats = {}
         repo = Repo(path)
         if not repo.remotes:
             raise Exception("No remote configured")
@@ -69,43 +215,80 @@ class GitService:
         if not (repo.is_dirty() or repo.untracked_files):
             return "No changes to push"
 
-        repo.git.add(all=True)
+        checkpoint("add")
+        started = time.perf_counter()
+        with tracer.child("git.add", excluded=len(exclude or [])):
+            # Stores the untracked cache in the index for the lock-free status checks
+            repo.git(c="core.untrackedCache=true").add(all=True)
+            if exclude:
+                GitService._unstage(repo, exclude)
+        stats["add_ms"] = (time.perf_counter() - started) * 1000
+        if exclude and not GitService._has_staged_changes(repo):
+            return "No changes to push"
+
         # Ensure message ends with signature
         if not message.endswith("by TuTu's Code Ark"):
             message = f"{message} by TuTu's Code Ark"
-        repo.index.commit(message)
+        # Last point a cancellation is honoured. Once committed the tree is clean, and the
+        # clean-tree check above would keep a commit left unpushed from ever going out
+        checkpoint("commit")
+        started = time.perf_counter()
+        with tracer.child("git.commit"):
+            repo.index.commit(message)
+        stats["commit_ms"] = (time.perf_counter() - started) * 1000
         
         # Push to current active branch
         origin = repo.remote(name='origin')
         current_branch = repo.active_branch.name
-        origin.push(refspec=f'{current_branch}:{current_branch}', set_upstream=True)
+        progress = push_progress(on_progress)
+        checkpoint("push", cancellable=False)
+        started = time.perf_counter()
+        with tracer.child("git.push", branch=current_branch) as span:
+            origin.push(refspec=f'{current_branch}:{current_branch}', set_upstream=True, progress=progress)
+            span.set_attribute("bytes", progress.bytes_written)
+        stats["push_ms"] = (time.perf_counter() - started) * 1000
+        stats["bytes_pushed"] = progress.bytes_written
         return "Push successful"
 
     @staticmethod
-    async def init_and_push_to_github(path: str, name: str, token: str, private: bool, log_callback=None, lang: str = "zh", gitignore_content: str = None, description: str = None) -> str:
-        log_messages = []
-        
-        def sync_log(msg: str, level: str = "info"):
-            log_messages.append((msg, level))
-        
-        result = await asyncio.to_thread(GitService._init_and_push_sync, path, name, token, private, sync_log, lang, gitignore_content, description)
-        
-        # 批量发送日志消息
-        if log_callback:
-            for msg, level in log_messages:
-                await log_callback(msg, level)
-        
-        return result
+    def _unstage(repo: "Repo", paths: List[str], batch: int = 500):
+        """Take paths back out of the index, leaving the working tree untouched"""
+        has_head = repo.head.is_valid()
+        for i in range(0, len(paths), batch):
+            pathspecs = [f":(literal){p}" for p in paths[i:i + batch]]
+            if has_head:
+                # Back to the committed version (or untracked again for new files)
+                repo.git.reset("-q", "HEAD", "--", *pathspecs)
+            else:
+                repo.git.rm("--cached", "-q", "--ignore-unmatch", "--", *pathspecs)
+
+    @staticmethod
+    def _has_staged_changes(repo: "Repo") -> bool:
+        if not repo.head.is_valid():
+            return bool(repo.index.entries)
+        return bool(repo.index.diff("HEAD"))
+
+    @staticmethod
+    async def init_and_push_to_github(path: str, name: str, token: str, private: bool, log_callback=None, lang: str = "zh", gitignore_content: str = None, description: str = None, progress_callback=None) -> str:
+        """
+        `log_callback(msg, level)` and `progress_callback(stage, cur, total, detail, done)`
+        are called from the worker thread as the steps happen (see LogStream)
+        """
+        return await run_sync(GitService._init_and_push_sync, path, name, token, private, log_callback, lang, gitignore_content, description, progress_callback)
 
     @staticmethod
-    def _init_and_push_sync(path: str, name: str, token: str, private: bool, log_callback=None, lang: str = "zh", gitignore_content: str = None, description: str = None) -> str:
+    def _init_and_push_sync(path: str, name: str, token: str, private: bool, log_callback=None, lang: str = "zh", gitignore_content: str = None, description: str = None, progress_callback=None) -> str:
+        from git import Repo, GitCommandError
+        from github import Github, GithubException
         t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
+        progress = lambda: push_progress(progress_callback)
         
         def log(msg: str, level: str = "info"):
             if log_callback:
                 log_callback(msg, level)
         
         # 1. Initialize local repo
+        checkpoint("init")
         log(t("init_local_repo"))
         if not os.path.exists(path):
             os.makedirs(path)
@@ -130,16 +313,21 @@ class GitService:
             log(t("gitignore_exists"), "success")
 
         # 3. Create Repo on GitHub
+        checkpoint("github")
         log(t("connecting_github"))
         g = Github(token)
         user = g.get_user()
         log(t("connected_to_user", username=user.login), "success")
+        track_github_call(g, "get_user")
         
         log(t("checking_repo_exists", name=name))
         repo_exists = False
         try:
             # Check if repo exists
-            gh_repo = user.get_repo(name)
+            try:
+                gh_repo = user.get_repo(name)
+            finally:
+                track_github_call(g, "get_repo")
             remote_url = gh_repo.clone_url
             repo_exists = True
             log(t("repo_exists", url=remote_url), "success")
@@ -147,6 +335,7 @@ class GitService:
             # Check if remote repo has commits
             try:
                 commits = list(gh_repo.get_commits())
+                track_github_call(g, "get_commits")
                 if len(commits) > 0:
                     log(t("remote_has_commits", count=len(commits)), "info")
             except:
@@ -161,6 +350,7 @@ class GitService:
                 auto_init=False,
                 description=description if description else None
             )
+            track_github_call(g, "create_repo")
             remote_url = gh_repo.clone_url
             log(t("repo_created", url=remote_url), "success")
             
@@ -169,6 +359,7 @@ class GitService:
         auth_remote_url = remote_url.replace("https://", f"https://oauth2:{token}@")
 
         # 4. Add Remote
+        checkpoint("remote")
         log(t("configuring_remote"))
         if 'origin' in repo.remotes:
             repo.delete_remote('origin')
@@ -178,6 +369,7 @@ class GitService:
         log(t("remote_added"), "success")
         
         # 5. Initial Commit & Push
+        checkpoint("commit")
         log(t("preparing_commit"))
         repo.git.add(all=True)
         files_count = len(repo.untracked_files) + len([item for item in repo.index.diff(None)])
@@ -201,13 +393,14 @@ class GitService:
             repo.git.branch('-M', 'main')
             log(t("branch_renamed"), "info")
             
+        checkpoint("push")
         log(t("pushing_to_github"))
         
         # If repo exists on GitHub, try to pull first to avoid conflicts
         if repo_exists:
             try:
                 log(t("pulling_remote"))
-                origin.fetch()
+                origin.fetch(progress=progress())
                 
                 # Try to merge if there are remote commits
                 try:
@@ -217,7 +410,7 @@ class GitService:
                     # If merge fails, we'll force push with a warning
                     log(t("cannot_merge"), "info")
                     log(t("remote_will_overwrite"), "info")
-                    origin.push(refspec='main:main', set_upstream=True, force=True)
+                    origin.push(refspec='main:main', set_upstream=True, force=True, progress=progress())
                     log(t("force_push_success"), "success")
                     return remote_url
             except Exception as fetch_error:
@@ -225,12 +418,12 @@ class GitService:
         
         # Normal push for new repos or after successful merge
         try:
-            origin.push(refspec='main:main', set_upstream=True)
+            origin.push(refspec='main:main', set_upstream=True, progress=progress())
             log(t("push_success"), "success")
         except GitCommandError as push_error:
             # If normal push fails, force push
             log(t("normal_push_failed"), "info")
-            origin.push(refspec='main:main', set_upstream=True, force=True)
+            origin.push(refspec='main:main', set_upstream=True, force=True, progress=progress())
             log(t("force_push_overwrite"), "success")
         
         return remote_url
@@ -238,11 +431,12 @@ class GitService:
     @staticmethod
     async def update_repo_visibility(remote_url: str, token: str, is_private: bool) -> bool:
         """Update GitHub repository visibility (public/private)"""
-        return await asyncio.to_thread(GitService._update_repo_visibility_sync, remote_url, token, is_private)
+        return await run_sync(GitService._update_repo_visibility_sync, remote_url, token, is_private)
     
     @staticmethod
     def _update_repo_visibility_sync(remote_url: str, token: str, is_private: bool) -> bool:
         """Sync version of update_repo_visibility"""
+        from github import Github, GithubException
         try:
             print(f"[DEBUG] _update_repo_visibility_sync called")
             print(f"[DEBUG] Remote URL: {remote_url}")
@@ -255,6 +449,7 @@ class GitService:
             g = Github(token)
             user = g.get_user()
             print(f"[DEBUG] Connected as user: {user.login}")
+            track_github_call(g, "get_user")
             
             # Extract repo name from URL
             # URL format: https://github.com/username/repo.git or https://github.com/username/repo
@@ -264,11 +459,13 @@ class GitService:
             # Get the repository
             print(f"[DEBUG] Getting repository...")
             repo = user.get_repo(repo_name)
+            track_github_call(g, "get_repo")
             print(f"[DEBUG] Current repo private status: {repo.private}")
             
             # Update visibility
             print(f"[DEBUG] Calling repo.edit(private={is_private})...")
             repo.edit(private=is_private)
+            track_github_call(g, "edit_repo")
             print(f"[DEBUG] Successfully updated repository visibility!")
             
             return True
@@ -282,11 +479,12 @@ class GitService:
     @staticmethod
     async def get_repo_visibility(remote_url: str, token: str) -> bool:
         """Get current GitHub repository visibility status"""
-        return await asyncio.to_thread(GitService._get_repo_visibility_sync, remote_url, token)
+        return await run_sync(GitService._get_repo_visibility_sync, remote_url, token)
     
     @staticmethod
     def _get_repo_visibility_sync(remote_url: str, token: str) -> bool:
         """Sync version of get_repo_visibility - returns True if private, False if public"""
+        from github import Github, GithubException
         try:
             if not remote_url or "github.com" not in remote_url:
                 raise ValueError("Not a GitHub repository")
@@ -300,7 +498,10 @@ class GitService:
             repo_name = clean_url.split("/")[-1].replace(".git", "")
             
             # Get the repository
-            repo = user.get_repo(repo_name)
+            try:
+                repo = user.get_repo(repo_name)
+            finally:
+                track_github_call(g, "get_repo")
             
             return repo.private
         except GithubException as e:
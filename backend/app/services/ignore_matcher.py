@@ -0,0 +1,327 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.metrics import IGNORE_MATCHER_LOADS, IGNORE_MATCHER_PATHS
+
+def resolve_git_dir(project_path: str) -> str:
+    """The repository's git directory, following the "gitdir: <path>" pointer of worktrees and submodules"""
+    git_dir = os.path.join(project_path, ".git")
+    if os.path.isfile(git_dir):
+        with open(git_dir, "r", encoding="utf-8") as f:
+            pointer = f.read().strip()
+        if pointer.startswith("gitdir:"):
+            git_dir = os.path.join(project_path, pointer[len("gitdir:"):].strip())
+    return git_dir
+
+def _translate(pattern: str) -> str:
+    """Regex body for a gitignore glob (wildmatch with FNM_PATHNAME)"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                at_end = i + 2 == n or pattern[i + 2] == "/"
+                if at_start and at_end:
+                    if i + 2 == n:
+                        # "foo/**": everything inside
+                        out.append(".*")
+                        i += 2
+                    else:
+                        # "**/" leading or "/**/" in the middle: zero or more directories
+                        out.append("(?:.*/)?")
+                        i += 3
+                    continue
+                # Any other "**" is an ordinary "*"
+                while i < n and pattern[i] == "*":
+                    i += 1
+                out.append("[^/]*")
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = i + 1
+            if end < n and pattern[end] in "!^":
+                end += 1
+            if end < n and pattern[end] == "]":
+                end += 1
+            while end < n and pattern[end] != "]":
+                end += 2 if pattern[end] == "\\" else 1
+            if end >= n:
+                # Unterminated class: a literal "["
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                negate = body[:1] in ("!", "^")
+                if negate:
+                    body = body[1:]
+                # A bracket expression never matches "/"
+                out.append("[" + ("^/" if negate else "") + _translate_class(body) + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+def _translate_class(body: str) -> str:
+    out = []
+    j = 0
+    while j < len(body):
+        ch = body[j]
+        if ch == "\\" and j + 1 < len(body):
+            j += 1
+            out.append(re.escape(body[j]))
+        elif ch == "-" and out and j + 1 < len(body):
+            # Range between the previous and the next character
+            out.append("-")
+        else:
+            out.append(re.escape(ch))
+        j += 1
+    return "".join(out)
+
+class _Rule:
+    __slots__ = ("pattern", "negated", "dir_only", "regex")
+
+    def __init__(self, pattern: str, negated: bool, dir_only: bool, regex: str):
+        self.pattern = pattern
+        self.negated = negated
+        self.dir_only = dir_only
+        self.regex = regex
+
+def parse_rules(text: str) -> List[_Rule]:
+    rules = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        # Trailing spaces are ignored unless escaped
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        if not line:
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash at the start or in the middle anchors the pattern to the .gitignore's directory
+        anchored = "/" in line
+        body = _translate(line.lstrip("/"))
+        regex = body if anchored else "(?:.*/)?" + body
+        rules.append(_Rule(line, negated, dir_only, regex))
+    return rules
+
+class _Source:
+    """One ignore file compiled into two alternations (all rules / rules that also apply to files)"""
+    __slots__ = ("path", "base", "stamp", "checked_at", "rules", "all_re", "file_re")
+
+    def __init__(self, path: str, base: str):
+        self.path = path
+        # Directory the patterns are relative to ("" = repository root)
+        self.base = base
+        self.stamp: Optional[Tuple[int, int]] = None
+        self.checked_at = 0.0
+        self.rules: List[_Rule] = []
+        self.all_re = self.file_re = None
+
+    def load(self) -> bool:
+        """(Re)compile if the file changed; True when the rules are different from before"""
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        text = ""
+        if stamp is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                pass
+        IGNORE_MATCHER_LOADS.inc()
+        # Later lines win: the alternation lists rules last-first and re.match takes the first alternative that matches
+        self.rules = list(reversed(parse_rules(text)))
+        self.all_re = self._compile(self.rules)
+        self.file_re = self._compile([rule if not rule.dir_only else None for rule in self.rules])
+        return True
+
+    @staticmethod
+    def _compile(rules: List[Optional[_Rule]]):
+        alternatives = [f"({rule.regex})\\Z" if rule is not None else "(?!)()" for rule in rules]
+        if not any(rule is not None for rule in rules):
+            return None
+        return re.compile("|".join(alternatives), re.DOTALL)
+
+    def match(self, rel: str, is_dir: Optional[bool], root: str) -> Optional[bool]:
+        """True ignored, False re-included by a negation, None when no rule of this file matches"""
+        if self.all_re is None:
+            return None
+        if is_dir:
+            m = self.all_re.match(rel)
+        elif is_dir is False:
+            m = self.file_re.match(rel) if self.file_re is not None else None
+        else:
+            m = self.all_re.match(rel)
+            # The deciding rule is directory-only: only then does it matter what is on disk
+            if m is not None and self.rules[m.lastindex - 1].dir_only and not os.path.isdir(os.path.join(root, self.base, rel)):
+                m = self.file_re.match(rel) if self.file_re is not None else None
+        if m is None:
+            return None
+        return not self.rules[m.lastindex - 1].negated
+
+class IgnoreMatcher:
+    """
+    Compiled view of a repository's ignore rules: every .gitignore on the way to a
+    path (deeper files win), then .git/info/exclude. Ignore files are loaded on first
+    use and re-checked by mtime at most every CHECK_INTERVAL seconds; directory
+    verdicts are memoized, so matching a file costs about one regex match.
+    """
+    CHECK_INTERVAL = 1.0
+    MAX_DIR_VERDICTS = 100_000
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._exclude = _Source(os.path.join(resolve_git_dir(self.root), "info", "exclude"), "")
+        # directory -> its .gitignore (entries exist for missing files too, so they are noticed when created)
+        self._gitignores: Dict[str, _Source] = {}
+        # directory -> (checked at, non-empty ignore files that apply to its entries)
+        self._chains: Dict[str, Tuple[float, List[_Source]]] = {}
+        # directory -> ignored (itself or through a parent)
+        self._dirs: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def match(self, paths: Iterable[str]) -> List[bool]:
+        """
+        Ignored flag per repository-relative path. A trailing "/" marks a directory;
+        other paths are taken as files unless a directory-only rule is the deciding one.
+        """
+        with self._lock:
+            now = time.monotonic()
+            results = [self._is_ignored(path.replace(os.sep, "/"), now) for path in paths]
+        IGNORE_MATCHER_PATHS.inc(len(results))
+        return results
+
+    def is_ignored(self, path: str) -> bool:
+        return self.match([path])[0]
+
+    def invalidate(self):
+        with self._lock:
+            for source in self._gitignores.values():
+                source.checked_at = 0.0
+            self._exclude.checked_at = 0.0
+            self._chains.clear()
+            self._dirs.clear()
+
+    def _fresh(self, source: _Source, now: float) -> _Source:
+        if now - source.checked_at >= self.CHECK_INTERVAL:
+            source.checked_at = now
+            if source.load():
+                self._chains.clear()
+                self._dirs.clear()
+        return source
+
+    def _sources(self, directory: str, now: float) -> List[_Source]:
+        """Ignore files that apply to entries of `directory`, highest precedence first"""
+        cached = self._chains.get(directory)
+        if cached is not None and now - cached[0] < self.CHECK_INTERVAL:
+            return cached[1]
+        chain = []
+        current = directory
+        while True:
+            source = self._gitignores.get(current)
+            if source is None:
+                gitignore = os.path.join(self.root, current, ".gitignore") if current else os.path.join(self.root, ".gitignore")
+                source = self._gitignores[current] = _Source(gitignore, current)
+            chain.append(self._fresh(source, now))
+            if not current:
+                break
+            current = current.rpartition("/")[0]
+        chain.append(self._fresh(self._exclude, now))
+        # Most directories have no .gitignore: only files with rules take part in matching
+        chain = [source for source in chain if source.all_re is not None]
+        if len(self._chains) >= self.MAX_DIR_VERDICTS:
+            self._chains.clear()
+        self._chains[directory] = (now, chain)
+        return chain
+
+    def _verdict(self, rel: str, is_dir: Optional[bool], now: float, sources: Optional[List[_Source]] = None) -> bool:
+        if sources is None:
+            sources = self._sources(rel.rpartition("/")[0], now)
+        for source in sources:
+            sub = rel[len(source.base) + 1:] if source.base else rel
+            decided = source.match(sub, is_dir, self.root)
+            if decided is not None:
+                return decided
+        return False
+
+    def _dir_ignored(self, directory: str, now: float) -> bool:
+        verdict = self._dirs.get(directory)
+        if verdict is None:
+            parent = directory.rpartition("/")[0]
+            # A path inside an excluded directory cannot be re-included
+            verdict = (bool(parent) and self._dir_ignored(parent, now)) or self._verdict(directory, True, now)
+            if len(self._dirs) >= self.MAX_DIR_VERDICTS:
+                self._dirs.clear()
+            self._dirs[directory] = verdict
+        return verdict
+
+    def _is_ignored(self, rel: str, now: float) -> bool:
+        is_dir = None
+        if rel.endswith("/"):
+            rel = rel.rstrip("/")
+            is_dir = True
+        rel = rel.lstrip("/")
+        if not rel or rel == ".git" or rel.startswith(".git/"):
+            return False
+        parent = rel.rpartition("/")[0]
+        # Refresh the ignore files on the way first: a change clears the directory verdicts
+        sources = self._sources(parent, now)
+        if is_dir:
+            return self._dir_ignored(rel, now)
+        if parent and self._dir_ignored(parent, now):
+            return True
+        return self._verdict(rel, is_dir, now, sources)
+
+class IgnoreMatcherCache:
+    """One matcher per project path, shared by the watcher, the scanner and the API"""
+    MAX_PROJECTS = 64
+
+    def __init__(self):
+        self._matchers: Dict[str, IgnoreMatcher] = {}
+        self._lock = threading.Lock()
+
+    def get(self, project_path: str) -> IgnoreMatcher:
+        key = os.path.abspath(project_path)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is None:
+                if len(self._matchers) >= self.MAX_PROJECTS:
+                    self._matchers.pop(next(iter(self._matchers)))
+                matcher = self._matchers[key] = IgnoreMatcher(key)
+            return matcher
+
+    def invalidate(self, project_path: str):
+        matcher = self._matchers.get(os.path.abspath(project_path))
+        if matcher is not None:
+            matcher.invalidate()
+
+    def forget(self, project_path: str):
+        with self._lock:
+            self._matchers.pop(os.path.abspath(project_path), None)
+
+ignore_matchers = IgnoreMatcherCache()
@@ -1,30 +1,183 @@
+import heapq
 import os
+import shutil
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.services.ignore_matcher import ignore_matchers, resolve_git_dir
+
+QUARANTINE_HEADER = "# Quarantined by TuTu's Code Ark (risky files kept out of backups)"
+
+def _literal_pattern(rel_path: str) -> str:
+    """Anchored ignore pattern matching exactly this path"""
+    escaped = rel_path.replace("\\", "/")
+    for char in ("[", "]", "*", "?"):
+        escaped = escaped.replace(char, "\\" + char)
+    if escaped.endswith(" "):
+        escaped = escaped[:-1] + "\\ "
+    return "/" + escaped
+
+def _literal_path(pattern: str) -> str:
+    """Inverse of _literal_pattern"""
+    rel = pattern[1:]
+    if rel.endswith("\\ "):
+        rel = rel[:-2] + " "
+    for char in ("[", "]", "*", "?"):
+        rel = rel.replace("\\" + char, char)
+    return rel
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+def _covered(directory: str, whole_dirs: Set[str]) -> bool:
+    """directory or one of its ancestors is ignored as a whole"""
+    while directory:
+        if directory in whole_dirs:
+            return True
+        directory = directory.rpartition("/")[0]
+    return False
+
+def _glob_pattern(directory: str, suffix: str) -> str:
+    """Anchored pattern for every file in `directory` ending with `suffix`"""
+    prefix = _literal_pattern(directory) + "/" if directory else "/"
+    return prefix + "*" + _literal_pattern(suffix)[1:]
+
+def _write_atomic(path: str, content: str):
+    """Write through a temp file in the same directory, so readers (git) never see a half-written file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 class IgnoreService:
+    # Same-suffix files in one directory are folded into "dir/*.ext" from this many on
+    GLOB_MIN_FILES = 3
+
     @staticmethod
     def add_to_gitignore(project_path: str, rel_path: str):
+        IgnoreService.add_many_to_gitignore(project_path, [rel_path])
+
+    @staticmethod
+    def add_many_to_gitignore(project_path: str, rel_paths: List[str], fold: bool = False) -> Dict[str, Any]:
+        """
+        Ignore many paths with a single atomic rewrite of .gitignore.
+
+        Paths the current rules already ignore are skipped; the rest get one literal
+        pattern each. With `fold` they are collapsed where that hides nothing else on
+        disk today: a directory whose every entry is being ignored becomes "dir/", and
+        GLOB_MIN_FILES or more files sharing a suffix become "dir/*.ext" when no other
+        file in that directory has the suffix. Folded patterns also ignore files
+        created there later, which then never get backed up, hence opt-in.
+        A trailing "/" marks a directory. Returns the patterns written.
+        """
+        requested = []
+        seen = set()
+        for rel_path in rel_paths:
+            rel = rel_path.replace("\\", "/").strip()
+            is_dir = rel.endswith("/")
+            rel = rel.strip("/")
+            if rel and rel not in seen:
+                seen.add(rel)
+                requested.append((rel, is_dir))
+
+        matcher = ignore_matchers.get(project_path)
+        verdicts = matcher.match([rel + "/" if is_dir else rel for rel, is_dir in requested])
+        pending = [(rel, is_dir) for (rel, is_dir), ignored in zip(requested, verdicts) if not ignored]
+        if fold:
+            patterns = IgnoreService._collapse(project_path, pending, matcher) if pending else []
+        else:
+            patterns = [_literal_pattern(rel) + ("/" if is_dir else "") for rel, is_dir in pending]
+
         gitignore_path = os.path.join(project_path, ".gitignore")
-        
-        # 确保文件以换行符结束
-        needs_newline = False
+        existing = ""
         if os.path.exists(gitignore_path):
-            try:
-                with open(gitignore_path, "r", encoding="utf-8") as f:
-                    # 读取最后几个字符判断是否需要换行
-                    f.seek(0, os.SEEK_END)
-                    if f.tell() > 0:
-                        f.seek(f.tell() - 1, os.SEEK_SET)
-                        if f.read(1) != '\n':
-                            needs_newline = True
-            except:
-                # 如果读取失败或空文件，安全起见加换行
-                needs_newline = True
-        
-        with open(gitignore_path, "a", encoding="utf-8") as f:
-            if needs_newline:
-                f.write("\n")
-            f.write(f"{rel_path}\n")
-            
+            with open(gitignore_path, "r", encoding="utf-8") as f:
+                existing = f.read()
+        present = set(existing.splitlines())
+        patterns = [pattern for pattern in patterns if pattern not in present]
+        if patterns:
+            # 确保原内容以换行符结束
+            if existing and not existing.endswith("\n"):
+                existing += "\n"
+            _write_atomic(gitignore_path, existing + "\n".join(patterns) + "\n")
+            ignore_matchers.invalidate(project_path)
+        return {"added": patterns, "requested": len(requested), "already_ignored": len(requested) - len(pending), "folded": fold}
+
+    @staticmethod
+    def _collapse(project_path: str, paths: List[Tuple[str, bool]], matcher) -> List[str]:
+        # directory -> names inside it that are being ignored (files, or sub directories as a whole)
+        members: Dict[str, Set[str]] = {}
+        whole_dirs: Set[str] = set()
+        for rel, is_dir in paths:
+            parent, _, name = rel.rpartition("/")
+            members.setdefault(parent, set()).add(name)
+            if is_dir:
+                whole_dirs.add(rel)
+
+        listings: Dict[str, Optional[Dict[str, bool]]] = {}
+
+        def listing(directory: str) -> Optional[Dict[str, bool]]:
+            """name -> is directory, for what is on disk ("ignored" entries left out)"""
+            if directory not in listings:
+                try:
+                    with os.scandir(os.path.join(project_path, directory)) as entries:
+                        found = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries if entry.name != ".git"}
+                except OSError:
+                    listings[directory] = None
+                    return None
+                prefix = directory + "/" if directory else ""
+                names = list(found)
+                ignored = matcher.match([prefix + name + ("/" if found[name] else "") for name in names])
+                listings[directory] = {name: found[name] for name, skip in zip(names, ignored) if not skip}
+            return listings[directory]
+
+        # Deepest first, so a collapsed directory can make its parent collapsible too
+        heap = [(-d.count("/") if d else 0, d) for d in members]
+        heapq.heapify(heap)
+        queued = set(members)
+        while heap:
+            _, directory = heapq.heappop(heap)
+            if not directory:
+                continue
+            names = members[directory]
+            on_disk = listing(directory)
+            if not on_disk or len(names) < 2 and not any(_join(directory, name) in whole_dirs for name in names):
+                continue
+            if all(name in names for name in on_disk):
+                whole_dirs.add(directory)
+                parent, _, name = directory.rpartition("/")
+                members.setdefault(parent, set()).add(name)
+                if parent not in queued:
+                    queued.add(parent)
+                    heapq.heappush(heap, (-parent.count("/") if parent else 0, parent))
+
+        patterns = []
+        for directory in sorted(members):
+            # Everything inside a collapsed directory is covered by the directory's own pattern
+            if _covered(directory, whole_dirs):
+                continue
+            files_by_suffix: Dict[str, List[str]] = {}
+            for name in sorted(members[directory]):
+                rel = _join(directory, name)
+                if rel in whole_dirs:
+                    patterns.append(_literal_pattern(rel) + "/")
+                    continue
+                suffix = os.path.splitext(name)[1]
+                files_by_suffix.setdefault(suffix if suffix and suffix != name else "", []).append(name)
+            for suffix, names in files_by_suffix.items():
+                if suffix and len(names) >= IgnoreService.GLOB_MIN_FILES:
+                    on_disk = listing(directory) or {}
+                    others = [n for n, is_dir in on_disk.items() if not is_dir and n.endswith(suffix) and n not in members[directory]]
+                    if not others:
+                        patterns.append(_glob_pattern(directory, suffix))
+                        continue
+                patterns.extend(_literal_pattern(_join(directory, name)) for name in names)
+        return patterns
+
     @staticmethod
     def get_gitignore_content(project_path: str) -> str:
         gitignore_path = os.path.join(project_path, ".gitignore")
@@ -36,6 +189,90 @@ class IgnoreService:
     @staticmethod
     def save_gitignore_content(project_path: str, content: str):
         gitignore_path = os.path.join(project_path, ".gitignore")
-        with open(gitignore_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        _write_atomic(gitignore_path, content)
+        ignore_matchers.invalidate(project_path)
+
+    @staticmethod
+    def add_to_info_exclude(project_path: str, rel_paths: List[str]) -> int:
+        """
+        Quarantine files through .git/info/exclude: git stops seeing them as untracked,
+        but unlike .gitignore nothing is committed or shared. Returns the number added.
+        """
+        exclude_path = os.path.join(resolve_git_dir(project_path), "info", "exclude")
+        os.makedirs(os.path.dirname(exclude_path), exist_ok=True)
+        existing = ""
+        if os.path.exists(exclude_path):
+            with open(exclude_path, "r", encoding="utf-8") as f:
+                existing = f.read()
+        present = set(existing.splitlines())
+        patterns = []
+        for rel_path in rel_paths:
+            pattern = _literal_pattern(rel_path)
+            if pattern not in present:
+                present.add(pattern)
+                patterns.append(pattern)
+        if not patterns:
+            return 0
 
+        lines = []
+        if existing and not existing.endswith("\n"):
+            lines.append("")
+        if QUARANTINE_HEADER not in present:
+            lines.append(QUARANTINE_HEADER)
+        lines.extend(patterns)
+        with open(exclude_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        ignore_matchers.invalidate(project_path)
+        return len(patterns)
+
+    @staticmethod
+    def _read_info_exclude(project_path: str) -> Tuple[str, List[str]]:
+        exclude_path = os.path.join(resolve_git_dir(project_path), "info", "exclude")
+        if not os.path.exists(exclude_path):
+            return exclude_path, []
+        with open(exclude_path, "r", encoding="utf-8") as f:
+            return exclude_path, f.read().splitlines()
+
+    @staticmethod
+    def quarantined(project_path: str) -> List[str]:
+        """Paths add_to_info_exclude quarantined: the anchored patterns below its header"""
+        _, lines = IgnoreService._read_info_exclude(project_path)
+        if QUARANTINE_HEADER not in lines:
+            return []
+        start = lines.index(QUARANTINE_HEADER) + 1
+        return [_literal_path(line) for line in lines[start:] if line.startswith("/") and not line.endswith("/")]
+
+    @staticmethod
+    def release_quarantine(project_path: str, rel_paths: Optional[List[str]] = None) -> List[str]:
+        """
+        Take quarantined files (all of them without `rel_paths`) out of
+        .git/info/exclude, so the next sync backs them up. Returns the paths released.
+        """
+        exclude_path, lines = IgnoreService._read_info_exclude(project_path)
+        if QUARANTINE_HEADER not in lines:
+            return []
+        start = lines.index(QUARANTINE_HEADER) + 1
+        wanted = None if rel_paths is None else {rel.replace("\\", "/").strip("/") for rel in rel_paths}
+        kept, released = lines[:start], []
+        for line in lines[start:]:
+            if line.startswith("/") and not line.endswith("/"):
+                rel = _literal_path(line)
+                if wanted is None or rel in wanted:
+                    released.append(rel)
+                    continue
+            kept.append(line)
+        if not released:
+            return []
+        if len(kept) == start:
+            # Nothing quarantined any more: drop the header and the blank line before it
+            kept = kept[:start - 1]
+            while kept and not kept[-1].strip():
+                kept.pop()
+        _write_atomic(exclude_path, "\n".join(kept) + "\n" if kept else "")
+        ignore_matchers.invalidate(project_path)
+        return released
+
+    @staticmethod
+    def match(project_path: str, rel_paths: List[str]) -> List[bool]:
+        """Whether git ignores each path (see IgnoreMatcher); a trailing "/" marks a directory"""
+        return ignore_matchers.get(project_path).match(rel_paths)
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.metrics import JOBS_FINISHED, JOBS_ACTIVE
+from app.models.job import JobResponse
+
+class JobCancelled(Exception):
+    """Raised at a checkpoint() once cancellation of the running job was requested"""
+
+class Job:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    def __init__(self, kind: str, project_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.project_id = project_id
+        self.status = Job.QUEUED
+        self.stage: Optional[str] = None
+        self.progress: Optional[float] = None
+        self.cancel_requested = False
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in Job.FINISHED
+
+    def to_response(self) -> JobResponse:
+        return JobResponse(
+            id=self.id, kind=self.kind, project_id=self.project_id, status=self.status,
+            stage=self.stage, progress=self.progress, cancel_requested=self.cancel_requested,
+            result=self.result, error=self.error, status_code=self.status_code,
+            created_at=self.created_at, started_at=self.started_at, finished_at=self.finished_at,
+        )
+
+# The job whose work is running in this context; copied into executor threads by run_db / run_sync
+current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+
+def checkpoint(stage: Optional[str] = None, progress: Optional[float] = None, cancellable: bool = True):
+    """
+    Report progress of the current job and honour a pending cancellation.
+
+    Blocking code calls this between steps that are safe to stop at (never in the
+    middle of a push); outside of a job it does nothing. With `cancellable=False`
+    only the stage and progress are reported, for steps past the last safe point.
+    """
+    job = current_job.get()
+    if job is None:
+        return
+    if stage is not None:
+        job.stage = stage
+    if progress is not None:
+        job.progress = progress
+    if cancellable and job.cancel_requested:
+        raise JobCancelled(f"Cancelled before {stage}" if stage else "Cancelled")
+
+class JobService:
+    """
+    In-memory registry of API jobs. Each job runs as an asyncio task; finished jobs
+    are kept for RETENTION or until MAX_FINISHED newer ones have finished.
+    """
+    MAX_FINISHED = 200
+    RETENTION = timedelta(hours=1)
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        JOBS_ACTIVE.set_function(lambda: sum(1 for job in list(self._jobs.values()) if not job.finished))
+
+    def submit(self, kind: str, work: Callable[[], Awaitable[Any]], project_id: Optional[int] = None) -> Job:
+        """Start `work()` in the background and return its job right away"""
+        self._prune()
+        job = Job(kind, project_id)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, work))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def active(self, kind: str, project_id: Optional[int]) -> Optional[Job]:
+        """Unfinished job of this kind for the project, so duplicate requests can join it"""
+        for job in self._jobs.values():
+            if job.kind == kind and job.project_id == project_id and not job.finished:
+                return job
+        return None
+
+    def recent(self, project_id: Optional[int] = None, limit: int = 50) -> List[Job]:
+        jobs = [job for job in reversed(self._jobs.values()) if project_id is None or job.project_id == project_id]
+        return jobs[:limit]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Request cancellation. A queued job stops right away; a running one stops at
+        its next checkpoint, work already past its last checkpoint (a push) completes.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        if job.status == Job.QUEUED:
+            # The task has not started yet, so its own bookkeeping would never run
+            if job.task is not None:
+                job.task.cancel()
+            self._finish(job, Job.CANCELLED)
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        if job.task is not None and not job.finished:
+            await asyncio.shield(job.task)
+        return job
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self.cancel(job.id)
+                if job.task is not None:
+                    job.task.cancel()
+
+    async def _run(self, job: Job, work: Callable[[], Awaitable[Any]]):
+        current_job.set(job)
+        try:
+            job.status = Job.RUNNING
+            job.started_at = datetime.now()
+            job.result = await work()
+            job.progress = 1.0
+            self._finish(job, Job.SUCCEEDED)
+        except (JobCancelled, asyncio.CancelledError):
+            self._finish(job, Job.CANCELLED)
+        except Exception as e:
+            # HTTPException keeps the status code and detail the endpoint used to answer with
+            job.status_code = getattr(e, "status_code", 500)
+            job.error = str(getattr(e, "detail", None) or e)
+            self._finish(job, Job.FAILED)
+
+    @staticmethod
+    def _finish(job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.now()
+        JOBS_FINISHED.inc(1, job.kind, status)
+
+    def _prune(self):
+        cutoff = datetime.now() - self.RETENTION
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.MAX_FINISHED
+        for job in finished:
+            if excess > 0 or job.finished_at < cutoff:
+                del self._jobs[job.id]
+                excess -= 1
+
+job_service = JobService()
@@ -1,13 +1,21 @@
 import asyncio
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
 from fastapi import WebSocket
 from datetime import datetime
 import json
+from app.core.metrics import WEBSOCKET_CLIENTS
+from app.core.tracing import tracer
+from app.i18n.log_messages import LogMessages
 
 class LogManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
         self.project_connections: Dict[int, List[WebSocket]] = {}
+        WEBSOCKET_CLIENTS.set_function(lambda: {
+            "global": len(self.active_connections),
+            "project": sum(len(c) for c in self.project_connections.values()),
+        })
 
     async def connect(self, websocket: WebSocket, project_id: int = None):
         await websocket.accept()
@@ -32,22 +40,108 @@ class LogManager:
             "level": level,
             "project_id": project_id
         }
+        await self._send(payload, project_id)
+
+    async def broadcast_progress(self, message: str, stage: str, cur: int, total: Optional[int], done: bool = False, project_id: int = None):
+        """Structured progress event; clients update one line in place per stage instead of appending"""
+        payload = {
+            "type": "progress",
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "msg": message,
+            "level": "progress",
+            "project_id": project_id,
+            "stage": stage,
+            "cur": cur,
+            "total": total,
+            "percent": round(cur * 100 / total) if total else None,
+            "done": done,
+        }
+        await self._send(payload, project_id)
+
+    def stream(self, project_id: int = None, lang: str = "zh") -> "LogStream":
+        return LogStream(self, project_id, lang)
+
+    async def _send(self, payload: dict, project_id: int = None):
         json_str = json.dumps(payload)
-        
-        # Global listeners
-        for connection in self.active_connections[:]:
-            try:
-                await connection.send_text(json_str)
-            except:
-                self.disconnect(connection)
-        
-        # Project specific listeners
-        if project_id and project_id in self.project_connections:
-            for connection in self.project_connections[project_id][:]:
+        level = payload["level"]
+
+        with tracer.child("ws.broadcast", level=level, clients=len(self.active_connections)):
+            # Global listeners
+            for connection in self.active_connections[:]:
                 try:
                     await connection.send_text(json_str)
                 except:
-                    self.disconnect(connection, project_id)
+                    self.disconnect(connection)
+            
+            # Project specific listeners
+            if project_id and project_id in self.project_connections:
+                for connection in self.project_connections[project_id][:]:
+                    try:
+                        await connection.send_text(json_str)
+                    except:
+                        self.disconnect(connection, project_id)
+
+class LogStream:
+    """
+    Hands log lines and git progress from a worker thread to the event loop while
+    the work runs, keeping their order. Progress is throttled per stage to one
+    update every MIN_INTERVAL seconds (the last update of a stage always goes out).
+
+        async with log_manager.stream(project_id, lang) as stream:
+            await run_sync(work, stream.log, stream.progress)
+    """
+    MIN_INTERVAL = 0.25
+
+    def __init__(self, manager: LogManager, project_id: int = None, lang: str = "zh"):
+        self.manager = manager
+        self.project_id = project_id
+        self.lang = lang
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._last: Dict[str, float] = {}
+
+    async def __aenter__(self) -> "LogStream":
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._sender = asyncio.create_task(self._drain())
+        return self
+
+    async def __aexit__(self, *exc):
+        # Flush whatever the worker produced, also when it failed; queued the same way
+        # as the items so the end marker cannot overtake them
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        await self._sender
+
+    def log(self, msg: str, level: str = "info"):
+        """Thread-safe"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, ("log", msg, level))
+
+    def progress(self, stage: str, cur: int, total: Optional[int], detail: str = "", done: bool = False):
+        """Thread-safe; called for every progress line git prints"""
+        now = time.monotonic()
+        if not done and now - self._last.get(stage, 0.0) < self.MIN_INTERVAL:
+            return
+        self._last[stage] = now
+        t = lambda key, **kwargs: LogMessages.t(key, self.lang, **kwargs)
+        counts = f"{cur}/{total}" if total else str(cur)
+        percent = f"{round(cur * 100 / total)}% " if total else ""
+        msg = t("git_progress", stage=t(f"progress_{stage}"), percent=percent, counts=counts, detail=detail.strip(" ,"))
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, ("progress", msg, stage, cur, total, done))
+
+    async def _drain(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            try:
+                if item[0] == "log":
+                    await self.manager.broadcast(item[1], item[2], self.project_id)
+                else:
+                    _, msg, stage, cur, total, done = item
+                    await self.manager.broadcast_progress(msg, stage, cur, total, done, self.project_id)
+            except Exception as e:
+                print(f"Log stream error: {e}")
 
 manager = LogManager()
 
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional, List, Tuple
+from sqlmodel import Session, select, and_, or_
+from app.core.database import engine
+from app.models.project import Project, ProjectConfig
+from app.models.settings import AppSettings
+
+class ProjectStore:
+    """
+    Short, self-contained database operations for the async code paths.
+
+    Every helper opens its own Session and returns detached objects, so it can be
+    executed on the DB executor via `await run_db(ProjectStore.xxx, ...)`.
+    """
+
+    @staticmethod
+    def get(project_id: int) -> Optional[Project]:
+        with Session(engine) as session:
+            return session.get(Project, project_id)
+
+    @staticmethod
+    def list_all() -> List[Project]:
+        with Session(engine) as session:
+            return list(session.exec(select(Project)).all())
+
+    @staticmethod
+    def list_page(
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, int]] = None,
+        sort: str = "id",
+        status: Optional[str] = None,
+        sync_mode: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Tuple[list, Optional[Tuple[Any, int]]]:
+        """
+        One page of projects in keyset order: (rows, key to continue after or None).
+
+        `sort` is id or last_sync_time, "-" for descending; ties break on id. `after`
+        is the (sort value, id) of the last row of the previous page. With `columns`
+        only those columns are loaded (rows instead of Project objects).
+        """
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        query = select(*[getattr(Project, c) for c in columns]) if columns else select(Project)
+        if status:
+            query = query.where(Project.status == status)
+        if sync_mode:
+            query = query.where(Project.sync_mode == sync_mode)
+        if name_prefix:
+            # A range instead of LIKE, so the name index is usable
+            query = query.where(Project.name >= name_prefix, Project.name < name_prefix + "\U0010ffff")
+
+        if field == "last_sync_time":
+            # SQLite sorts NULL first ascending and last descending
+            order = (Project.last_sync_time.desc(), Project.id.desc()) if descending else (Project.last_sync_time, Project.id)
+            if after is not None:
+                value, last_id = after
+                value = datetime.fromisoformat(value) if value is not None else None
+                if value is None:
+                    query = query.where(
+                        and_(Project.last_sync_time.is_(None), Project.id < last_id) if descending
+                        else or_(and_(Project.last_sync_time.is_(None), Project.id > last_id), Project.last_sync_time.is_not(None))
+                    )
+                elif descending:
+                    query = query.where(or_(
+                        Project.last_sync_time < value,
+                        and_(Project.last_sync_time == value, Project.id < last_id),
+                        Project.last_sync_time.is_(None),
+                    ))
+                else:
+                    query = query.where(or_(
+                        Project.last_sync_time > value,
+                        and_(Project.last_sync_time == value, Project.id > last_id),
+                    ))
+        else:
+            order = (Project.id.desc(),) if descending else (Project.id,)
+            if after is not None:
+                query = query.where(Project.id < after[1] if descending else Project.id > after[1])
+        query = query.order_by(*order)
+        if limit is not None:
+            # One extra row tells whether another page exists
+            query = query.limit(limit + 1)
+
+        with Session(engine) as session:
+            # execute() keeps single-column selections as rows rather than bare values
+            rows = list(session.execute(query).all() if columns else session.exec(query).all())
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        last_sync_time = last.last_sync_time if field == "last_sync_time" else None
+        return rows, (last_sync_time.isoformat() if last_sync_time else None, last.id)
+
+    @staticmethod
+    def list_auto_push() -> List[Project]:
+        with Session(engine) as session:
+            return list(session.exec(select(Project).where(Project.auto_push == True)).all())
+
+    @staticmethod
+    def get_by_path(path: str) -> Optional[Project]:
+        with Session(engine) as session:
+            return session.exec(select(Project).where(Project.path == path)).first()
+
+    @staticmethod
+    def add(project: Project) -> Project:
+        with Session(engine) as session:
+            session.add(project)
+            session.commit()
+            session.refresh(project)
+            return project
+
+    @staticmethod
+    def delete(project_id: int) -> bool:
+        with Session(engine) as session:
+            project = session.get(Project, project_id)
+            if not project:
+                return False
+            session.delete(project)
+            session.commit()
+            return True
+
+    @staticmethod
+    def add_many(projects: List[Project]) -> Tuple[List[Project], List[str]]:
+        """
+        Insert projects in one transaction, skipping paths that are already managed.
+        Returns (created projects, skipped paths).
+        """
+        if not projects:
+            return [], []
+        with Session(engine, expire_on_commit=False) as session:
+            paths = [project.path for project in projects]
+            existing = set()
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(paths), 500):
+                existing.update(session.exec(select(Project.path).where(Project.path.in_(paths[i:i + 500]))).all())
+            created = [project for project in projects if project.path not in existing]
+            session.add_all(created)
+            session.commit()
+            return created, [path for path in paths if path in existing]
+
+    @staticmethod
+    def update_status(project_id: int, status: str, last_sync_time: Optional[datetime] = None) -> Optional[Project]:
+        """Set the project status (and optionally the last sync time) in one commit"""
+        with Session(engine) as session:
+            project = session.get(Project, project_id)
+            if not project:
+                return None
+            project.status = status
+            if last_sync_time is not None:
+                project.last_sync_time = last_sync_time
+                project.schedule_next_sync(last_sync_time)
+            session.add(project)
+            session.commit()
+            session.refresh(project)
+            return project
+
+    @staticmethod
+    def save_config(project_id: int, config: ProjectConfig) -> Optional[Project]:
+        with Session(engine) as session:
+            project = session.get(Project, project_id)
+            if not project:
+                return None
+            project.set_config(config)
+            session.add(project)
+            session.commit()
+            session.refresh(project)
+            return project
+
+    @staticmethod
+    def get_due_projects(project_ids: List[int], now: datetime) -> Tuple[List[Project], List[Project]]:
+        """
+        Split pending project ids into (projects due for sync now, projects whose schedule moved).
+
+        Due projects come from a single query on the (auto_push, next_sync_due) index.
+        A fixed-time project whose one-minute window has already passed is not due;
+        its schedule is rolled forward to the next day instead.
+        """
+        if not project_ids:
+            return [], []
+        # expire_on_commit=False keeps the returned projects readable after the roll-forward commit
+        with Session(engine, expire_on_commit=False) as session:
+            candidates = session.exec(
+                select(Project).where(
+                    Project.id.in_(project_ids),
+                    Project.auto_push == True,
+                    Project.next_sync_due <= now,
+                )
+            ).all()
+
+            due, rescheduled = [], []
+            for project in candidates:
+                if project.sync_mode == 'fixed' and now >= project.next_sync_due + timedelta(seconds=60):
+                    project.schedule_next_sync(now)
+                    session.add(project)
+                    rescheduled.append(project)
+                else:
+                    due.append(project)
+            if rescheduled:
+                session.commit()
+            
+            # Ids the caller believed due but the index did not return: hand back the
+            # current rows so a stale in-memory schedule can be corrected
+            returned_ids = {project.id for project in candidates}
+            stale_ids = [pid for pid in project_ids if pid not in returned_ids]
+            if stale_ids:
+                rescheduled.extend(session.exec(select(Project).where(Project.id.in_(stale_ids))).all())
+            return due, rescheduled
+
+    @staticmethod
+    def backfill_config_columns() -> int:
+        """Populate the promoted config columns for rows written before they existed"""
+        with Session(engine) as session:
+            projects = session.exec(select(Project).where(Project.config_version == 0)).all()
+            for project in projects:
+                project.set_config(project.config)
+                session.add(project)
+            session.commit()
+            return len(projects)
+
+    @staticmethod
+    def get_settings() -> Optional[AppSettings]:
+        with Session(engine) as session:
+            return session.exec(select(AppSettings)).first()
+
+    @staticmethod
+    def get_language() -> str:
+        """Get the global language setting from database"""
+        settings = ProjectStore.get_settings()
+        return settings.language if settings and hasattr(settings, 'language') else "zh"
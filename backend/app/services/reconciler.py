@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from app.core.metrics import RECONCILE_CHECKS
+from app.services.git_service import GitService
+from app.services.status_cache import status_executor
+from app.services.worker_pool import worker_pool
+
+_reading = threading.local()
+_overflow_callback: Optional[Callable[[str], None]] = None
+
+def install_overflow_hook(callback: Callable[[str], None]) -> bool:
+    """
+    Call `callback(root)` from the inotify reader thread when the kernel queue of
+    the watch on `root` overflowed. watchdog drops the IN_Q_OVERFLOW record (it
+    belongs to no watch), so its reader is wrapped to see it. False where inotify
+    is not used or watchdog's internals are not the expected ones.
+    """
+    global _overflow_callback
+    try:
+        from watchdog.observers.inotify_c import Inotify, InotifyConstants
+    except Exception:
+        return False
+    _overflow_callback = callback
+    if getattr(Inotify, "_overflow_hooked", False):
+        return True
+    if not hasattr(Inotify, "read_events") or not hasattr(Inotify, "_parse_event_buffer"):
+        return False
+
+    read_events = Inotify.read_events
+    parse_event_buffer = Inotify._parse_event_buffer
+
+    def read_events_checked(self, *args, **kwargs):
+        # Each inotify instance is read by its own emitter thread
+        _reading.root = getattr(self, "_path", None)
+        return read_events(self, *args, **kwargs)
+
+    def parse_event_buffer_checked(event_buffer):
+        for wd, mask, cookie, name in parse_event_buffer(event_buffer):
+            if wd == -1 and mask & InotifyConstants.IN_Q_OVERFLOW:
+                root = getattr(_reading, "root", None)
+                if root is not None and _overflow_callback is not None:
+                    try:
+                        _overflow_callback(os.fsdecode(root))
+                    except Exception as e:
+                        print(f"Error handling inotify overflow: {e}")
+            yield wd, mask, cookie, name
+
+    Inotify.read_events = read_events_checked
+    Inotify._parse_event_buffer = staticmethod(parse_event_buffer_checked)
+    Inotify._overflow_hooked = True
+    return True
+
+class Reconciler:
+    """
+    Catches up on changes the watcher never reported: made while the backend was
+    not running, or lost to an inotify queue overflow.
+
+    Queued projects (each at most once) are checked one at a time with
+    GitService.has_changes; dirty ones are handed to `on_dirty` as if an event had
+    arrived. After each check the reconciler pauses at least as long as the check
+    took (and SPACING), so a restart with 500 projects is spread out instead of
+    running 500 `git status` at once. Startup checks wait STARTUP_DELAY first.
+    """
+    SPACING = 0.25
+    STARTUP_DELAY = 5.0
+
+    def __init__(self, on_dirty: Callable[[int], None]):
+        self.on_dirty = on_dirty
+        self._queue: "OrderedDict[int, Tuple[str, str]]" = OrderedDict() # project_id -> (path, trigger)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._not_before = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._not_before = time.monotonic() + self.STARTUP_DELAY
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._queue.clear()
+
+    def submit(self, project_id: int, path: str, trigger: str):
+        """Queue a dirty check; a project already queued keeps its place"""
+        if project_id not in self._queue:
+            self._queue[project_id] = (path, trigger)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def discard(self, project_id: int):
+        self._queue.pop(project_id, None)
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self._not_before - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            project_id, (path, trigger) = self._queue.popitem(last=False)
+            started = time.monotonic()
+            try:
+                if worker_pool.enabled:
+                    dirty = await worker_pool.has_changes(path)
+                else:
+                    dirty = await self._loop.run_in_executor(
+                        status_executor, contextvars.copy_context().run, functools.partial(GitService.has_changes, path)
+                    )
+            except Exception as e:
+                print(f"Reconciliation of project {project_id} failed: {e}")
+                RECONCILE_CHECKS.inc(1, trigger, "error")
+            else:
+                RECONCILE_CHECKS.inc(1, trigger, "dirty" if dirty else "clean")
+                if dirty:
+                    self.on_dirty(project_id)
+            self._not_before = time.monotonic() + max(self.SPACING, time.monotonic() - started)
@@ -0,0 +1,153 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services.ignore_matcher import resolve_git_dir
+from app.services.job_service import checkpoint
+from app.models.project import Project
+
+# Never descended into while looking for repositories
+SKIP_DIRS = {
+    'node_modules', '__pycache__', '.venv', 'venv', '.tox', '.cache', '.gradle', '.idea',
+    'dist', 'build', 'target', 'site-packages', '$RECYCLE.BIN', 'System Volume Information',
+}
+
+_REMOTE_SECTION_RE = re.compile(r'^\[\s*remote\s+"(.*)"\s*\]$')
+
+def read_repo_info(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Branch and remote of a working tree straight from .git/HEAD and .git/config,
+    without starting git or looking at the working tree. None if `path` is not a
+    repository. The remote is origin, else the first one configured.
+    """
+    git_dir = resolve_git_dir(path)
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    # Detached HEAD has no branch name
+    branch = head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else None
+
+    remotes: Dict[str, str] = {}
+    # Linked worktrees share the main repository's config
+    config_path = os.path.join(git_dir, "config")
+    commondir = os.path.join(git_dir, "commondir")
+    if os.path.isfile(commondir):
+        try:
+            with open(commondir, "r", encoding="utf-8") as f:
+                config_path = os.path.join(git_dir, f.read().strip(), "config")
+        except OSError:
+            pass
+    try:
+        with open(config_path, "r", encoding="utf-8", errors="replace") as f:
+            section = None
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    match = _REMOTE_SECTION_RE.match(line)
+                    section = match.group(1) if match else None
+                elif section is not None and "=" in line:
+                    key, _, value = line.partition("=")
+                    if key.strip().lower() == "url" and section not in remotes:
+                        remotes[section] = value.strip().strip('"')
+    except OSError:
+        pass
+    remote_url = remotes.get("origin") or next(iter(remotes.values()), None)
+    return {"branch": branch, "remote_url": remote_url}
+
+class RepoDiscovery:
+    """
+    Finds git working trees below a root folder. Directories are listed with
+    os.scandir on a small thread pool, several at a time; the walk stops at every
+    repository (nested repositories and submodules are not reported), at SKIP_DIRS,
+    hidden directories, directories with more than MAX_DIR_ENTRIES entries and
+    below max_depth.
+    """
+    WORKERS = 8
+    MAX_DIR_ENTRIES = 5000
+
+    @staticmethod
+    def _list(path: str) -> Tuple[bool, List[str], bool]:
+        """(is a repository, sub directories to descend into, pruned as huge)"""
+        subdirs = []
+        count = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    count += 1
+                    if entry.name == ".git":
+                        return True, [], False
+                    if count > RepoDiscovery.MAX_DIR_ENTRIES:
+                        return os.path.lexists(os.path.join(path, ".git")), [], True
+                    name = entry.name
+                    if name.startswith(".") or name in SKIP_DIRS:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return False, [], False
+        return False, subdirs, False
+
+    @staticmethod
+    def discover(root: str, max_depth: int = 6,
+                 on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Repository paths below `root` (root itself included), sorted. `on_progress`
+        gets (directories listed, repositories found) after every directory.
+        """
+        root = os.path.abspath(root)
+        repos: List[str] = []
+        scanned = pruned = 0
+        started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=RepoDiscovery.WORKERS, thread_name_prefix="tutu-discover")
+        try:
+            pending = {pool.submit(RepoDiscovery._list, root): (root, 0)}
+            while pending:
+                checkpoint("discover")
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, depth = pending.pop(future)
+                    is_repo, subdirs, huge = future.result()
+                    scanned += 1
+                    if is_repo:
+                        repos.append(path)
+                    elif huge:
+                        pruned += 1
+                    elif depth < max_depth:
+                        for subdir in subdirs:
+                            pending[pool.submit(RepoDiscovery._list, subdir)] = (subdir, depth + 1)
+                    if on_progress is not None:
+                        on_progress(scanned, len(repos))
+        finally:
+            # A cancelled walk drops the directories still queued
+            pool.shutdown(wait=True, cancel_futures=True)
+        return {
+            "repos": sorted(repos),
+            "scanned_dirs": scanned,
+            "pruned_dirs": pruned,
+            "discover_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    @staticmethod
+    def to_projects(paths: List[str], require_remote: bool = True) -> Tuple[List[Project], List[Dict[str, str]]]:
+        """Unsaved Project rows for discovered repositories, plus the skipped paths with a reason"""
+        projects, skipped = [], []
+        for path in paths:
+            info = read_repo_info(path)
+            if info is None:
+                skipped.append({"path": path, "reason": "not_a_repo"})
+            elif require_remote and not info["remote_url"]:
+                skipped.append({"path": path, "reason": "no_remote"})
+            else:
+                projects.append(Project(
+                    name=os.path.basename(path) or path,
+                    path=path,
+                    remote_url=info["remote_url"],
+                    branch=info["branch"] or "main",
+                ))
+        return projects, skipped
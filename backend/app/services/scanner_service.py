@@ -1,63 +1,225 @@
+import asyncio
 import os
-from typing import List, Dict, Any, Set
-from pathlib import Path
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from app.models.project import ProjectConfig
+from app.core.metrics import SCAN_CACHE_LOOKUPS, SCAN_CACHE_ENTRIES
+from app.services.secret_scanner import SecretScanner
+from app.services.content_sniffer import ContentSniffer
+from app.services.worker_pool import worker_pool
 
 class ScanResult:
-    def __init__(self, safe: bool, risks: List[Dict[str, Any]]):
+    def __init__(self, safe: bool, risks: List[Dict[str, Any]], deferred: Optional[List[str]] = None):
         self.safe = safe
         self.risks = risks
+        # Files not examined because the time budget ran out
+        self.deferred = deferred or []
+
+# Shared, bounded pool for stat-heavy scans of large change sets
+scan_executor = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2), thread_name_prefix="tutu-scan")
 
 class ScannerService:
+    # Change sets at least this large are split across scan_executor
+    PARALLEL_THRESHOLD = 256
+    CHUNK_SIZE = 128
+    CACHE_MAX_ENTRIES = 200_000
+
+    # full path -> (st_size, st_mtime_ns, st_ino, policy, scan mode (follows ignore_hidden), risk or None)
+    _cache: Dict[str, Tuple[int, int, int, tuple, str, Optional[Dict[str, Any]]]] = {}
+    _cache_lock = threading.Lock()
+
     @staticmethod
-    def scan_directory(path: str, config: ProjectConfig, changed_files: List[str]) -> ScanResult:
-        risks = []
-        root_path = Path(path)
-        
+    async def scan_directory_async(path: str, config: ProjectConfig, changed_files: List[str], budget_s: Optional[float] = None) -> ScanResult:
+        """scan_directory off the event loop: in the worker pool when enabled, else in a thread"""
+        if worker_pool.enabled:
+            return await worker_pool.scan(path, config.model_dump_json(), changed_files, budget_s)
+        return await asyncio.to_thread(ScannerService.scan_directory, path, config, changed_files, budget_s)
+
+    @staticmethod
+    def scan_directory(path: str, config: ProjectConfig, changed_files: List[str], budget_s: Optional[float] = None) -> ScanResult:
+        """
+        Check changed files against the project policy.
+
+        With `budget_s` the scan stops examining files once the budget is spent and
+        returns the rest as `deferred`; cached verdicts make the next call resume cheaply.
+        """
+        deadline = time.perf_counter() + budget_s if budget_s is not None else None
         # 将配置转换为集合以提高查找速度
-        blocked_exts = set(ext.lower() for ext in config.blocked_extensions)
+        blocked_exts = frozenset(ext.lower() for ext in config.blocked_extensions)
         max_size_bytes = config.max_file_size_mb * 1024 * 1024
-        
+        blocked_types = frozenset(config.blocked_content_types)
+        policy = (max_size_bytes, blocked_exts, blocked_types, config.strip_secrets)
+
+        candidates = []
         for file_rel_path in changed_files:
-            # 忽略 .git 目录下的变化（通常 git status 不会返回这个，但双重保险）
-            if file_rel_path.startswith(".git"):
-                continue
+            mode = ScannerService._scan_mode(file_rel_path, config)
+            if mode is not None:
+                candidates.append((file_rel_path, mode))
+        if len(candidates) >= ScannerService.PARALLEL_THRESHOLD:
+            chunks = [candidates[i:i + ScannerService.CHUNK_SIZE] for i in range(0, len(candidates), ScannerService.CHUNK_SIZE)]
+            parts = list(scan_executor.map(lambda chunk: ScannerService._scan_chunk(path, chunk, config, policy, deadline), chunks))
+        else:
+            parts = [ScannerService._scan_chunk(path, candidates, config, policy, deadline)]
+        risks = [risk for part_risks, _ in parts for risk in part_risks]
+        deferred = [rel for _, part_deferred in parts for rel in part_deferred]
 
-            # 忽略隐藏文件（如果配置开启）
-            if config.ignore_hidden and os.path.basename(file_rel_path).startswith("."):
-                # 特殊处理：.gitignore 是允许的
-                if os.path.basename(file_rel_path) != ".gitignore":
-                    continue
+        return ScanResult(safe=len(risks) == 0 and not deferred, risks=risks, deferred=deferred)
 
-            full_path = root_path / file_rel_path
-            
-            if not full_path.exists() or full_path.is_dir():
+    @staticmethod
+    def _scan_mode(file_rel_path: str, config: ProjectConfig) -> Optional[str]:
+        """None to skip the file, "secrets" to only look for secrets, "full" for every check"""
+        # 忽略 .git 目录下的变化（通常 git status 不会返回这个，但双重保险）
+        if file_rel_path.startswith(".git"):
+            return None
+        # 忽略隐藏文件（如果配置开启）
+        if config.ignore_hidden:
+            name = os.path.basename(file_rel_path)
+            # 特殊处理：.gitignore 是允许的
+            if name.startswith(".") and name != ".gitignore":
+                # .env 之类的隐藏文件恰恰最可能包含密钥
+                return "secrets" if config.strip_secrets else None
+        return "full"
+
+    @staticmethod
+    def _scan_chunk(root: str, files: List[Tuple[str, str]], config: ProjectConfig, policy: tuple,
+                    deadline: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        risks = []
+        deferred: List[str] = []
+        hits = misses = 0
+        cache = ScannerService._cache
+        for index, (file_rel_path, mode) in enumerate(files):
+            # At least one file per chunk is always examined, so repeated budgeted scans make progress
+            if deadline is not None and index and time.perf_counter() > deadline:
+                deferred = [rel for rel, _ in files[index:]]
+                break
+            full_path = os.path.join(root, file_rel_path)
+            # One lstat per path: existence, type, size and cache key in a single syscall
+            try:
+                st = os.lstat(full_path)
+            except OSError:
                 continue
-                
-            # 1. 检查大小
+            if not stat.S_ISREG(st.st_mode):
+                continue
+
+            cached = cache.get(full_path)
+            if cached is not None and cached[:5] == (st.st_size, st.st_mtime_ns, st.st_ino, policy, mode):
+                hits += 1
+                risk = cached[5]
+            else:
+                misses += 1
+                risk = ScannerService._check(full_path, file_rel_path, mode, st, config, policy)
+                ScannerService._remember(full_path, (st.st_size, st.st_mtime_ns, st.st_ino, policy, mode, risk))
+            if risk is not None:
+                risks.append(risk)
+
+        if hits:
+            SCAN_CACHE_LOOKUPS.inc(hits, "hit")
+        if misses:
+            SCAN_CACHE_LOOKUPS.inc(misses, "miss")
+        return risks, deferred
+
+    @staticmethod
+    def _check(full_path: str, file_rel_path: str, mode: str, st: os.stat_result, config: ProjectConfig, policy: tuple) -> Optional[Dict[str, Any]]:
+        max_size_bytes, blocked_exts, blocked_types, strip_secrets = policy
+        size = st.st_size
+        if mode == "full":
+            risk = ScannerService._check_policy(full_path, file_rel_path, st, config, max_size_bytes, blocked_exts, blocked_types)
+            if risk is not None:
+                return risk
+        # 4. 检查密钥（内容扫描）
+        if strip_secrets:
+            findings = SecretScanner.scan_file(full_path, file_rel_path)
+            if findings:
+                first = findings[0]
+                reason = f"Possible secret: {first.description}"
+                if first.line:
+                    reason += f" (line {first.line})"
+                if len(findings) > 1:
+                    reason += f" and {len(findings) - 1} more"
+                return {
+                    "path": file_rel_path,
+                    "size_display": f"{size / 1024 / 1024:.2f} MB",
+                    "size_bytes": size,
+                    "reason": reason,
+                    "type": "secret",
+                    "findings": [finding.to_dict() for finding in findings],
+                }
+        return None
+
+    @staticmethod
+    def _check_policy(full_path: str, file_rel_path: str, st: os.stat_result, config: ProjectConfig,
+                      max_size_bytes: int, blocked_exts: frozenset, blocked_types: frozenset) -> Optional[Dict[str, Any]]:
+        size = st.st_size
+        # 1. 检查大小
+        if size > max_size_bytes:
+            return {
+                "path": file_rel_path,
+                "size_display": f"{size / 1024 / 1024:.2f} MB",
+                "size_bytes": size,
+                "reason": f"Exceeds {config.max_file_size_mb}MB limit",
+                "type": "size_limit"
+            }
+        # 2. 检查扩展名
+        if os.path.splitext(file_rel_path)[1].lower() in blocked_exts:
+            return {
+                "path": file_rel_path,
+                "size_display": f"{size / 1024 / 1024:.2f} MB",
+                "size_bytes": size,
+                "reason": "File type blocked by policy",
+                "type": "extension_block"
+            }
+        # 3. 检查文件内容类型（只读取文件头部，不受扩展名影响）
+        if blocked_types and size:
             try:
-                size = full_path.stat().st_size
-                if size > max_size_bytes:
-                    risks.append({
-                        "path": file_rel_path,
-                        "size_display": f"{size / 1024 / 1024:.2f} MB",
-                        "size_bytes": size,
-                        "reason": f"Exceeds {config.max_file_size_mb}MB limit",
-                        "type": "size_limit"
-                    })
-                    continue
+                verdict = ContentSniffer.classify(full_path, st, file_rel_path)
             except OSError:
-                continue 
+                verdict = None
+            if verdict is not None and verdict[0] in blocked_types:
+                category, kind = verdict
+                return {
+                    "path": file_rel_path,
+                    "size_display": f"{size / 1024 / 1024:.2f} MB",
+                    "size_bytes": size,
+                    "reason": f"Content type blocked by policy: {category} ({kind})",
+                    "type": "content_block",
+                    "content_type": category,
+                }
+        return None
+
+    @classmethod
+    def _remember(cls, full_path: str, entry: tuple):
+        with cls._cache_lock:
+            if len(cls._cache) >= cls.CACHE_MAX_ENTRIES and full_path not in cls._cache:
+                # Dicts keep insertion order: drop the oldest tenth
+                for key in list(cls._cache)[:cls.CACHE_MAX_ENTRIES // 10]:
+                    del cls._cache[key]
+            cls._cache[full_path] = entry
+
+    @classmethod
+    def cached_verdicts(cls, root: str, rel_paths: List[str]) -> Dict[str, tuple]:
+        """Cache entries of the given files, by relative path (handed to scans in worker processes)"""
+        cache = cls._cache
+        verdicts = {}
+        for rel_path in rel_paths:
+            entry = cache.get(os.path.join(root, rel_path))
+            if entry is not None:
+                verdicts[rel_path] = entry
+        return verdicts
 
-            # 2. 检查扩展名
-            if full_path.suffix.lower() in blocked_exts:
-                 risks.append({
-                        "path": file_rel_path,
-                        "size_display": f"{size / 1024 / 1024:.2f} MB",
-                        "size_bytes": size,
-                        "reason": "File type blocked by policy",
-                        "type": "extension_block"
-                    })
+    @classmethod
+    def load_verdicts(cls, root: str, verdicts: Dict[str, tuple]):
+        """Take over entries from cached_verdicts(); they are still checked against a fresh lstat"""
+        for rel_path, entry in verdicts.items():
+            cls._remember(os.path.join(root, rel_path), entry)
 
-        return ScanResult(safe=len(risks) == 0, risks=risks)
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+        SecretScanner.clear_cache()
+        ContentSniffer.clear_cache()
 
+SCAN_CACHE_ENTRIES.set_function(lambda: len(ScannerService._cache))
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import mmap
+import os
+import re
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.metrics import SECRET_SCAN_FILES, SECRET_SCAN_SECONDS
+from app.services.content_sniffer import ContentSniffer
+
+class SecretFinding:
+    def __init__(self, rule: str, description: str, line: int):
+        self.rule = rule
+        self.description = description
+        self.line = line
+
+    def to_dict(self) -> Dict[str, Any]:
+        # The matched text itself is never returned or logged
+        return {"rule": self.rule, "description": self.description, "line": self.line}
+
+_SECRET_NAMES = rb"api[_\-]?key|secret|token|passw(?:or)?d|access[_\-]?key|private[_\-]?key|client[_\-]?secret"
+
+# (rule id, description, pattern, value group to validate or None, minimum entropy of that group)
+# Patterns run on raw bytes, so files are never decoded.
+_RULES: List[Tuple[str, str, bytes, Optional[int], float]] = [
+    ("private_key", "Private key", rb"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----", None, 0.0),
+    ("aws_access_key", "AWS access key", rb"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", None, 0.0),
+    ("github_token", "GitHub token", rb"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{40,})", None, 0.0),
+    ("gitlab_token", "GitLab token", rb"\bglpat-[A-Za-z0-9_\-]{20,}", None, 0.0),
+    ("slack_token", "Slack token", rb"\bxox[abposr]-[A-Za-z0-9\-]{10,}", None, 0.0),
+    ("google_api_key", "Google API key", rb"\bAIza[0-9A-Za-z_\-]{35}", None, 0.0),
+    ("stripe_key", "Stripe live key", rb"\b(?:sk|rk)_live_[0-9A-Za-z]{24,}", None, 0.0),
+    ("openai_key", "OpenAI / Anthropic API key", rb"\bsk-(?:proj-|ant-)?[A-Za-z0-9_\-]{32,}", None, 0.0),
+    ("jwt", "JSON Web Token", rb"\beyJ[A-Za-z0-9_\-]{10,}\.eyJ[A-Za-z0-9_\-]{10,}\.[A-Za-z0-9_\-]{10,}", None, 0.0),
+    ("url_credentials", "Password in URL", rb"\b[a-z][a-z0-9+.\-]{1,20}://[^\s/:@'\"]{1,64}:([^\s/:@'\"]{6,128})@", 1, 0.0),
+    # Generic assignments are low confidence: only a quoted literal (code, JSON, YAML)
+    # or a whole `KEY=value` line (.env, ini) counts, never an expression
+    ("generic_secret", "High-entropy secret assignment",
+     rb"(?i)(?:" + _SECRET_NAMES + rb")[A-Za-z0-9_\-]*[\"']?[ \t]*(?::[ \t]*[A-Za-z_][\w.\[\]]*[ \t]*)?[:=][ \t]*"
+     rb"([\"'])([A-Za-z0-9+/=_\-.!@#$%^&*~]{12,})\1", 2, 3.5),
+    ("generic_secret", "High-entropy secret assignment",
+     rb"(?im)^[ \t]*(?:export[ \t]+)?[A-Za-z0-9_.\-]*(?:" + _SECRET_NAMES + rb")[A-Za-z0-9_.\-]*[ \t]*[:=][ \t]*"
+     # not a snake_case name: `secret_len = crypto_sign_BYTES` is code
+     rb"(?![A-Za-z][A-Za-z0-9]*(?:_[A-Za-z0-9]+)+[ \t]*\r?$)([A-Za-z0-9+/=_\-.!@#$%^&*~]{12,})[ \t]*\r?$", 1, 3.5),
+]
+
+# Cheap first pass: literal anchors of every rule in one alternation. Files without
+# any hit (the vast majority of source files) never reach the specific rules.
+_PREFILTER = re.compile(
+    rb"PRIVATE KEY|AKIA|ASIA|gh[pousr]_|github_pat_|glpat-|xox[abposr]-|AIza|_live_|sk-|eyJ|://|"
+    rb"(?i:api[_\-]?key|secret|token|passw|access[_\-]?key|private[_\-]?key)"
+)
+_COMPILED = [(rule, description, re.compile(pattern), group, entropy) for rule, description, pattern, group, entropy in _RULES]
+
+# Placeholder values, and identifiers or attribute paths (code, not data) that look like assignments
+_PLACEHOLDER = re.compile(
+    rb"^(?i:x+|\*+|changeme|example|placeholder|your[_\-].*|<.*>|\$?\{.*\}|%\(.*\)s|null|none|true|false)$"
+    rb"|^[a-z_.\-]+$|^[A-Za-z_]+$|^[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+$"
+)
+
+_ENV_FILE = re.compile(r"^\.env(?:\..+)?$")
+_ENV_TEMPLATE = re.compile(r"(?i)\.(?:example|sample|template|dist|defaults?)$")
+
+class SecretScanner:
+    """
+    Content scanner behind ProjectConfig.strip_secrets.
+
+    Files are read once (memory-mapped when large), binaries are skipped by their
+    leading bytes (see ContentSniffer), and verdicts are cached by content hash so
+    identical content (a reverted edit, the same file in another project) is never
+    scanned twice.
+    """
+    MMAP_THRESHOLD = 256 * 1024
+    MAX_SCAN_BYTES = 8 * 1024 * 1024
+    CACHE_MAX_ENTRIES = 50_000
+
+    # blake2b digest -> findings
+    _verdicts: Dict[bytes, List[SecretFinding]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_env_file(rel_path: str) -> bool:
+        name = os.path.basename(rel_path)
+        return bool(_ENV_FILE.match(name)) and not _ENV_TEMPLATE.search(name)
+
+    @staticmethod
+    def is_binary(head: bytes) -> bool:
+        # Any recognised non-text format (archive, media, executable...) cannot hold readable secrets
+        return ContentSniffer.sniff(head) is not None
+
+    @staticmethod
+    def shannon_entropy(value: bytes) -> float:
+        if not value:
+            return 0.0
+        counts: Dict[int, int] = {}
+        for byte in value:
+            counts[byte] = counts.get(byte, 0) + 1
+        length = len(value)
+        return -sum(c / length * math.log2(c / length) for c in counts.values())
+
+    @classmethod
+    def scan_file(cls, full_path: str, rel_path: str) -> List[SecretFinding]:
+        started = time.perf_counter()
+        try:
+            findings, verdict = cls._scan_file(full_path, rel_path)
+        except OSError:
+            findings, verdict = [], "unreadable"
+        SECRET_SCAN_FILES.inc(1, verdict)
+        SECRET_SCAN_SECONDS.observe(time.perf_counter() - started)
+        return findings
+
+    @classmethod
+    def _scan_file(cls, full_path: str, rel_path: str) -> Tuple[List[SecretFinding], str]:
+        findings: List[SecretFinding] = []
+        if cls.is_env_file(rel_path):
+            findings.append(SecretFinding("env_file", "Environment file", 0))
+
+        with open(full_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return findings, "clean" if not findings else "secret"
+            if size >= cls.MMAP_THRESHOLD:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+            try:
+                if cls.is_binary(data[:8192]):
+                    return findings, "binary"
+
+                # Only the part that is matched is hashed: a huge file is not read in full
+                end = min(size, cls.MAX_SCAN_BYTES)
+                hasher = hashlib.blake2b(data[:end], digest_size=16)
+                hasher.update(size.to_bytes(8, "little"))
+                digest = hasher.digest()
+                cached = cls._verdicts.get(digest)
+                if cached is not None:
+                    return findings + cached, "cache_hit"
+
+                content_findings = cls._match(data, end)
+                cls._remember(digest, content_findings)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+        findings.extend(content_findings)
+        return findings, "secret" if findings else "clean"
+
+    @classmethod
+    def _match(cls, data, end: int) -> List[SecretFinding]:
+        if not _PREFILTER.search(data, 0, end):
+            return []
+        findings = []
+        seen = set()
+        for rule, description, pattern, group, min_entropy in _COMPILED:
+            for match in pattern.finditer(data, 0, end):
+                if group is not None:
+                    value = match.group(group)
+                    if _PLACEHOLDER.match(value) or cls.shannon_entropy(value) < min_entropy:
+                        continue
+                # Line numbers are only computed for actual findings
+                line = data[:match.start()].count(b"\n") + 1
+                if (line, rule) in seen:
+                    continue
+                # A specific rule already explains this line, skip the generic one
+                if rule == "generic_secret" and any(l == line for l, _ in seen):
+                    continue
+                seen.add((line, rule))
+                findings.append(SecretFinding(rule, description, line))
+        findings.sort(key=lambda f: f.line)
+        return findings
+
+    @classmethod
+    def _remember(cls, digest: bytes, findings: List[SecretFinding]):
+        with cls._lock:
+            if len(cls._verdicts) >= cls.CACHE_MAX_ENTRIES:
+                for key in list(cls._verdicts)[:cls.CACHE_MAX_ENTRIES // 10]:
+                    del cls._verdicts[key]
+            cls._verdicts[digest] = findings
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._verdicts.clear()
@@ -0,0 +1,406 @@
+import hashlib
+import marshal
+import os
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from watchdog.events import (
+    FileSystemEvent, FileCreatedEvent, FileDeletedEvent, FileModifiedEvent,
+    DirCreatedEvent, DirDeletedEvent, DirModifiedEvent,
+)
+
+# Relative to the working directory, like the SQLite file
+SNAPSHOT_DIR = "tutu_snapshots"
+_FORMAT = 1
+
+# Where inotify sees no changes made by other machines, the host or other containers
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "virtiofs", "fuse.sshfs", "fuse.rclone",
+    "fuse.gcsfuse", "fuse.s3fs", "davfs", "fuse.davfs", "afs", "ceph", "glusterfs", "fuse.glusterfs",
+}
+
+# A directory modified this recently may still change within the same timestamp
+RACY_NS = 2_000_000_000
+
+def remote_filesystem(path: str) -> Optional[str]:
+    """Type of the network or host-shared file system `path` lives on, None if local or unknown"""
+    try:
+        with open("/proc/self/mounts", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        mount = parts[1].replace("\\040", " ")
+        if (path == mount or path.startswith(mount.rstrip("/") + "/")) and len(mount) >= len(best):
+            best, fstype = mount, parts[2]
+    return fstype if fstype in NETWORK_FILESYSTEMS else None
+
+class _Dir:
+    """Files of one directory as parallel arrays, plus the names of its sub directories"""
+    __slots__ = ("mtime", "files", "sizes", "mtimes", "subdirs")
+
+    def __init__(self, mtime: int, files: List[str], sizes: array, mtimes: array, subdirs: List[str]):
+        self.mtime = mtime
+        self.files = files
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self.subdirs = subdirs
+
+class SnapshotIndex:
+    """
+    Size and mtime of every file below `root`, kept per directory.
+
+    A round visits every directory. One whose mtime did not change has the same
+    entries as before (entries are only added, removed or renamed through their
+    directory), so it is not listed again and only its files are stat'ed; the
+    others are listed and diffed. File contents do not touch the directory mtime,
+    so every file is still stat'ed each round. The first round without a saved
+    snapshot builds the baseline and reports nothing.
+
+    Directories `prune(rel)` rejects (node_modules, .git/objects, ignored build
+    output) are not visited at all; it is asked each round, so a directory
+    that stops being ignored is picked up.
+    """
+    def __init__(self, root: str, prune: Optional[Callable[[str], bool]] = None):
+        self.root = os.path.abspath(root)
+        self.prune = prune
+        self.dirs: Dict[str, _Dir] = {}
+        # A baseline round has finished, changes are reported from now on
+        self.complete = False
+        self.dirty = False
+        self._queue: List[str] = []
+
+    @property
+    def files(self) -> int:
+        return sum(len(d.files) for d in self.dirs.values())
+
+    def scan(self, cpu_budget: Optional[float] = None, wall_budget: Optional[float] = None) -> Tuple[List[FileSystemEvent], bool]:
+        """
+        Continue the current round for at most `cpu_budget` seconds of this thread's
+        CPU time (and `wall_budget` seconds overall). Returns the changes found and
+        whether the round finished; an unfinished round continues on the next call.
+        """
+        cpu_started, wall_started = time.thread_time(), time.perf_counter()
+        events: Optional[List[FileSystemEvent]] = [] if self.complete else None
+        if not self._queue:
+            self._queue.append("")
+        while self._queue:
+            if cpu_budget is not None and time.thread_time() - cpu_started >= cpu_budget:
+                return events or [], False
+            if wall_budget is not None and time.perf_counter() - wall_started >= wall_budget:
+                return events or [], False
+            rel = self._queue.pop()
+            self._scan_dir(rel, events)
+            known = self.dirs.get(rel)
+            if known is not None:
+                for name in known.subdirs:
+                    sub = os.path.join(rel, name)
+                    if self.prune is not None and self.prune(sub):
+                        # Indexed before it was pruned (older snapshot, changed ignore rules)
+                        self._drop(sub, None)
+                        continue
+                    self._queue.append(sub)
+        self.complete = True
+        return events or [], True
+
+    def _path(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def _scan_dir(self, rel: str, events: Optional[List[FileSystemEvent]]):
+        path = self._path(rel)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._drop(rel, events)
+            return
+        known = self.dirs.get(rel)
+        if known is None or known.mtime != mtime or not self._restat(path, known, events):
+            self._relist(rel, path, known, mtime, events)
+
+    def _restat(self, path: str, known: _Dir, events: Optional[List[FileSystemEvent]]) -> bool:
+        """Stat the known files of an unchanged directory; False if one is gone after all"""
+        for i, name in enumerate(known.files):
+            try:
+                st = os.stat(os.path.join(path, name), follow_symlinks=False)
+            except OSError:
+                return False
+            if st.st_size != known.sizes[i] or st.st_mtime_ns != known.mtimes[i]:
+                known.sizes[i] = st.st_size
+                known.mtimes[i] = st.st_mtime_ns
+                self.dirty = True
+                if events is not None:
+                    events.append(FileModifiedEvent(os.path.join(path, name)))
+        return True
+
+    def _relist(self, rel: str, path: str, known: Optional[_Dir], mtime: int, events: Optional[List[FileSystemEvent]]):
+        files: List[str] = []
+        sizes, mtimes = array("q"), array("q")
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        else:
+                            st = entry.stat(follow_symlinks=False)
+                            files.append(entry.name)
+                            sizes.append(st.st_size)
+                            mtimes.append(st.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            self._drop(rel, events)
+            return
+
+        if events is not None:
+            before = dict(zip(known.files, zip(known.sizes, known.mtimes))) if known is not None else {}
+            old_subdirs = set(known.subdirs) if known is not None else set()
+            entries_changed = len(files) != len(before) or set(subdirs) != old_subdirs
+            for name, size, file_mtime in zip(files, sizes, mtimes):
+                old = before.pop(name, None)
+                if old is None:
+                    entries_changed = True
+                    events.append(FileCreatedEvent(os.path.join(path, name)))
+                elif old != (size, file_mtime):
+                    events.append(FileModifiedEvent(os.path.join(path, name)))
+            for name in before:
+                events.append(FileDeletedEvent(os.path.join(path, name)))
+            for name in subdirs:
+                if name not in old_subdirs:
+                    events.append(DirCreatedEvent(os.path.join(path, name)))
+            # Also listed again when its mtime was too recent to trust, then nothing may have changed
+            if known is not None and entries_changed:
+                events.append(DirModifiedEvent(path))
+        if known is not None:
+            for name in set(known.subdirs) - set(subdirs):
+                self._drop(os.path.join(rel, name), events)
+
+        if time.time_ns() - mtime < RACY_NS:
+            # Listed within the directory's timestamp granularity: list it again next round
+            mtime = 0
+        self.dirs[rel] = _Dir(mtime, files, sizes, mtimes, subdirs)
+        self.dirty = True
+
+    def _drop(self, rel: str, events: Optional[List[FileSystemEvent]]):
+        """A directory is gone, and everything below it"""
+        known = self.dirs.pop(rel, None)
+        if known is None:
+            return
+        self.dirty = True
+        for name in known.subdirs:
+            self._drop(os.path.join(rel, name), events)
+        if events is not None:
+            path = self._path(rel)
+            for name in known.files:
+                events.append(FileDeletedEvent(os.path.join(path, name)))
+            events.append(DirDeletedEvent(path))
+
+    def save(self, path: str):
+        data = (_FORMAT, self.root, {
+            rel: (d.mtime, d.files, d.sizes.tobytes(), d.mtimes.tobytes(), d.subdirs)
+            for rel, d in self.dirs.items()
+        })
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump(data, f)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, root: str) -> Optional["SnapshotIndex"]:
+        """The saved snapshot of `root`, None if missing, unreadable or of another tree"""
+        try:
+            with open(path, "rb") as f:
+                version, saved_root, dirs = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        index = cls(root)
+        if version != _FORMAT or saved_root != index.root:
+            return None
+        for rel, (mtime, files, sizes, mtimes, subdirs) in dirs.items():
+            size_array, mtime_array = array("q"), array("q")
+            size_array.frombytes(sizes)
+            mtime_array.frombytes(mtimes)
+            index.dirs[rel] = _Dir(mtime, files, size_array, mtime_array, subdirs)
+        index.complete = True
+        return index
+
+class PolledTree:
+    """A tree scheduled on the SnapshotPoller; stands in for watchdog's ObservedWatch"""
+    def __init__(self, handler, index: SnapshotIndex, interval: float, cpu_budget: float, snapshot_path: str):
+        self.handler = handler
+        self.index = index
+        self.interval = interval
+        self.cpu_budget = cpu_budget
+        self.snapshot_path = snapshot_path
+        self.next_due = 0.0
+        self.rounds = 0
+        self.round_started: Optional[float] = None
+        self.last_round_ms: Optional[float] = None
+        self.last_changes = 0
+        self.lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "cpu_budget_ms": round(self.cpu_budget * 1000, 3),
+            "rounds": self.rounds,
+            "baseline": self.index.complete,
+            "last_round_ms": self.last_round_ms,
+            "last_changes": self.last_changes,
+            "directories": len(self.index.dirs),
+            "files": self.index.files,
+        }
+
+class SnapshotPoller:
+    """
+    Change detection for trees inotify cannot watch (network and container file
+    systems) or that are over the inotify budget. Same schedule / unschedule
+    interface as a watchdog observer.
+
+    One thread visits every due tree each TICK and scans it for at most the
+    tree's CPU budget (and MAX_VISIT of wall time, for slow mounts); a round over
+    a big tree spans several visits, then the tree waits its interval. Changes are
+    dispatched to the tree's handler as watchdog events, as a native observer
+    would. Snapshots are saved under SNAPSHOT_DIR, so changes made while the
+    backend was stopped are reported by the first round after a restart.
+    """
+    TICK = 0.5
+    MAX_VISIT = 1.0
+
+    def __init__(self, snapshot_dir: str = SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self._trees: List[PolledTree] = []
+        self._lock = threading.Lock()
+        # Snapshot saves and removals asked for by the event loop, run in order on the poller thread
+        self._chores: List[Tuple[Callable, tuple]] = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tutu-poller", daemon=True)
+
+    def snapshot_path(self, root: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.snapshot_dir, f"{digest}.snap")
+
+    def schedule(self, handler, path: str, recursive: bool = True, interval: float = 30.0, cpu_budget_ms: float = 50.0) -> PolledTree:
+        """Blocking: loads the saved snapshot of the tree"""
+        snapshot_path = self.snapshot_path(path)
+        index = SnapshotIndex.load(snapshot_path, path) or SnapshotIndex(path)
+        # Skip what the handler would drop anyway (see DebounceHandler.prunes)
+        index.prune = getattr(handler, "prunes", None)
+        tree = PolledTree(handler, index, interval, cpu_budget_ms / 1000, snapshot_path)
+        with self._lock:
+            self._trees.append(tree)
+        return tree
+
+    def unschedule(self, tree: PolledTree):
+        """Non-blocking: the final snapshot is saved by the poller thread"""
+        with self._lock:
+            if tree not in self._trees:
+                raise KeyError(tree.index.root)
+            self._trees.remove(tree)
+        self._defer(self._save, tree)
+
+    def remove_handler_for_watch(self, handler, tree: PolledTree):
+        self.unschedule(tree)
+
+    def discard_snapshot(self, root: str):
+        """The project is no longer watched: its saved snapshot would only go stale"""
+        # After any save still queued for the tree
+        self._defer(self._remove_snapshot, root)
+
+    def _remove_snapshot(self, root: str):
+        try:
+            os.remove(self.snapshot_path(root))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Failed to remove snapshot of {root}: {e}")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self._run_chores()
+        with self._lock:
+            trees = list(self._trees)
+        for tree in trees:
+            self._save(tree)
+
+    def _defer(self, func: Callable, *args):
+        with self._lock:
+            self._chores.append((func, args))
+            if self._thread.is_alive() and not self._stopped.is_set():
+                return
+        # No poller thread to hand it to (not started or shutting down)
+        self._run_chores()
+
+    def _run_chores(self):
+        while True:
+            with self._lock:
+                if not self._chores:
+                    return
+                func, args = self._chores.pop(0)
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error in snapshot poller: {e}")
+
+    def _run(self):
+        while not self._stopped.wait(self.TICK):
+            self._run_chores()
+            now = time.monotonic()
+            with self._lock:
+                due = [tree for tree in self._trees if tree.next_due <= now]
+            for tree in due:
+                if self._stopped.is_set():
+                    return
+                try:
+                    self._visit(tree)
+                except Exception as e:
+                    print(f"Error polling {tree.index.root}: {e}")
+                # Between visits too, so a long round does not hold them up
+                self._run_chores()
+
+    def _visit(self, tree: PolledTree):
+        with tree.lock:
+            if tree.round_started is None:
+                tree.round_started = time.perf_counter()
+                tree.last_changes = 0
+            events, finished = tree.index.scan(tree.cpu_budget, self.MAX_VISIT)
+        for event in events:
+            tree.handler.dispatch(event)
+        tree.last_changes += len(events)
+        if finished:
+            tree.rounds += 1
+            tree.last_round_ms = round((time.perf_counter() - tree.round_started) * 1000, 3)
+            tree.round_started = None
+            tree.next_due = time.monotonic() + tree.interval
+            with self._lock:
+                # Not when unscheduled meanwhile: its snapshot may have been discarded
+                scheduled = tree in self._trees
+            if tree.index.dirty and scheduled:
+                self._save(tree)
+
+    @staticmethod
+    def _save(tree: PolledTree):
+        with tree.lock:
+            # A half built baseline would report its missing part as created after a restart
+            if not tree.index.complete or not tree.index.dirty:
+                return
+            try:
+                tree.index.save(tree.snapshot_path)
+            except OSError as e:
+                print(f"Failed to save snapshot of {tree.index.root}: {e}")
@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set, Tuple
+from app.core.metrics import STATUS_CACHE_LOOKUPS, STATUS_CACHE_ENTRIES
+from app.services.git_service import GitService
+from app.services.worker_pool import worker_pool
+
+# Working tree status runs here, away from the pushes on sync_executor
+status_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tutu-status")
+
+class _Entry:
+    __slots__ = ("path", "result", "computed_at")
+
+    def __init__(self, path: str, result: Dict[str, Any], computed_at: float):
+        self.path = path
+        self.result = result
+        self.computed_at = computed_at
+
+class StatusCache:
+    """
+    `git status` per project, computed on a bounded pool and cached until the
+    project changes. Watched projects are invalidated by watcher events (working
+    tree, index, HEAD and refs) and by finished syncs; the others only live for
+    UNWATCHED_TTL, since nothing would tell us about their changes.
+    """
+    UNWATCHED_TTL = 10.0
+    # Safety net for events the observer missed
+    MAX_AGE = 300.0
+
+    def __init__(self):
+        self._entries: Dict[int, _Entry] = {}
+        # Bumped by every invalidation; a result computed across a bump is not cached
+        self._generations: Dict[int, int] = {}
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._live: Set[int] = set()
+        self._lock = threading.Lock()
+        STATUS_CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    def attach(self, project_id: int):
+        self._live.add(project_id)
+
+    def detach(self, project_id: int):
+        self._live.discard(project_id)
+        self.invalidate(project_id)
+
+    def invalidate(self, project_id: int):
+        """Thread-safe; called from the observer thread and after syncs"""
+        with self._lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+            self._entries.pop(project_id, None)
+
+    def on_path(self, project_id: int, path: str, is_directory: bool = False):
+        """Watcher hook for every event, before filtering"""
+        norm = path.replace(os.sep, "/")
+        marker = norm.find("/.git/")
+        if marker >= 0:
+            inner = norm[marker + len("/.git/"):]
+            # Only what changes the status: the index, HEAD and refs (commits made outside the app)
+            if inner.endswith(".lock") or not (inner == "index" or inner == "HEAD" or inner.startswith("refs/") or inner == "packed-refs"):
+                return
+        self.invalidate(project_id)
+
+    async def get(self, project_id: int, path: str) -> Tuple[Dict[str, Any], bool]:
+        """(status, served from cache)"""
+        entry = self._entries.get(project_id)
+        if entry is not None and entry.path == path and self._fresh(project_id, entry):
+            STATUS_CACHE_LOOKUPS.inc(1, "hit")
+            return entry.result, True
+        STATUS_CACHE_LOOKUPS.inc(1, "miss")
+
+        # Concurrent requests for the same project share one computation
+        key = (project_id, path)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._compute(project_id, path))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future), False
+
+    async def get_many(self, projects: List[Tuple[int, str]]) -> Dict[int, Tuple[Dict[str, Any], bool]]:
+        """Status of many projects at once; misses run concurrently, at most status_executor's workers at a time"""
+        results = await asyncio.gather(*(self.get(project_id, path) for project_id, path in projects))
+        return {project_id: result for (project_id, _), result in zip(projects, results)}
+
+    def _fresh(self, project_id: int, entry: _Entry) -> bool:
+        age = time.monotonic() - entry.computed_at
+        return age < (self.MAX_AGE if project_id in self._live else self.UNWATCHED_TTL)
+
+    async def _compute(self, project_id: int, path: str) -> Dict[str, Any]:
+        with self._lock:
+            generation = self._generations.get(project_id, 0)
+        if worker_pool.enabled:
+            result = await worker_pool.status(path)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                status_executor, contextvars.copy_context().run, functools.partial(GitService.get_status, path)
+            )
+        with self._lock:
+            if self._generations.get(project_id, 0) == generation and "error" not in result:
+                self._entries[project_id] = _Entry(path, result, time.monotonic())
+        return result
+
+status_cache = StatusCache()
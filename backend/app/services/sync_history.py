@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from sqlmodel import Session, select, delete
+from app.core.database import engine, run_db
+from app.models.project import Project
+from app.models.sync_run import SyncRun, SyncRunHourly, StageStats, SyncStatsResponse
+from app.core.metrics import SYNC_STAGE_SECONDS, SYNC_RUNS, SYNC_BYTES_PUSHED
+
+STAGES = ("status", "scan", "add", "commit", "push", "total")
+
+def _truncate_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+class SyncHistoryService:
+    """
+    Records one SyncRun per sync attempt.
+
+    Runs are buffered in memory and written in batches; raw rows older than
+    RAW_RETENTION are rolled up into SyncRunHourly (sums + bucketed histograms,
+    so p50/p95 can still be estimated) and hourly rows expire after HOURLY_RETENTION.
+    """
+    # Upper bounds of the histogram buckets in ms; the last bucket is the overflow
+    BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000]
+    FLUSH_SIZE = 50
+    FLUSH_INTERVAL = 10  # seconds
+    ROLLUP_INTERVAL = 3600  # seconds
+    RAW_RETENTION = timedelta(hours=48)
+    HOURLY_RETENTION = timedelta(days=90)
+
+    def __init__(self):
+        self._buffer: List[SyncRun] = []
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def start(self):
+        self.is_running = True
+        self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def record(self, run: SyncRun):
+        """Queue a run for the next batch write"""
+        SYNC_RUNS.labels(run.trigger, run.outcome).inc()
+        for stage in STAGES:
+            value = getattr(run, f"{stage}_ms")
+            if value or stage == "total":
+                SYNC_STAGE_SECONDS.observe(value / 1000, stage, run.trigger)
+        if run.bytes_pushed:
+            SYNC_BYTES_PUSHED.inc(run.bytes_pushed)
+        
+        with self._lock:
+            self._buffer.append(run)
+            size = len(self._buffer)
+        if size >= self.FLUSH_SIZE and self.is_running:
+            try:
+                asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass
+
+    async def flush(self) -> int:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            await run_db(self._write_batch, batch)
+        return len(batch)
+
+    async def _maintenance_loop(self):
+        last_rollup = 0.0
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            try:
+                await self.flush()
+                if loop.time() - last_rollup >= self.ROLLUP_INTERVAL:
+                    await run_db(self.rollup, datetime.now())
+                    last_rollup = loop.time()
+            except Exception as e:
+                print(f"Error in sync history maintenance: {e}")
+
+    @staticmethod
+    def _write_batch(batch: List[SyncRun]):
+        with Session(engine) as session:
+            # A flush already in flight, or a sync finishing, may outlive its project's deletion
+            project_ids = {run.project_id for run in batch}
+            existing = set(session.exec(select(Project.id).where(Project.id.in_(project_ids))).all())
+            session.add_all(run for run in batch if run.project_id in existing)
+            session.commit()
+
+    @classmethod
+    def _bucket(cls, value_ms: float) -> int:
+        for i, bound in enumerate(cls.BUCKETS_MS):
+            if value_ms <= bound:
+                return i
+        return len(cls.BUCKETS_MS)
+
+    @classmethod
+    def _empty_histogram(cls) -> List[int]:
+        return [0] * (len(cls.BUCKETS_MS) + 1)
+
+    @classmethod
+    def rollup(cls, now: datetime) -> Dict[str, int]:
+        """Fold raw runs of complete hours older than RAW_RETENTION into hourly rows"""
+        cutoff = _truncate_hour(now - cls.RAW_RETENTION)
+        with Session(engine) as session:
+            runs = session.exec(select(SyncRun).where(SyncRun.started_at < cutoff)).all()
+
+            groups: Dict[tuple, List[SyncRun]] = {}
+            for run in runs:
+                groups.setdefault((run.project_id, _truncate_hour(run.started_at)), []).append(run)
+
+            for (project_id, hour), group in groups.items():
+                row = session.exec(
+                    select(SyncRunHourly).where(SyncRunHourly.project_id == project_id, SyncRunHourly.hour == hour)
+                ).first()
+                if not row:
+                    row = SyncRunHourly(project_id=project_id, hour=hour)
+                histograms = json.loads(row.histograms or "{}")
+                for stage in STAGES:
+                    histograms.setdefault(stage, cls._empty_histogram())
+
+                for run in group:
+                    row.runs += 1
+                    if run.outcome == "success":
+                        row.successes += 1
+                    elif run.outcome == "error":
+                        row.failures += 1
+                    row.files_changed += run.files_changed
+                    row.bytes_pushed += run.bytes_pushed
+                    row.status_ms_sum += run.status_ms
+                    row.scan_ms_sum += run.scan_ms
+                    row.add_ms_sum += run.add_ms
+                    row.commit_ms_sum += run.commit_ms
+                    row.push_ms_sum += run.push_ms
+                    row.total_ms_sum += run.total_ms
+                    row.total_ms_max = max(row.total_ms_max, run.total_ms)
+                    for stage in STAGES:
+                        histograms[stage][cls._bucket(getattr(run, f"{stage}_ms"))] += 1
+
+                row.histograms = json.dumps(histograms)
+                session.add(row)
+
+            session.exec(delete(SyncRun).where(SyncRun.started_at < cutoff))
+            expired = session.exec(delete(SyncRunHourly).where(SyncRunHourly.hour < now - cls.HOURLY_RETENTION))
+            session.commit()
+            return {"rolled_up": len(runs), "hours": len(groups), "expired_hours": expired.rowcount or 0}
+
+    @staticmethod
+    def get_history(project_id: int, limit: int = 50, since: Optional[datetime] = None) -> List[SyncRun]:
+        with Session(engine) as session:
+            query = select(SyncRun).where(SyncRun.project_id == project_id)
+            if since:
+                query = query.where(SyncRun.started_at >= since)
+            query = query.order_by(SyncRun.started_at.desc()).limit(limit)
+            return list(session.exec(query).all())
+
+    @classmethod
+    def get_stats(cls, project_id: int, hours: int, now: datetime) -> SyncStatsResponse:
+        """
+        Aggregate stats over the last `hours`.
+
+        Percentiles are exact while only raw runs are involved; once hourly rollups
+        contribute they are estimated from the merged bucket histograms.
+        """
+        since = now - timedelta(hours=hours)
+        with Session(engine) as session:
+            runs = session.exec(
+                select(SyncRun).where(SyncRun.project_id == project_id, SyncRun.started_at >= since)
+            ).all()
+            rollups = session.exec(
+                select(SyncRunHourly).where(SyncRunHourly.project_id == project_id, SyncRunHourly.hour >= _truncate_hour(since))
+            ).all()
+
+        total_runs = len(runs) + sum(r.runs for r in rollups)
+        stages = {}
+        for stage in STAGES:
+            values = sorted(getattr(run, f"{stage}_ms") for run in runs)
+            total_sum = sum(values) + sum(getattr(r, f"{stage}_ms_sum") for r in rollups)
+            stats = StageStats(avg_ms=round(total_sum / total_runs, 2) if total_runs else 0.0)
+            if rollups:
+                histogram = cls._empty_histogram()
+                for r in rollups:
+                    for i, count in enumerate(json.loads(r.histograms or "{}").get(stage, [])):
+                        histogram[i] += count
+                for value in values:
+                    histogram[cls._bucket(value)] += 1
+                stats.p50_ms = cls._histogram_percentile(histogram, 0.50)
+                stats.p95_ms = cls._histogram_percentile(histogram, 0.95)
+            elif values:
+                stats.p50_ms = round(values[min(len(values) - 1, int(len(values) * 0.50))], 2)
+                stats.p95_ms = round(values[min(len(values) - 1, int(len(values) * 0.95))], 2)
+            stages[stage] = stats
+
+        return SyncStatsResponse(
+            project_id=project_id,
+            hours=hours,
+            runs=total_runs,
+            successes=sum(1 for run in runs if run.outcome == "success") + sum(r.successes for r in rollups),
+            failures=sum(1 for run in runs if run.outcome == "error") + sum(r.failures for r in rollups),
+            files_changed=sum(run.files_changed for run in runs) + sum(r.files_changed for r in rollups),
+            bytes_pushed=sum(run.bytes_pushed for run in runs) + sum(r.bytes_pushed for r in rollups),
+            **stages,
+        )
+
+    @classmethod
+    def _histogram_percentile(cls, histogram: List[int], q: float) -> Optional[float]:
+        total = sum(histogram)
+        if not total:
+            return None
+        target = q * total
+        cumulative = 0
+        for i, count in enumerate(histogram):
+            if count and cumulative + count >= target:
+                if i >= len(cls.BUCKETS_MS):
+                    return float(cls.BUCKETS_MS[-1])
+                lower = cls.BUCKETS_MS[i - 1] if i > 0 else 0
+                upper = cls.BUCKETS_MS[i]
+                return round(lower + (upper - lower) * (target - cumulative) / count, 2)
+            cumulative += count
+        return float(cls.BUCKETS_MS[-1])
+
+    def delete_project_history(self, project_id: int):
+        """Blocking; buffered runs of the project go too, or the next flush would write them back"""
+        with self._lock:
+            self._buffer = [run for run in self._buffer if run.project_id != project_id]
+        with Session(engine) as session:
+            session.exec(delete(SyncRun).where(SyncRun.project_id == project_id))
+            session.exec(delete(SyncRunHourly).where(SyncRunHourly.project_id == project_id))
+            session.commit()
+
+sync_history = SyncHistoryService()
@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.services.snapshot_poller import remote_filesystem
+
+NATIVE = "native"
+POLLING = "polling"
+# Allocations rebalancing leaves alone: the project's watch_backend, or a network file system
+PINNED_REASONS = ("configured", "remote_fs")
+
+def inotify_limit() -> Optional[int]:
+    """fs.inotify.max_user_watches, None where watchdog does not use inotify"""
+    try:
+        with open("/proc/sys/fs/inotify/max_user_watches", "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def count_watches(path: str, limit: Optional[int] = None) -> int:
+    """
+    inotify watches a recursive native observer takes for `path`: one per
+    directory, symlinked directories not followed. Stops counting past `limit`.
+    """
+    count = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if limit is not None and count > limit:
+            break
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return count
+
+class _Allocation:
+    __slots__ = ("project_id", "path", "watches", "mode", "reason")
+
+    def __init__(self, project_id: int, path: str, watches: Optional[int], mode: str, reason: Optional[str]):
+        self.project_id = project_id
+        self.path = path
+        self.watches = watches
+        self.mode = mode
+        self.reason = reason
+
+class WatchBudget:
+    """
+    Shares the inotify watch limit between projects.
+
+    A recursive native watch costs one inotify watch per directory, node_modules
+    and build output included, and fs.inotify.max_user_watches is shared with
+    every other program of the user (editors, other watchers). Projects keep
+    native watches while they fit in `budget` (BUDGET_RATIO of the limit unless
+    set with CODEARK_WATCH_BUDGET); the others are degraded to polling. plan()
+    gives the native watches to the most recently active projects. Projects with
+    watch_backend native or polling, and projects on network file systems (where
+    inotify misses changes made elsewhere), keep their mode.
+
+    Without inotify (macOS, Windows) there is no budget and every project is native.
+    """
+    BUDGET_RATIO = 0.5
+
+    def __init__(self, budget: Optional[int] = None):
+        self.limit = inotify_limit()
+        if budget is None and self.limit is not None:
+            budget = int(self.limit * self.BUDGET_RATIO)
+        self.budget = budget
+        self._allocations: Dict[int, _Allocation] = {}
+        # project_id -> time.time() of the last change seen or sync done
+        self._activity: Dict[int, float] = {}
+        # Native projects whose directory tree changed since they were counted
+        self._recount: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def used(self) -> int:
+        with self._lock:
+            return self._used()
+
+    def _used(self, exclude: Optional[int] = None) -> int:
+        return sum(
+            a.watches or 0 for a in self._allocations.values()
+            if a.mode == NATIVE and a.project_id != exclude
+        )
+
+    def request(self, project_id: int, path: str, last_active: Optional[float] = None, backend: str = "auto") -> str:
+        """Blocking (walks the tree): the mode a new watch of the project should use"""
+        if last_active is not None:
+            self.touch(project_id, last_active)
+        if backend == POLLING:
+            self.assign(project_id, path, POLLING, "configured")
+            return POLLING
+        if backend != NATIVE and remote_filesystem(path):
+            self.assign(project_id, path, POLLING, "remote_fs")
+            return POLLING
+        if self.budget is None:
+            self.assign(project_id, path, NATIVE, "configured" if backend == NATIVE else None)
+            return NATIVE
+        watches = count_watches(path, self.budget)
+        with self._lock:
+            if backend == NATIVE:
+                # Over the budget too; only the kernel limit stops it
+                mode, reason = NATIVE, "configured"
+            elif watches > self.budget:
+                mode, reason = POLLING, "too_large"
+            elif watches > self.budget - self._used(exclude=project_id):
+                mode, reason = POLLING, "over_budget"
+            else:
+                mode, reason = NATIVE, None
+            self._allocations[project_id] = _Allocation(project_id, path, watches, mode, reason)
+        return mode
+
+    def assign(self, project_id: int, path: str, mode: str, reason: Optional[str] = None):
+        with self._lock:
+            allocation = self._allocations.get(project_id)
+            watches = allocation.watches if allocation is not None else None
+            self._allocations[project_id] = _Allocation(project_id, path, watches, mode, reason)
+
+    def exhausted(self, project_id: int, path: str):
+        """
+        The kernel refused a native watch although the budget allowed it: other
+        programs hold the rest of the limit, so nothing beyond what is in use fits.
+        """
+        with self._lock:
+            if self.budget is not None:
+                self.budget = min(self.budget, self._used(exclude=project_id))
+        self.assign(project_id, path, POLLING, "limit_reached")
+
+    def release(self, project_id: int):
+        with self._lock:
+            self._allocations.pop(project_id, None)
+            self._activity.pop(project_id, None)
+            self._recount.discard(project_id)
+
+    def touch(self, project_id: int, when: Optional[float] = None):
+        """Thread-safe; record activity of a project"""
+        when = when if when is not None else time.time()
+        if when > self._activity.get(project_id, 0.0):
+            self._activity[project_id] = when
+
+    def on_directory(self, project_id: int):
+        """Observer thread: a directory event, the project's watch count may have changed"""
+        if self.budget is not None:
+            self._recount.add(project_id)
+
+    def path_of(self, project_id: int) -> Optional[str]:
+        allocation = self._allocations.get(project_id)
+        return allocation.path if allocation is not None else None
+
+    def plan(self) -> List[Tuple[int, str]]:
+        """
+        Blocking (recounts changed trees): (project id, new mode) moves that give
+        the budget to the most recently active projects, demotions first.
+        """
+        if self.budget is None:
+            return []
+        recount = list(self._recount)
+        self._recount.difference_update(recount)
+        counts = {}
+        for project_id in recount:
+            path = self.path_of(project_id)
+            if path is not None:
+                counts[project_id] = count_watches(path, self.budget)
+
+        with self._lock:
+            for project_id, watches in counts.items():
+                if project_id in self._allocations:
+                    self._allocations[project_id].watches = watches
+            ranked = sorted(
+                self._allocations.values(),
+                key=lambda a: self._activity.get(a.project_id, 0.0),
+                reverse=True,
+            )
+            remaining = self.budget - sum(
+                a.watches or 0 for a in ranked if a.mode == NATIVE and a.reason in PINNED_REASONS
+            )
+            moves = []
+            for allocation in ranked:
+                if allocation.watches is None or allocation.reason in PINNED_REASONS:
+                    continue
+                if allocation.watches <= remaining:
+                    remaining -= allocation.watches
+                    if allocation.mode != NATIVE:
+                        moves.append((allocation.project_id, NATIVE))
+                elif allocation.mode == NATIVE:
+                    moves.append((allocation.project_id, POLLING))
+        # Free watches before new ones are taken
+        moves.sort(key=lambda move: move[1] != POLLING)
+        return moves
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            projects = [
+                {
+                    "project_id": a.project_id,
+                    "mode": a.mode,
+                    "watches": a.watches,
+                    "reason": a.reason,
+                    "last_active": self._activity.get(a.project_id),
+                }
+                for a in sorted(self._allocations.values(), key=lambda a: a.project_id)
+            ]
+            return {
+                "limit": self.limit,
+                "budget": self.budget,
+                "used": self._used(),
+                "native": sum(1 for p in projects if p["mode"] == NATIVE),
+                "polling": sum(1 for p in projects if p["mode"] == POLLING),
+                "projects": projects,
+            }
+
+_env_budget = os.environ.get("CODEARK_WATCH_BUDGET")
+watch_budget = WatchBudget(int(_env_budget) if _env_budget else None)
@@ -1,213 +1,572 @@
 import asyncio
+import errno
+import os
 import time
 from datetime import datetime
-from typing import Dict, Set, Any
-from watchdog.observers import Observer
+from typing import Dict, Any, Optional, List, Set, Tuple
 from watchdog.events import FileSystemEventHandler
-from sqlmodel import Session, select
-from app.core.database import engine
-from app.models.project import Project
-from app.models.settings import AppSettings
+from app.core.database import run_db
+from app.core.startup import startup
+from app.core.tracing import tracer
+from app.core.metrics import (
+    WATCHER_EVENTS_RECEIVED, WATCHER_EVENTS_FILTERED, WATCHER_EVENTS_COALESCED,
+    PENDING_SYNCS, WATCHED_PROJECTS, WATCHER_OVERFLOWS,
+)
+from app.models.project import Project, invalidate_config_cache
 from app.services.git_service import GitService
+from app.services.scanner_service import ScannerService
+from app.services.ignore_service import IgnoreService
+from app.services.ignore_matcher import ignore_matchers
 from app.services.logger import manager as log_manager
+from app.services.project_store import ProjectStore
+from app.services.event_bus import event_bus, ProjectEvent
+from app.services.sync_history import sync_history
+from app.services.disk_usage import disk_usage
+from app.services.status_cache import status_cache
+from app.services.watch_budget import watch_budget, NATIVE, POLLING
+from app.services.snapshot_poller import SnapshotPoller
+from app.services.reconciler import Reconciler, install_overflow_hook
+from app.models.sync_run import SyncRun
 from app.i18n.log_messages import LogMessages
 
+# 过滤常见的临时文件和日志文件
+# 重要：忽略数据库文件，避免状态更新触发循环监控
+IGNORED_PATTERNS = ['.log', '.tmp', '.cache', '__pycache__', 'node_modules', '.DS_Store', '.swp', '~', '.db', '.db-journal', '.db-wal', '.db-shm']
+
 class DebounceHandler(FileSystemEventHandler):
-    def __init__(self, project_id: int, callback):
+    def __init__(self, project_id: int, callback, on_path=None, root: Optional[str] = None):
         self.project_id = project_id
         self.callback = callback
+        # Optional (project_id, path, is_directory) hook that sees every event, before filtering
+        self.on_path = on_path
+        # With the project root, paths git ignores are filtered with the project's own rules
+        self.prefix = os.path.join(os.path.abspath(root), "") if root else None
+        self.matcher = ignore_matchers.get(root) if root else None
 
     def on_modified(self, event):
-        if event.is_directory:
-            return
-        if ".git" in event.src_path:
-            return
-        # 过滤常见的临时文件和日志文件
-        # 重要：忽略数据库文件，避免状态更新触发循环监控
-        ignored_patterns = ['.log', '.tmp', '.cache', '__pycache__', 'node_modules', '.DS_Store', '.swp', '~', '.db', '.db-journal', '.db-wal', '.db-shm']
-        if any(pattern in event.src_path for pattern in ignored_patterns):
-            return
-        self.callback(self.project_id)
+        self._handle(event, event.src_path)
 
     def on_created(self, event):
+        self._handle(event, event.src_path)
+
+    def on_deleted(self, event):
+        self._handle(event, event.src_path)
+
+    def on_moved(self, event):
+        if self.on_path:
+            self.on_path(self.project_id, event.src_path, event.is_directory)
+        self._handle(event, event.dest_path)
+
+    def prunes(self, rel_dir: str) -> bool:
+        """
+        Whether every event below a directory of the project (relative path) would
+        be dropped here, so the snapshot poller need not descend into it. Inside
+        .git only refs/ is kept: HEAD, the index and refs are what status_cache
+        watches for.
+        """
+        parts = rel_dir.replace(os.sep, "/").split("/")
+        if ".git" in parts:
+            inner = parts[parts.index(".git") + 1:]
+            return bool(inner) and inner[0] != "refs"
+        if any(pattern in rel_dir for pattern in IGNORED_PATTERNS):
+            return True
+        return self.matcher is not None and self.matcher.is_ignored(rel_dir.replace(os.sep, "/") + "/")
+
+    def _handle(self, event, path: str):
+        WATCHER_EVENTS_RECEIVED.inc()
+        if self.on_path:
+            self.on_path(self.project_id, path, event.is_directory)
         if event.is_directory:
+            WATCHER_EVENTS_FILTERED.inc()
             return
-        if ".git" in event.src_path:
+        if ".git" in path:
+            WATCHER_EVENTS_FILTERED.inc()
             return
-        # 过滤常见的临时文件和日志文件
-        # 重要：忽略数据库文件，避免状态更新触发循环监控
-        ignored_patterns = ['.log', '.tmp', '.cache', '__pycache__', 'node_modules', '.DS_Store', '.swp', '~', '.db', '.db-journal', '.db-wal', '.db-shm']
-        if any(pattern in event.src_path for pattern in ignored_patterns):
+        if any(pattern in path for pattern in IGNORED_PATTERNS):
+            WATCHER_EVENTS_FILTERED.inc()
+            return
+        if self.matcher is not None and path.startswith(self.prefix) and self.matcher.is_ignored(path[len(self.prefix):]):
+            WATCHER_EVENTS_FILTERED.inc()
             return
         self.callback(self.project_id)
 
 class WatcherService:
+    # Seconds between two hand-outs of the inotify budget to the most active projects
+    REBALANCE_INTERVAL = 300.0
+
     def __init__(self):
-        self.observer = Observer()
-        self.observer.start()
-        self.watched_projects: Dict[int, Any] = {}
+        # Created by start(): watchdog's observer module and thread stay out of the import
+        self.observer = None
+        # Projects polled instead: over the inotify budget, on network file systems, or configured so
+        self.poller: Optional[SnapshotPoller] = None
+        self.watched_projects: Dict[int, Tuple[Any, Any]] = {} # project_id -> (observer, watch)
+        self.watch_settings: Dict[int, Tuple[str, int, int]] = {} # project_id -> settings the watch was made with
         self.pending_syncs: Dict[int, float] = {} # project_id -> last_event_time
+        self.schedule: Dict[int, Optional[datetime]] = {} # project_id -> next_sync_due
+        self.flagged: Dict[int, Set[str]] = {} # project_id -> risky paths already reported
         self.is_running = False
+        self._attaching: Optional[asyncio.Task] = None
+        # Projects dropped while the startup attach is still running
+        self._forgotten: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Dirty checks for changes no event told us about
+        self.reconciler = Reconciler(self._on_file_change)
+        PENDING_SYNCS.set_function(lambda: len(self.pending_syncs))
+        WATCHED_PROJECTS.set_function(lambda: len(self.watched_projects))
     
-    def _get_language(self, session: Session) -> str:
-        """Get the global language setting from database"""
-        settings = session.exec(select(AppSettings)).first()
-        return settings.language if settings and hasattr(settings, 'language') else "zh"
+    async def _broadcast_t(self, key: str, level: str, project_id: int, **kwargs):
+        """Translate and broadcast a log message, reading the language off the event loop"""
+        lang = await run_db(ProjectStore.get_language)
+        await log_manager.broadcast(LogMessages.t(key, lang, **kwargs), level, project_id)
 
     def start(self):
+        from watchdog.observers import Observer
         self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        install_overflow_hook(self._on_overflow)
+        self.observer = Observer()
+        self.observer.start()
+        self.poller = SnapshotPoller()
+        self.poller.start()
+        event_bus.bind_loop(asyncio.get_running_loop())
+        event_bus.subscribe(self._on_project_event)
         asyncio.create_task(self._sync_loop())
-        self.refresh_watchers()
+        self.reconciler.start()
+        # Scheduling a watch walks the project tree, so startup does not wait for it
+        self._attaching = asyncio.create_task(self._attach_watchers())
 
     def stop(self):
         self.is_running = False
-        self.observer.stop()
-        self.observer.join()
+        event_bus.unsubscribe(self._on_project_event)
+        if self._attaching is not None:
+            self._attaching.cancel()
+        self.reconciler.stop()
+        for observer in (self.observer, self.poller):
+            if observer is not None:
+                observer.stop()
+                observer.join()
 
-    def refresh_watchers(self):
-        """Reloads projects from DB and updates watchdog observers"""
-        with Session(engine) as session:
-            projects = session.exec(select(Project)).all()
-            
-            for p in projects:
-                # 只要开启了 auto_push，我们就监控文件变化
-                # 即使是定时模式，我们也需要知道是否有文件变化，以便决定是否需要推送
-                if p.config.auto_push:
-                    if p.id not in self.watched_projects:
-                         self._watch_project(p)
-                
-            # Remove deleted or disabled watchers (TODO: Optimize this)
+    async def _attach_watchers(self):
+        """Watch every auto-push project, one at a time in a worker thread, while requests are already served"""
+        # 只要开启了 auto_push，我们就监控文件变化
+        # 即使是定时模式，我们也需要知道是否有文件变化，以便决定是否需要推送
+        projects = await run_db(ProjectStore.list_auto_push)
+        # Recently synced projects first, so they get the inotify budget
+        projects.sort(key=lambda p: p.last_sync_time or datetime.min, reverse=True)
+        startup.watchers_total = len(projects)
+        for p in projects:
+            if not self.is_running:
+                return
+            if p.id not in self.watched_projects and p.id not in self._forgotten:
+                self.schedule.setdefault(p.id, p.next_sync_due)
+                await self._watch_project_async(p)
+            startup.watchers_attached += 1
+        self._forgotten.clear()
+        startup.mark("watchers")
+
+    async def wait_attached(self):
+        """Until the startup attach has finished"""
+        if self._attaching is not None:
+            await asyncio.shield(self._attaching)
     
     def watch_project(self, project: Project):
         """Public method to watch a single project"""
+        if project.id in self.watched_projects and self.watch_settings.get(project.id) != self._watch_settings(project):
+            # watch_backend or polling settings changed
+            self._unwatch_project(project.id)
+        if project.id not in self.watched_projects:
+            # Just created or switched on: treat as active for the watch budget
+            watch_budget.touch(project.id)
         self._watch_project(project)
+        self.schedule[project.id] = project.next_sync_due
             
     def _watch_project(self, project: Project):
+        if project.id in self.watched_projects:
+            return
         try:
-            if project.id in self.watched_projects:
-                return
-                
-            handler = DebounceHandler(project.id, self._on_file_change)
-            watch = self.observer.schedule(handler, project.path, recursive=True)
-            self.watched_projects[project.id] = watch
-            
-            # Get language setting for log
-            with Session(engine) as session:
-                lang = self._get_language(session)
-                msg = LogMessages.t("started_watching", lang, name=project.name)
-                asyncio.create_task(log_manager.broadcast(msg, "info", project.id))
+            handler, observer, watch = self._schedule_watch(
+                project.id, project.path, self._watch_settings(project), self._last_active(project)
+            )
+        except Exception as e:
+            asyncio.create_task(self._broadcast_t("error_watch_failed", "error", project.id, name=project.name, error=str(e)))
+            return
+        self._watched(project, observer, watch)
+
+    async def _watch_project_async(self, project: Project):
+        try:
+            handler, observer, watch = await asyncio.to_thread(
+                self._schedule_watch, project.id, project.path, self._watch_settings(project), self._last_active(project)
+            )
         except Exception as e:
-            # Get language setting for error log
-            with Session(engine) as session:
-                lang = self._get_language(session)
-                msg = LogMessages.t("error_watch_failed", lang, name=project.name, error=str(e))
-                asyncio.create_task(log_manager.broadcast(msg, "error", project.id))
+            asyncio.create_task(self._broadcast_t("error_watch_failed", "error", project.id, name=project.name, error=str(e)))
+            return
+        if project.id in self.watched_projects or project.id in self._forgotten or not self.is_running:
+            # Watched or dropped by a project event in the meantime; the watch itself may be shared
+            observer.remove_handler_for_watch(handler, watch)
+            return
+        self._watched(project, observer, watch)
+        # Changes made while the backend was stopped; a saved snapshot reports them by itself
+        if observer is not self.poller or not watch.index.complete:
+            self.reconciler.submit(project.id, project.path, "startup")
+
+    @staticmethod
+    def _last_active(project: Project) -> Optional[float]:
+        return project.last_sync_time.timestamp() if project.last_sync_time else None
+
+    @staticmethod
+    def _watch_settings(project: Project) -> Tuple[str, int, int]:
+        config = project.config
+        return config.watch_backend, config.poll_interval, config.poll_budget_ms
+
+    def _schedule_watch(self, project_id: int, path: str, settings: Tuple[str, int, int],
+                        last_active: Optional[float] = None, mode: Optional[str] = None):
+        """
+        Blocking part: budgeting counts the directories of the tree, a native watch
+        adds an inotify watch for each of them and polling loads the saved snapshot.
+        Without `mode` the budget decides.
+        """
+        backend, poll_interval, poll_budget_ms = settings
+        handler = DebounceHandler(project_id, self._on_file_change, self._on_path, path)
+        if mode is None:
+            mode = watch_budget.request(project_id, path, last_active, backend)
+        else:
+            # Moved by a rebalance
+            watch_budget.assign(project_id, path, mode, None if mode == NATIVE else "over_budget")
+        if mode == NATIVE:
+            try:
+                watch = self.observer.schedule(handler, path, recursive=True)
+                return handler, self.observer, watch
+            except OSError as e:
+                if e.errno != errno.ENOSPC:
+                    raise
+                from watchdog.observers.api import ObservedWatch
+                try:
+                    self.observer.remove_handler_for_watch(handler, ObservedWatch(path, recursive=True))
+                except KeyError:
+                    pass
+                watch_budget.exhausted(project_id, path)
+        watch = self.poller.schedule(handler, path, recursive=True, interval=poll_interval, cpu_budget_ms=poll_budget_ms)
+        return handler, self.poller, watch
+
+    def _watched(self, project: Project, observer, watch):
+        self.watched_projects[project.id] = (observer, watch)
+        self.watch_settings[project.id] = self._watch_settings(project)
+        disk_usage.attach(project.id)
+        status_cache.attach(project.id)
+        if observer is self.poller:
+            asyncio.create_task(self._broadcast_t("watching_polled", "info", project.id, name=project.name, interval=project.config.poll_interval))
+        else:
+            asyncio.create_task(self._broadcast_t("started_watching", "info", project.id, name=project.name))
+
+    async def _rebalance(self):
+        """Move projects between inotify and polling so the budget goes to the most recently active ones"""
+        for project_id, mode in await asyncio.to_thread(watch_budget.plan):
+            current = self.watched_projects.get(project_id)
+            settings = self.watch_settings.get(project_id)
+            path = watch_budget.path_of(project_id)
+            if current is None or settings is None or path is None or not self.is_running:
+                continue
+            try:
+                handler, observer, watch = await asyncio.to_thread(self._schedule_watch, project_id, path, settings, None, mode)
+            except Exception as e:
+                print(f"Failed to move watch of project {project_id} to {mode}: {e}")
+                continue
+            if self.watched_projects.get(project_id) is not current:
+                # Dropped or re-watched meanwhile
+                observer.remove_handler_for_watch(handler, watch)
+                continue
+            # The new watch is in place before the old one goes, so no change is missed
+            self.watched_projects[project_id] = (observer, watch)
+            self._unschedule(*current)
+
+    @staticmethod
+    def _unschedule(observer, watch):
+        try:
+            # Releases the inotify watches of the whole tree right away
+            observer.unschedule(watch)
+        except KeyError:
+            pass
+
+    def _unwatch_project(self, project_id: int):
+        current = self.watched_projects.pop(project_id, None)
+        if current is not None:
+            self._unschedule(*current)
+        self.watch_settings.pop(project_id, None)
+        watch_budget.release(project_id)
+
+    def poll_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Snapshot polling progress of the polled projects"""
+        return {
+            project_id: watch.stats()
+            for project_id, (observer, watch) in list(self.watched_projects.items())
+            if observer is self.poller
+        }
+
+    def _forget_project(self, project_id: int):
+        """Drop every piece of watcher state for a project"""
+        if self._attaching is not None and not self._attaching.done():
+            self._forgotten.add(project_id)
+        path = watch_budget.path_of(project_id)
+        self._unwatch_project(project_id)
+        if path is not None and self.poller is not None:
+            self.poller.discard_snapshot(path)
+        self.reconciler.discard(project_id)
+        self.pending_syncs.pop(project_id, None)
+        self.schedule.pop(project_id, None)
+        self.flagged.pop(project_id, None)
+        disk_usage.detach(project_id)
+        status_cache.detach(project_id)
+        invalidate_config_cache(project_id)
+
+    def _on_project_event(self, event: ProjectEvent):
+        """Incrementally reconcile watcher state with a project create/update/delete"""
+        if event.kind == ProjectEvent.DELETED or event.project is None:
+            self._forget_project(event.project_id)
+            return
+        
+        project = event.project
+        if project.auto_push:
+            self.watch_project(project)
+        else:
+            self._forget_project(project.id)
+
+    def _on_overflow(self, root: str):
+        # inotify reader thread: the kernel dropped events of the watch on `root`
+        WATCHER_OVERFLOWS.inc()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._overflowed, root)
+
+    def _overflowed(self, root: str):
+        for project_id, (observer, watch) in list(self.watched_projects.items()):
+            if observer is self.observer and os.path.abspath(watch.path) == os.path.abspath(root):
+                # Whatever was derived from the lost events is suspect
+                status_cache.invalidate(project_id)
+                disk_usage.invalidate(project_id)
+                watch_budget.on_directory(project_id)
+                self.reconciler.submit(project_id, watch.path, "overflow")
+
+    @staticmethod
+    def _on_path(project_id: int, path: str, is_directory: bool):
+        # Observer thread: every raw event, before filtering
+        if is_directory:
+            watch_budget.on_directory(project_id)
+        disk_usage.on_path(project_id, path, is_directory)
+        status_cache.on_path(project_id, path, is_directory)
 
     def _on_file_change(self, project_id: int):
         # Update the last modified time for debounce
         # If key exists, update it. If not, create it.
+        watch_budget.touch(project_id)
+        if project_id in self.pending_syncs:
+            WATCHER_EVENTS_COALESCED.inc()
         self.pending_syncs[project_id] = time.time()
 
     async def _sync_loop(self):
+        last_rebalance = time.monotonic()
         while self.is_running:
-            now = time.time()
-            
-            # Iterate over a copy of keys to allow modification
-            for pid in list(self.pending_syncs.keys()):
+            if time.monotonic() - last_rebalance >= self.REBALANCE_INTERVAL:
+                last_rebalance = time.monotonic()
                 try:
-                    with Session(engine) as session:
-                        project = session.get(Project, pid)
-                        # If project deleted or auto_push disabled, remove from pending
-                        if not project or not project.config.auto_push:
-                            del self.pending_syncs[pid]
-                            continue
-                        
-                        should_sync = False
-                        
-                        mode = project.config.sync_mode
-                        
-                        # Only support interval and fixed modes (auto mode removed)
-                        if mode == 'interval':
-                            # Check interval
-                            last_sync = project.last_sync_time.timestamp() if project.last_sync_time else 0
-                            interval = project.config.sync_interval
-                            if interval < 60: interval = 60 # Minimum 1 min
-                            
-                            if now - last_sync > interval:
-                                should_sync = True
-                                
-                        elif mode == 'fixed':
-                            # Check fixed time
-                            try:
-                                target_h, target_m = map(int, project.config.sync_fixed_time.split(':'))
-                                dt = datetime.now()
-                                if dt.hour == target_h and dt.minute == target_m:
-                                    # Only sync if not synced recently (in last 65 seconds)
-                                    last_sync = project.last_sync_time
-                                    if not last_sync or (dt - last_sync).total_seconds() > 65:
-                                        should_sync = True
-                            except:
-                                pass
-                                
-                        if should_sync:
-                            del self.pending_syncs[pid]
-                            await self._trigger_sync(pid)
-                            
+                    await self._rebalance()
                 except Exception as e:
-                    print(f"Error in sync loop for project {pid}: {e}")
+                    print(f"Error rebalancing watch budget: {e}")
+
+            # Schedule entries are pushed to us by project events and finished syncs,
+            # so the database is only consulted once something is actually due
+            now = datetime.now()
+            try:
+                # Observer, poller and reconciler threads add keys while we look: iterate a copy
+                candidates = [
+                    pid for pid in list(self.pending_syncs)
+                    if self.schedule.get(pid) is not None and self.schedule[pid] <= now
+                ]
+                if candidates:
+                    due, rescheduled = await run_db(ProjectStore.get_due_projects, candidates, now)
+                    seen = {project.id for project in due}
+                    for project in rescheduled:
+                        seen.add(project.id)
+                        if project.auto_push:
+                            self.schedule[project.id] = project.next_sync_due
+                        else:
+                            self._forget_project(project.id)
+                    # Deleted behind our back
+                    for pid in candidates:
+                        if pid not in seen:
+                            self._forget_project(pid)
+                    
+                    for project in due:
+                        self.pending_syncs.pop(project.id, None)
+                        try:
+                            await self._trigger_sync(project.id)
+                        except Exception as e:
+                            print(f"Error in sync loop for project {project.id}: {e}")
+            except Exception as e:
+                print(f"Error in sync loop: {e}")
                     
             await asyncio.sleep(1)
 
     async def _trigger_sync(self, project_id: int):
-        with Session(engine) as session:
-            project = session.get(Project, project_id)
-            if not project or not project.config.auto_push:
+        with tracer.span("sync.auto", project_id=project_id):
+            await self._run_auto_sync(project_id)
+
+    async def _run_auto_sync(self, project_id: int):
+        project = await run_db(ProjectStore.get, project_id)
+        if not project or not project.config.auto_push:
+            return
+        
+        # Get language setting
+        lang = await run_db(ProjectStore.get_language)
+        t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
+        
+        run = SyncRun(project_id=project_id, started_at=datetime.now(), trigger="auto")
+        started = time.perf_counter()
+        changed_files: List[str] = []
+        # Before the status, so released files count as changes of this sync
+        await self._recheck_quarantine(project, t)
+
+        # Check if there are actual changes to avoid unnecessary pushes
+        try:
+            git_info = await GitService.get_status_async(project.path)
+            run.status_ms = (time.perf_counter() - started) * 1000
+            if "error" in git_info:
+                await log_manager.broadcast(t("warning_sync_skipped", error=git_info['error']), "info", project_id)
+                run.outcome = "skipped"
+                run.error = git_info['error'][:500]
+                self._record_run(run, started)
                 return
             
-            # Get language setting
-            lang = self._get_language(session)
-            t = lambda key, **kwargs: LogMessages.t(key, lang, **kwargs)
-
-            # Check if there are actual changes to avoid unnecessary pushes
-            try:
-                git_info = GitService.get_status(project.path)
-                if "error" in git_info:
-                    await log_manager.broadcast(t("warning_sync_skipped", error=git_info['error']), "info", project_id)
-                    return
-                
-                changed_count = git_info.get("count", 0)
-                if changed_count == 0:
-                    await log_manager.broadcast(t("info_no_changes"), "info", project_id)
-                    # Even if no changes, update status to idle
-                    project.status = "idle"
-                    session.add(project)
-                    session.commit()
-                    return
-                
-                await log_manager.broadcast(t("sync_detected", count=changed_count), "info", project_id)
-            except Exception as e:
-                await log_manager.broadcast(t("warning_status_check_failed", error=str(e)), "info", project_id)
+            changed_files = git_info.get("changed_files", [])
+            changed_count = git_info.get("count", 0)
+            run.files_changed = changed_count
+            if changed_count == 0:
+                await log_manager.broadcast(t("info_no_changes"), "info", project_id)
+                # Even if no changes, update status to idle
+                await run_db(ProjectStore.update_status, project_id, "idle")
+                run.outcome = "no_changes"
+                self._record_run(run, started)
+                return
             
-            # Update status to syncing
-            project.status = "syncing"
-            session.add(project)
-            session.commit()
+            await log_manager.broadcast(t("sync_detected", count=changed_count), "info", project_id)
+        except Exception as e:
+            await log_manager.broadcast(t("warning_status_check_failed", error=str(e)), "info", project_id)
+        
+        exclude = await self._scan_stage(project, changed_files, run, t)
+
+        # Update status to syncing
+        await run_db(ProjectStore.update_status, project_id, "syncing")
+        
+        stats: Dict[str, Any] = {}
+        try:
+            result = await GitService.sync(project.path, message=f"{project.config.default_commit_prefix} Auto backup", stats=stats, exclude=exclude)
+            if result == "No changes to push":
+                # Everything that changed was held back by the scan
+                await log_manager.broadcast(t("info_no_changes"), "info", project_id)
+                await run_db(ProjectStore.update_status, project_id, "idle")
+                run.outcome = "no_changes"
+                return
+            await log_manager.broadcast(t("sync_complete"), "success", project_id)
             
+            updated = await run_db(ProjectStore.update_status, project_id, "idle", datetime.now())
+            if updated and project_id in self.schedule:
+                self.schedule[project_id] = updated.next_sync_due
+            await log_manager.broadcast(t("status_updated"), "info", project_id)
+            run.outcome = "success"
+        except Exception as e:
+            await log_manager.broadcast(t("error_sync_failed", error=str(e)), "error", project_id)
+            await run_db(ProjectStore.update_status, project_id, "error")
+            await log_manager.broadcast(t("warning_status_error"), "error", project_id)
+            run.outcome = "error"
+            run.error = str(e)[:500]
+        finally:
+            run.add_ms = stats.get("add_ms", 0.0)
+            run.commit_ms = stats.get("commit_ms", 0.0)
+            run.push_ms = stats.get("push_ms", 0.0)
+            run.bytes_pushed = stats.get("bytes_pushed", 0)
+            self._record_run(run, started)
+
+    async def _scan_stage(self, project: Project, changed_files: List[str], run: SyncRun, t) -> List[str]:
+        """
+        Policy scan of the change set within the project's time budget.
+
+        Returns the paths to leave out of this commit. With risky_file_action "warn"
+        (the default) flagged files are only reported and backed up all the same;
+        "exclude" and "quarantine" leave them out, plus the files the budget did not
+        reach (those keep the project pending for the next sync). Each risky file is
+        reported once; the scanner's stat cache keeps re-checking it on later ticks
+        nearly free.
+        """
+        config = project.config
+        if config.risky_file_action == "off" or not changed_files:
+            return []
+
+        scan_started = time.perf_counter()
+        with tracer.child("sync.scan", files=len(changed_files)) as span:
+            scan = await ScannerService.scan_directory_async(
+                project.path, config, changed_files, config.scan_budget_ms / 1000
+            )
+            span.set_attribute("risks", len(scan.risks))
+            span.set_attribute("deferred", len(scan.deferred))
+        run.scan_ms = (time.perf_counter() - scan_started) * 1000
+
+        risky = [risk["path"] for risk in scan.risks]
+        reported = self.flagged.get(project.id, set())
+        new_risks = [risk for risk in scan.risks if risk["path"] not in reported]
+        # Only remember what is still risky, so a file that comes back is reported again
+        self.flagged[project.id] = set(risky)
+
+        if risky and config.risky_file_action == "quarantine":
             try:
-                result = await GitService.sync(project.path, message=f"{project.config.default_commit_prefix} Auto backup")
-                await log_manager.broadcast(t("sync_complete"), "success", project_id)
-                
-                project.last_sync_time = datetime.now()
-                project.status = "idle"
-                session.add(project)
-                session.commit()
-                await log_manager.broadcast(t("status_updated"), "info", project_id)
-            except Exception as e:
-                await log_manager.broadcast(t("error_sync_failed", error=str(e)), "error", project_id)
-                project.status = "error"
-                session.add(project)
-                session.commit()
-                await log_manager.broadcast(t("warning_status_error"), "error", project_id)
+                await asyncio.to_thread(IgnoreService.add_to_info_exclude, project.path, risky)
+            except OSError as e:
+                print(f"Failed to quarantine files for project {project.id}: {e}")
+        if new_risks:
+            key = {"quarantine": "sync_scan_quarantined", "exclude": "sync_scan_excluded"}.get(
+                config.risky_file_action, "sync_scan_flagged"
+            )
+            await log_manager.broadcast(t(key, count=len(new_risks)), "error", project.id)
+            for risk in new_risks[:10]:
+                await log_manager.broadcast(f"  - {risk['path']}: {risk['reason']}", "error", project.id)
+        if config.risky_file_action not in ("exclude", "quarantine"):
+            # Reported only: a heuristic never keeps a file out of the backup
+            return []
+        if scan.deferred:
+            await log_manager.broadcast(t("sync_scan_deferred", count=len(scan.deferred)), "info", project.id)
+            self.pending_syncs[project.id] = time.time()
+
+        exclude = risky + scan.deferred
+        run.files_excluded = len(exclude)
+        return exclude
+
+    async def _recheck_quarantine(self, project: Project, t):
+        """
+        Release quarantined files that are clean now (or gone), so this sync backs
+        them up; git no longer reports them once they are quarantined, so the status
+        alone would never bring them back. Outside "exclude" and "quarantine" nothing stays held back.
+        """
+        try:
+            quarantined = await asyncio.to_thread(IgnoreService.quarantined, project.path)
+            if not quarantined:
+                return
+            config = project.config
+            if config.risky_file_action in ("exclude", "quarantine"):
+                scan = await ScannerService.scan_directory_async(
+                    project.path, config, quarantined, config.scan_budget_ms / 1000
+                )
+                still_held = {risk["path"] for risk in scan.risks} | set(scan.deferred)
+                clean = [rel for rel in quarantined if rel not in still_held]
+            else:
+                clean = quarantined
+            if clean:
+                released = await asyncio.to_thread(IgnoreService.release_quarantine, project.path, clean)
+                if released:
+                    await log_manager.broadcast(t("sync_quarantine_released", count=len(released)), "info", project.id)
+        except OSError as e:
+            print(f"Failed to re-check quarantined files of project {project.id}: {e}")
+
+    def _record_run(self, run: SyncRun, started: float):
+        run.total_ms = (time.perf_counter() - started) * 1000
+        sync_history.record(run)
+        status_cache.invalidate(run.project_id)
 
 watcher_service = WatcherService()
 
@@ -0,0 +1,164 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from app.core.metrics import WORKER_TASKS
+
+# Requests and responses cross the process boundary pickled: path lists travel as
+# one NUL-joined string, which pickles far faster than a list of many small strings
+
+class StatusRequest:
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+class StatusResponse:
+    __slots__ = ("changed", "error")
+
+    def __init__(self, changed: str = "", error: Optional[str] = None):
+        self.changed = changed
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The shape GitService.get_status returns"""
+        if self.error is not None:
+            return {"error": self.error}
+        changed = self.changed.split("\0") if self.changed else []
+        return {"changed_files": changed, "count": len(changed)}
+
+class ScanRequest:
+    __slots__ = ("path", "config_json", "changed", "budget_s", "verdicts")
+
+    def __init__(self, path: str, config_json: str, changed: str, budget_s: Optional[float], verdicts: Dict[str, tuple]):
+        self.path = path
+        self.config_json = config_json
+        self.changed = changed
+        self.budget_s = budget_s
+        # The parent's scan cache entries for the change set (see ScannerService.cached_verdicts)
+        self.verdicts = verdicts
+
+class ScanResponse:
+    __slots__ = ("risks", "deferred", "verdicts")
+
+    def __init__(self, risks: List[Dict[str, Any]], deferred: str, verdicts: Dict[str, tuple]):
+        self.risks = risks
+        self.deferred = deferred
+        # Entries the worker computed, for the parent's cache
+        self.verdicts = verdicts
+
+def _init_worker():
+    # Ctrl+C reaches the whole process group; the parent shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _status_task(request: StatusRequest) -> StatusResponse:
+    from app.services.git_service import GitService
+    result = GitService.get_status(request.path)
+    if "error" in result:
+        return StatusResponse(error=result["error"])
+    return StatusResponse("\0".join(result["changed_files"]))
+
+def _has_changes_task(path: str) -> bool:
+    from app.services.git_service import GitService
+    return GitService.has_changes(path)
+
+def _scan_task(request: ScanRequest) -> ScanResponse:
+    from app.models.project import parse_config
+    from app.services.scanner_service import ScannerService
+    config = parse_config(None, 0, request.config_json)
+    changed = request.changed.split("\0") if request.changed else []
+    ScannerService.load_verdicts(request.path, request.verdicts)
+    result = ScannerService.scan_directory(request.path, config, changed, request.budget_s)
+    learned = {
+        rel: entry for rel, entry in ScannerService.cached_verdicts(request.path, changed).items()
+        if request.verdicts.get(rel) != entry
+    }
+    return ScanResponse(result.risks, "\0".join(result.deferred), learned)
+
+class WorkerPool:
+    """
+    Opt-in process pool (CODEARK_EXECUTION=process) for the CPU-heavy read-only
+    work: working tree status (GitPython's index diff), dirty checks and
+    pre-commit scans. In threads they hold the GIL against the event loop and the
+    observer threads; in worker processes they do not.
+
+    Workers are spawned (forking a process full of threads is unsafe) and each is
+    replaced after `max_tasks_per_child` tasks, bounding the memory GitPython's
+    object caches and the scanner caches can grow to. Before Python 3.11 the whole
+    pool is replaced instead. The pre-commit scan cache stays in the parent: a
+    scan request carries the known verdicts of its files and the response brings
+    back the new ones, so budgeted scans resume cheaply on whichever worker runs
+    them. Commits and pushes stay in threads: they report progress and honour job
+    cancellation as they go.
+    """
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None, max_tasks_per_child: int = 200):
+        self.enabled = mode == "process"
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Only used where the executor cannot recycle its own workers
+        self._submitted = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        recycle_self = sys.version_info < (3, 11)
+        if self._executor is not None and recycle_self and self._submitted >= self.workers * self.max_tasks_per_child:
+            # Running tasks finish in the old pool
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            kwargs = {} if recycle_self else {"max_tasks_per_child": self.max_tasks_per_child}
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                **kwargs,
+            )
+            self._submitted = 0
+        self._submitted += 1
+        return self._executor
+
+    async def _run(self, task: str, func: Callable[[Any], Any], request: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            try:
+                return await loop.run_in_executor(self._get_executor(), func, request)
+            except BrokenProcessPool:
+                # A worker died (killed, out of memory): start a fresh pool and retry once
+                self._executor = None
+                return await loop.run_in_executor(self._get_executor(), func, request)
+        finally:
+            self.pending -= 1
+            WORKER_TASKS.inc(1, task)
+
+    async def status(self, path: str) -> Dict[str, Any]:
+        response = await self._run("status", _status_task, StatusRequest(path))
+        return response.to_dict()
+
+    async def has_changes(self, path: str) -> bool:
+        return await self._run("has_changes", _has_changes_task, path)
+
+    async def scan(self, path: str, config_json: str, changed_files: List[str], budget_s: Optional[float]):
+        from app.services.scanner_service import ScanResult, ScannerService
+        verdicts = ScannerService.cached_verdicts(path, changed_files)
+        request = ScanRequest(path, config_json, "\0".join(changed_files), budget_s, verdicts)
+        response = await self._run("scan", _scan_task, request)
+        ScannerService.load_verdicts(path, response.verdicts)
+        deferred = response.deferred.split("\0") if response.deferred else []
+        return ScanResult(safe=not response.risks and not deferred, risks=response.risks, deferred=deferred)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+worker_pool = WorkerPool(
+    mode=os.environ.get("CODEARK_EXECUTION", "thread"),
+    workers=int(os.environ.get("CODEARK_WORKERS", "0")) or None,
+    max_tasks_per_child=int(os.environ.get("CODEARK_MAX_TASKS_PER_CHILD", "200")),
+)
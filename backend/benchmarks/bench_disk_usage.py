@@ -0,0 +1,54 @@
+"""
+Per-project disk usage index (app.services.disk_usage).
+
+Compares the initial os.scandir build of a synthetic tree with incremental
+refreshes after a handful of directories changed, which is the steady state
+while the watcher feeds events.
+
+Usage (from the backend directory):
+    python benchmarks/bench_disk_usage.py [--quick] [--output disk_usage.json]
+"""
+import os
+from typing import Any, Dict, List
+from common import generate_tree, measure, result, run_standalone
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.services.disk_usage import DiskUsageIndex
+
+    if quick:
+        cases = [{"files": 2000, "depth": 3, "touched": 10}]
+    else:
+        cases = [
+            {"files": 5000, "depth": 3, "touched": 10},
+            {"files": 50000, "depth": 5, "touched": 10},
+            {"files": 50000, "depth": 5, "touched": 1000},
+        ]
+
+    results = []
+    for i, case in enumerate(cases):
+        root = os.path.join(workdir, f"usage_{i}")
+        written = generate_tree(root, files=case["files"], depth=case["depth"], file_size=256)
+        repeat = 3 if quick else 5
+
+        def build():
+            DiskUsageIndex(root).refresh()
+
+        index = DiskUsageIndex(root)
+        index.refresh()
+        touched = written[:case["touched"]]
+
+        def touch(i: int):
+            for rel in touched:
+                path = os.path.join(root, rel)
+                with open(path, "a") as f:
+                    f.write("x\n")
+                index.mark(path)
+
+        metrics = {f"build_{k}": v for k, v in measure(build, repeat=repeat).items()}
+        metrics.update({f"incremental_{k}": v for k, v in measure(index.refresh, repeat=repeat, setup=touch).items()})
+        metrics["directories"] = len(index.nodes)
+        results.append(result("disk_usage", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,56 @@
+"""
+Event-loop lag benchmark for the auto-sync path.
+
+Registers M projects (each pushing to a local bare remote) in a throw-away
+database, then runs WatcherService._trigger_sync for all of them concurrently
+while a probe task measures how late the event loop wakes up.
+
+Usage (from the backend directory):
+    python benchmarks/bench_event_loop_lag.py [--quick] [--output lag.json]
+"""
+import asyncio
+import time
+from typing import Any, Dict, List
+from common import make_repo, register_projects, result, run_standalone, summarize, touch_files, tracked_files
+
+async def probe_lag(samples: list, stop: asyncio.Event, interval: float = 0.001):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(interval)
+        samples.append((loop.time() - before - interval) * 1000)
+
+async def _concurrent_syncs(projects: List[tuple], rounds: int) -> Dict[str, Any]:
+    from app.services.watcher_service import WatcherService
+
+    watcher = WatcherService()
+    samples: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(samples, stop))
+
+    started = time.perf_counter()
+    for round_no in range(rounds):
+        for _, path in projects:
+            touch_files(path, tracked_files(path), f"round {round_no}")
+        await asyncio.gather(*(watcher._trigger_sync(pid) for pid, _ in projects))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    watcher.stop()
+
+    lag = summarize(samples)
+    metrics = {f"lag_{key}": value for key, value in lag.items() if key.endswith("_ms")}
+    metrics["elapsed_ms"] = round(elapsed * 1000, 3)
+    metrics["syncs_per_s"] = round(len(projects) * rounds / elapsed, 2)
+    return metrics
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    params = {"projects": 4, "files": 20, "rounds": 2} if quick else {"projects": 20, "files": 20, "rounds": 3}
+    paths = [make_repo(workdir, f"lag_{i}", files=params["files"], depth=1) for i in range(params["projects"])]
+    ids = register_projects(paths)
+    metrics = asyncio.run(_concurrent_syncs(list(zip(ids, paths)), params["rounds"]))
+    return [result("event_loop_lag", params, metrics)]
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,325 @@
+"""
+File system event-storm harness for the watcher.
+
+Replays an event storm (`npm install`, a branch checkout, a build writing its
+output...) against WatcherService in two ways:
+
+- inprocess: watchdog events are built in memory and dispatched straight into
+  DebounceHandler / WatcherService._on_file_change, measuring the pure event
+  pipeline (events/s, CPU time, peak Python memory).
+- filesystem: the storm is materialised in a real registered project (a repo
+  pushing to a local bare remote) while the full WatcherService runs, measuring
+  delivery plus the end-to-end time until the storm is in a pushed backup.
+
+Storms are synthetic (--scenario) or recorded from a real directory:
+
+    python benchmarks/bench_event_storm.py --record ~/proj --seconds 30 --out storm.jsonl
+    (run `npm install` in ~/proj meanwhile)
+    python benchmarks/bench_event_storm.py --replay storm.jsonl
+
+Usage (from the backend directory):
+    python benchmarks/bench_event_storm.py [--scenario npm_install] [--events 100000]
+                                           [--mode both] [--quick] [--output storm.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Tuple
+from common import enter_sandbox, git, make_repo, register_projects, result, write_results
+
+# (kind, relative path, is_directory); kind is created / modified / deleted / moved
+# (moved carries "src\0dest" as path)
+StormEvent = Tuple[str, str, bool]
+
+def npm_install(events: int) -> List[StormEvent]:
+    """Packages unpacked under node_modules: every file is created then written"""
+    storm: List[StormEvent] = []
+    package = 0
+    while len(storm) < events:
+        base = f"node_modules/pkg_{package}"
+        storm.append(("created", base, True))
+        storm.append(("created", f"{base}/lib", True))
+        for i in range(20):
+            rel = f"{base}/lib/file_{i}.js"
+            storm.append(("created", rel, False))
+            storm.append(("modified", rel, False))
+        package += 1
+    return storm[:events - 1] + [("modified", "package-lock.json", False)]
+
+def git_checkout(events: int) -> List[StormEvent]:
+    """Another branch checked out: most tracked files rewritten, some added and removed"""
+    storm: List[StormEvent] = []
+    i = 0
+    while len(storm) < events:
+        rel = f"src/module_{i % 50}/file_{i}.py"
+        if i % 10 == 0:
+            storm.append(("created", rel, False))
+        elif i % 10 == 1:
+            storm.append(("deleted", rel, False))
+        else:
+            storm.append(("modified", rel, False))
+        i += 1
+    return storm
+
+def build_output(events: int) -> List[StormEvent]:
+    """A build writing artefacts through temp files that are renamed into place"""
+    storm: List[StormEvent] = [("created", "dist", True)]
+    i = 0
+    while len(storm) < events:
+        tmp, final = f"dist/chunk_{i}.js.tmp", f"dist/chunk_{i}.js"
+        storm.append(("created", tmp, False))
+        storm.append(("modified", tmp, False))
+        storm.append(("moved", f"{tmp}\0{final}", False))
+        storm.append(("modified", f"build/cache_{i % 100}.log", False))
+        i += 1
+    return storm[:events]
+
+SCENARIOS = {"npm_install": npm_install, "git_checkout": git_checkout, "build": build_output}
+
+def load_recording(path: str) -> List[StormEvent]:
+    storm = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                rel = item["path"] if item["event"] != "moved" else f"{item['path']}\0{item['dest']}"
+                storm.append((item["event"], rel, item.get("is_dir", False)))
+    return storm
+
+def record(directory: str, seconds: float, output: str) -> int:
+    """Write every event observed under `directory` for `seconds` as JSON lines"""
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    root = os.path.abspath(directory)
+    lines: List[str] = []
+
+    class Recorder(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in ("created", "modified", "deleted", "moved"):
+                return
+            item = {"event": event.event_type, "path": os.path.relpath(event.src_path, root), "is_dir": event.is_directory}
+            if event.event_type == "moved":
+                item["dest"] = os.path.relpath(event.dest_path, root)
+            lines.append(json.dumps(item))
+
+    observer = Observer()
+    observer.schedule(Recorder(), root, recursive=True)
+    observer.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        observer.stop()
+        observer.join()
+    with open(output, "w") as f:
+        f.write("\n".join(lines) + ("\n" if lines else ""))
+    return len(lines)
+
+def _to_watchdog(storm: Iterable[StormEvent], root: str) -> list:
+    from watchdog.events import (
+        DirCreatedEvent, DirDeletedEvent, DirModifiedEvent, DirMovedEvent,
+        FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent,
+    )
+    classes = {
+        ("created", False): FileCreatedEvent, ("created", True): DirCreatedEvent,
+        ("modified", False): FileModifiedEvent, ("modified", True): DirModifiedEvent,
+        ("deleted", False): FileDeletedEvent, ("deleted", True): DirDeletedEvent,
+    }
+    events = []
+    for kind, rel, is_dir in storm:
+        if kind == "moved":
+            src, dest = rel.split("\0")
+            cls = DirMovedEvent if is_dir else FileMovedEvent
+            events.append(cls(os.path.join(root, src), os.path.join(root, dest)))
+        else:
+            events.append(classes[(kind, is_dir)](os.path.join(root, rel)))
+    return events
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def run_inprocess(storm: List[StormEvent]) -> Dict[str, Any]:
+    from app.services.watcher_service import DebounceHandler, WatcherService
+
+    watcher = WatcherService()
+    handler = DebounceHandler(1, watcher._on_file_change)
+    events = _to_watchdog(storm, "/storm/project")
+
+    cpu_before = _cpu_seconds()
+    started = time.perf_counter()
+    for event in events:
+        handler.dispatch(event)
+    elapsed = time.perf_counter() - started
+    cpu = _cpu_seconds() - cpu_before
+
+    # Second pass under tracemalloc: it slows dispatch down, so keep it out of the timing
+    watcher.pending_syncs.clear()
+    tracemalloc.start()
+    for event in events:
+        handler.dispatch(event)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    watcher.stop()
+
+    return {
+        "events": len(events),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "events_per_s": round(len(events) / elapsed, 1) if elapsed else 0.0,
+        "cpu_ms": round(cpu * 1000, 3),
+        "peak_python_kb": round(peak / 1024, 1),
+        "pending_projects": len(watcher.pending_syncs),
+    }
+
+def _materialize(storm: List[StormEvent], root: str):
+    for kind, rel, is_dir in storm:
+        try:
+            if kind == "moved":
+                src, dest = rel.split("\0")
+                os.makedirs(os.path.dirname(os.path.join(root, dest)), exist_ok=True)
+                os.replace(os.path.join(root, src), os.path.join(root, dest))
+                continue
+            path = os.path.join(root, rel)
+            if kind == "deleted":
+                if is_dir:
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+            elif is_dir:
+                os.makedirs(path, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w" if kind == "created" else "a") as f:
+                    f.write(f"{kind}\n")
+        except OSError:
+            # Recorded storms can reference paths that never existed here
+            continue
+
+def _remote_head(remote: str) -> str:
+    return subprocess.run(["git", "rev-parse", "main"], cwd=remote, capture_output=True, text=True).stdout.strip()
+
+async def _filesystem_storm(storm: List[StormEvent], path: str, remote: str, timeout: float) -> Dict[str, Any]:
+    from app.core.metrics import WATCHER_EVENTS_RECEIVED
+    from app.services.watcher_service import WatcherService
+
+    watcher = WatcherService()
+    watcher.start()
+    await watcher.wait_attached()
+    initial_head = _remote_head(remote)
+    received_before = WATCHER_EVENTS_RECEIVED.value()
+
+    cpu_before = _cpu_seconds()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    await asyncio.to_thread(_materialize, storm, path)
+    written = time.perf_counter()
+    expected = await asyncio.to_thread(_expected_files, storm, path)
+
+    backup_at = None
+    # Nothing backup-worthy (e.g. everything ignored): only delivery is measured
+    while expected and time.perf_counter() - started < timeout:
+        if _remote_head(remote) != initial_head:
+            backup_at = time.perf_counter()
+            break
+        await asyncio.sleep(0.05)
+    cpu = _cpu_seconds() - cpu_before
+    watcher.stop()
+    await asyncio.sleep(0)
+
+    received = WATCHER_EVENTS_RECEIVED.value() - received_before
+    pushed = set(git("ls-tree", "-r", "--name-only", "main", cwd=remote).splitlines()) if backup_at else set()
+    return {
+        "storm_events": len(storm),
+        "events_received": int(received),
+        "write_ms": round((written - started) * 1000, 3),
+        "backup_files": len(expected),
+        "backup_ms": round((backup_at - started) * 1000, 3) if backup_at else None,
+        # Share of the storm's surviving, non-ignored files contained in that first backup
+        "backup_coverage": round(len(expected & pushed) / len(expected), 3) if expected and backup_at else None,
+        "cpu_ms": round(cpu * 1000, 3),
+        "max_rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+    }
+
+def _expected_files(storm: List[StormEvent], root: str) -> set:
+    """Storm files that still exist and are not ignored, i.e. what a complete backup must contain"""
+    candidates = set()
+    for kind, rel, is_dir in storm:
+        if is_dir or kind == "deleted":
+            continue
+        rel = rel.split("\0")[-1]
+        if os.path.isfile(os.path.join(root, rel)):
+            candidates.add(rel)
+    if not candidates:
+        return candidates
+    ignored = subprocess.run(
+        ["git", "check-ignore", "--stdin"], cwd=root, input="\n".join(sorted(candidates)),
+        capture_output=True, text=True,
+    ).stdout.splitlines()
+    return candidates - set(ignored)
+
+def run_filesystem(storm: List[StormEvent], workdir: str, name: str, timeout: float = 30.0) -> Dict[str, Any]:
+    path = make_repo(workdir, name, files=200, depth=2)
+    with open(os.path.join(path, ".gitignore"), "w") as f:
+        f.write("node_modules/\n*.log\n*.tmp\n")
+    git("add", ".gitignore", cwd=path)
+    git("commit", "-q", "-m", "ignore", cwd=path)
+    git("push", "-q", "origin", "main", cwd=path)
+    register_projects([path])
+    return asyncio.run(_filesystem_storm(storm, path, os.path.join(workdir, f"{name}.git"), timeout))
+
+def run(workdir: str, quick: bool = False, scenarios: List[str] = None, events: int = None,
+        mode: str = "both", replay: str = None, timeout: float = None) -> List[Dict[str, Any]]:
+    events = events or (20000 if quick else 100000)
+    timeout = timeout or (10.0 if quick else 30.0)
+    # Real files are much slower to create, so on-disk storms are capped
+    disk_events = min(events, 5000 if quick else 30000)
+    storms = []
+    if replay:
+        recording = load_recording(replay)
+        storms.append(("replay", {"recording": os.path.basename(replay)}, recording, recording[:disk_events]))
+    else:
+        for scenario in scenarios or list(SCENARIOS):
+            generate = SCENARIOS[scenario]
+            storms.append((scenario, {"scenario": scenario}, generate(events), generate(disk_events)))
+
+    results = []
+    for n, (label, params, storm, disk_storm) in enumerate(storms):
+        if mode in ("inprocess", "both"):
+            metrics = run_inprocess(storm)
+            results.append(result("event_storm_inprocess", {**params, "events": len(storm)}, metrics))
+        if mode in ("filesystem", "both"):
+            metrics = run_filesystem(disk_storm, workdir, f"storm_{n}_{label}", timeout)
+            results.append(result("event_storm_filesystem", {**params, "events": len(disk_storm)}, metrics))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="synthetic storm (repeatable, default: all)")
+    parser.add_argument("--events", type=int, help="events per synthetic storm")
+    parser.add_argument("--replay", help="JSON lines recording to replay instead of synthetic storms")
+    parser.add_argument("--mode", choices=["inprocess", "filesystem", "both"], default="both")
+    parser.add_argument("--timeout", type=float, help="seconds to wait for the backup in filesystem mode")
+    parser.add_argument("--quick", action="store_true", help="smaller storms for a fast smoke run")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--record", metavar="DIR", help="record the events under DIR instead of benchmarking")
+    parser.add_argument("--seconds", type=float, default=30.0, help="recording duration")
+    parser.add_argument("--out", default="storm.jsonl", help="recording output file")
+    args = parser.parse_args()
+
+    if args.record:
+        count = record(args.record, args.seconds, args.out)
+        print(f"Recorded {count} events to {args.out}", file=sys.stderr)
+        return
+    replay = os.path.abspath(args.replay) if args.replay else None
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = enter_sandbox()
+    write_results(run(workdir, args.quick, args.scenario, args.events, args.mode, replay, args.timeout), output)
+
+if __name__ == "__main__":
+    main()
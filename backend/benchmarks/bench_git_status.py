@@ -0,0 +1,37 @@
+"""
+GitService.get_status on synthetic working trees.
+
+Cases vary the tracked tree size, large binaries, untracked files and the
+number of modified files.
+
+Usage (from the backend directory):
+    python benchmarks/bench_git_status.py [--quick] [--output status.json]
+"""
+from typing import Any, Dict, List
+from common import add_untracked, make_repo, measure, result, run_standalone, touch_files, tracked_files
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.services.git_service import GitService
+
+    if quick:
+        cases = [
+            {"files": 200, "depth": 2, "binaries": 0, "untracked": 20, "modified": 10},
+        ]
+    else:
+        cases = [
+            {"files": 1000, "depth": 3, "binaries": 0, "untracked": 0, "modified": 0},
+            {"files": 5000, "depth": 5, "binaries": 0, "untracked": 500, "modified": 100},
+            {"files": 1000, "depth": 3, "binaries": 5, "untracked": 2000, "modified": 10},
+        ]
+
+    results = []
+    for i, case in enumerate(cases):
+        path = make_repo(workdir, f"status_{i}", files=case["files"], depth=case["depth"], binaries=case["binaries"])
+        add_untracked(path, case["untracked"])
+        touch_files(path, tracked_files(path)[:case["modified"]], "modified")
+        metrics = measure(lambda: GitService.get_status(path), repeat=3 if quick else 10)
+        results.append(result("git_status", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,126 @@
+"""
+Compiled gitignore matcher (app.services.ignore_matcher) against
+`git check-ignore --stdin --no-index` on the same synthetic tree.
+
+The tree gets a root .gitignore, nested .gitignore files and
+.git/info/exclude, with wildcards, "**", anchored, directory-only and
+negated patterns. Every file, directory and a batch of paths that do not exist
+are matched both ways; `mismatches` must be 0.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ignore.py [--quick] [--output ignore.json]
+"""
+import os
+import random
+import subprocess
+import time
+from typing import Any, Dict, List
+from common import GIT_ENV, generate_tree, git, measure, result, run_standalone
+
+ROOT_RULES = """\
+# build output
+*.log
+/build/
+dist
+**/cache/**
+!keep.log
+*.tm[pq]
+docs/**/*.md
+!docs/dir0/**/important.md
+file_1?.txt
+\\#literal
+trailing\\ 
+"""
+
+NESTED_RULES = [
+    "*.txt\n!file_2*.txt\n",
+    "/dir1/\n!*.md\n",
+    "file_3*\n",
+    "**/deep\n!/dir0\n",
+]
+
+EXCLUDE_RULES = "file_4*.txt\n!file_41.txt\n"
+
+def _build_repo(root: str, files: int, depth: int, seed: int) -> List[str]:
+    os.makedirs(root)
+    git("init", "-q", "-b", "main", root)
+    generate_tree(root, files=files, depth=depth, file_size=16, seed=seed)
+    rng = random.Random(seed)
+    dirs = [d for d, _, _ in os.walk(root) if "/.git" not in d and d != root]
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write(ROOT_RULES)
+    for i, d in enumerate(rng.sample(dirs, min(len(dirs), 8))):
+        with open(os.path.join(d, ".gitignore"), "w") as f:
+            f.write(NESTED_RULES[i % len(NESTED_RULES)])
+    with open(os.path.join(root, ".git", "info", "exclude"), "a") as f:
+        f.write(EXCLUDE_RULES)
+    # Files the special patterns are about
+    extra = ["build/out.o", "a/build/x.o", "dist/x.js", "src/cache/x/y.bin", "keep.log", "x.log", "a.tmp", "b.tmq",
+             "docs/a/b/c.md", "docs/dir0/x/important.md", "#literal", "trailing ", "deep/x.txt"]
+    for rel in extra:
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+    paths = []
+    for d, dirnames, filenames in os.walk(root):
+        if ".git" in dirnames:
+            dirnames.remove(".git")
+        rel_dir = os.path.relpath(d, root)
+        if rel_dir != ".":
+            paths.append(rel_dir + "/")
+        for name in filenames:
+            paths.append(os.path.normpath(os.path.join(rel_dir, name)))
+    # Paths that do not exist are matched as files
+    paths.extend(f"dir{rng.randint(0, 3)}/ghost_{i}.{rng.choice(['txt', 'log', 'md', 'py'])}" for i in range(200))
+    return paths
+
+def _check_ignore(root: str, paths: List[str]) -> set:
+    # Directories go in without their trailing slash, the way git's own traversal matches
+    # them (check-ignore would otherwise let "foo/**" match "foo/" itself); git stats them
+    proc = subprocess.run(
+        ["git", "check-ignore", "--stdin", "-z", "--no-index"], cwd=root, env=GIT_ENV,
+        input="\0".join(path.rstrip("/") for path in paths) + "\0", capture_output=True, text=True,
+    )
+    if proc.returncode not in (0, 1):
+        raise RuntimeError(proc.stderr)
+    return set(proc.stdout.split("\0")[:-1])
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.services.ignore_matcher import IgnoreMatcher
+
+    cases = [{"files": 2000, "depth": 3}] if quick else [{"files": 5000, "depth": 3}, {"files": 50000, "depth": 5}]
+    results = []
+    for i, case in enumerate(cases):
+        root = os.path.join(workdir, f"ignore_{i}")
+        paths = _build_repo(root, case["files"], case["depth"], seed=i)
+
+        expected = _check_ignore(root, paths)
+        matcher = IgnoreMatcher(root)
+        started = time.perf_counter()
+        verdicts = matcher.match(paths)
+        cold_ms = (time.perf_counter() - started) * 1000
+        got = {path.rstrip("/") for path, ignored in zip(paths, verdicts) if ignored}
+        mismatches = sorted(expected ^ got)
+
+        repeat = 3 if quick else 5
+        metrics = {
+            "paths": len(paths),
+            "ignored": len(expected),
+            "mismatches": len(mismatches),
+            "matcher_cold_ms": round(cold_ms, 3),
+        }
+        metrics.update({f"matcher_warm_{k}": v for k, v in measure(lambda: matcher.match(paths), repeat=repeat).items()})
+        metrics.update({f"check_ignore_{k}": v for k, v in measure(lambda: _check_ignore(root, paths), repeat=repeat).items()})
+        # One path per call, the way the watcher filter asks
+        sample = paths[::max(1, len(paths) // 50)]
+        metrics.update({f"single_matcher_{k}": v for k, v in measure(lambda: [matcher.match([p]) for p in sample], repeat=repeat).items()})
+        metrics.update({f"single_check_ignore_{k}": v for k, v in measure(lambda: [_check_ignore(root, [p]) for p in sample], repeat=repeat).items()})
+        metrics["single_paths"] = len(sample)
+        if mismatches:
+            metrics["mismatch_sample"] = mismatches[:10]
+        results.append(result("ignore_match", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,95 @@
+"""
+Bulk repository import: RepoDiscovery (parallel scandir, .git/HEAD + config
+reads, one transaction) against the per-repo path the API used before (os.walk,
+GitService.get_repo_info with its dirty check, one commit per project).
+
+The root holds nested groups of small repositories plus noise the walk should
+prune: node_modules trees and a directory above RepoDiscovery.MAX_DIR_ENTRIES.
+
+Usage (from the backend directory):
+    python benchmarks/bench_import.py [--quick] [--output import.json]
+"""
+import os
+import time
+from typing import Any, Dict, List
+from common import generate_tree, git, result, run_standalone
+
+def _build_root(root: str, repos: int, files: int) -> List[str]:
+    paths = []
+    for i in range(repos):
+        work = os.path.join(root, f"group{i % 7}", f"team{i % 3}", f"repo{i}")
+        git("init", "-q", "-b", "main", work)
+        git("remote", "add", "origin", f"https://example.com/r/{i}.git", cwd=work)
+        generate_tree(work, files=files, depth=2, file_size=32, seed=i)
+        # Dependencies checked out next to the code
+        os.makedirs(os.path.join(work, "node_modules", "pkg", "lib"))
+        paths.append(work)
+    for i in range(3):
+        os.makedirs(os.path.join(root, "shared", "node_modules", f"dep{i}", "dist"))
+    crowded = os.path.join(root, "datasets", "crowded")
+    for i in range(6000):
+        os.makedirs(os.path.join(crowded, f"d{i}"))
+    return sorted(paths)
+
+def _reset_db():
+    from sqlmodel import Session, delete
+    from app.core.database import engine
+    from app.models.project import Project
+    with Session(engine) as session:
+        session.exec(delete(Project))
+        session.commit()
+
+def _import_per_repo(root: str) -> List[str]:
+    """The old way: walk everything, ask GitPython per repo, one commit each"""
+    from sqlmodel import Session
+    from app.core.database import engine
+    from app.models.project import Project
+    from app.services.git_service import GitService
+
+    found = []
+    for directory, dirnames, _ in os.walk(root):
+        if ".git" in dirnames:
+            found.append(directory)
+            dirnames.clear()
+    for path in found:
+        info = GitService.get_repo_info(path)
+        with Session(engine) as session:
+            session.add(Project(name=os.path.basename(path), path=path, remote_url=info["remote_url"], branch=info["branch"] or "main"))
+            session.commit()
+    return sorted(found)
+
+def _import_bulk(root: str) -> List[str]:
+    from app.services.repo_discovery import RepoDiscovery
+    from app.services.project_store import ProjectStore
+
+    found = RepoDiscovery.discover(root)
+    projects, _ = RepoDiscovery.to_projects(found["repos"])
+    ProjectStore.add_many(projects)
+    return found["repos"]
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.core.database import create_db_and_tables
+    # Register every table with the metadata before create_all
+    import app.models.project, app.models.settings, app.models.sync_run  # noqa: F401
+    create_db_and_tables()
+
+    cases = [{"repos": 40, "files": 20}] if quick else [{"repos": 200, "files": 50}, {"repos": 500, "files": 20}]
+    results = []
+    for i, case in enumerate(cases):
+        root = os.path.join(workdir, f"import_{i}")
+        expected = _build_root(root, case["repos"], case["files"])
+        metrics: Dict[str, Any] = {}
+        for label, func in (("per_repo", _import_per_repo), ("bulk", _import_bulk)):
+            _reset_db()
+            started = time.perf_counter()
+            found = func(root)
+            elapsed = time.perf_counter() - started
+            metrics[f"{label}_ms"] = round(elapsed * 1000, 3)
+            metrics[f"{label}_repos_per_second"] = round(len(found) / elapsed, 1)
+            metrics[f"{label}_missed"] = len(set(expected) - set(found))
+        metrics["speedup"] = round(metrics["per_repo_ms"] / metrics["bulk_ms"], 2)
+        results.append(result("bulk_import", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
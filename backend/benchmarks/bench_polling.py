@@ -0,0 +1,83 @@
+"""
+Snapshot polling: one round of SnapshotIndex (directories re-listed only when
+their mtime changed, files stat'ed) against the full DirectorySnapshot that
+watchdog's PollingObserver takes every cycle, on an idle tree and after a burst
+of changes. The changed-path set of the poller is checked against the diff of
+two DirectorySnapshots.
+
+Usage (from the backend directory):
+    python benchmarks/bench_polling.py [--quick] [--output polling.json]
+"""
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Set
+from common import generate_tree, measure, result, run_standalone
+
+def _change(root: str, round_no: int) -> None:
+    files = sorted(os.path.join(d, f) for d, _, names in os.walk(root) for f in names)
+    for path in files[:50]:
+        with open(path, "a") as f:
+            f.write(f"round {round_no}\n")
+    for path in files[50:60]:
+        os.remove(path)
+    new_dir = os.path.join(root, f"new_{round_no}")
+    os.makedirs(new_dir)
+    for i in range(20):
+        with open(os.path.join(new_dir, f"f{i}.txt"), "w") as f:
+            f.write("new\n")
+
+def _snapshot_diff(before, after) -> Set[str]:
+    from watchdog.utils.dirsnapshot import DirectorySnapshotDiff
+    diff = DirectorySnapshotDiff(before, after)
+    return set(diff.files_created) | set(diff.files_deleted) | set(diff.files_modified)
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from watchdog.utils.dirsnapshot import DirectorySnapshot
+    from app.services.snapshot_poller import SnapshotIndex
+
+    cases = [{"files": 2000, "depth": 3}] if quick else [{"files": 20000, "depth": 4}, {"files": 50000, "depth": 5}]
+    repeat = 3 if quick else 5
+    results = []
+    for i, case in enumerate(cases):
+        root = os.path.join(workdir, f"polling_{i}")
+        generate_tree(root, files=case["files"], depth=case["depth"], file_size=64, seed=i)
+        index = SnapshotIndex(root)
+        index.scan()
+        # Past the racy window, so unchanged directories are trusted
+        time.sleep(2.1)
+        index.scan()
+
+        metrics: Dict[str, Any] = {}
+        metrics.update({f"idle_snapshot_{k}": v for k, v in measure(lambda: DirectorySnapshot(root), repeat).items() if k.endswith("_ms")})
+        metrics.update({f"idle_index_{k}": v for k, v in measure(lambda: index.scan(), repeat).items() if k.endswith("_ms")})
+
+        before = DirectorySnapshot(root)
+        _change(root, 0)
+        started = time.perf_counter()
+        after = DirectorySnapshot(root)
+        expected = _snapshot_diff(before, after)
+        metrics["changed_snapshot_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        started = time.perf_counter()
+        events, _ = index.scan()
+        metrics["changed_index_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        found = {event.src_path for event in events if not event.is_directory}
+        metrics["changed_paths"] = len(expected)
+        metrics["missed"] = len(expected - found)
+        metrics["extra"] = len(found - expected)
+        metrics["idle_speedup"] = round(metrics["idle_snapshot_mean_ms"] / metrics["idle_index_mean_ms"], 2)
+
+        path = os.path.join(workdir, f"polling_{i}.snap")
+        started = time.perf_counter()
+        index.save(path)
+        metrics["save_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        metrics["snapshot_bytes"] = os.path.getsize(path)
+        started = time.perf_counter()
+        SnapshotIndex.load(path, root)
+        metrics["load_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        results.append(result("snapshot_polling", case, metrics))
+        shutil.rmtree(root)
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
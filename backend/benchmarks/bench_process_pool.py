@@ -0,0 +1,74 @@
+"""
+Thread vs process execution (CODEARK_EXECUTION) of the read-only CPU work:
+working tree status and pre-commit scans (with secret scanning) of M projects at
+once, while a probe task measures how late the event loop wakes up. Both modes
+get a warm-up round first; the process pool's start-up is reported separately.
+
+Usage (from the backend directory):
+    python benchmarks/bench_process_pool.py [--quick] [--output process_pool.json]
+"""
+import asyncio
+import time
+from typing import Any, Dict, List
+from common import make_repo, result, run_standalone, summarize, touch_files, tracked_files
+from bench_event_loop_lag import probe_lag
+
+async def _round(pool, projects: List[str], config) -> int:
+    from app.services.scanner_service import ScannerService
+    from app.services.status_cache import status_executor
+    from app.services.git_service import GitService
+
+    loop = asyncio.get_running_loop()
+
+    async def one(path: str) -> int:
+        if pool.enabled:
+            status = await pool.status(path)
+            scan = await pool.scan(path, config.model_dump_json(), status["changed_files"], None)
+        else:
+            status = await loop.run_in_executor(status_executor, GitService.get_status, path)
+            scan = await asyncio.to_thread(ScannerService.scan_directory, path, config, status["changed_files"])
+        return status["count"] + len(scan.risks)
+
+    return sum(await asyncio.gather(*(one(path) for path in projects)))
+
+async def _run_mode(mode: str, projects: List[str], rounds: int, workers: int) -> Dict[str, Any]:
+    from app.models.project import ProjectConfig
+    from app.services.worker_pool import WorkerPool
+
+    pool = WorkerPool(mode=mode, workers=workers)
+    config = ProjectConfig(strip_secrets=True)
+    metrics: Dict[str, Any] = {}
+
+    started = time.perf_counter()
+    await _round(pool, projects, config)
+    metrics["warmup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    samples: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(samples, stop))
+    started = time.perf_counter()
+    for round_no in range(rounds):
+        for path in projects:
+            touch_files(path, tracked_files(path)[::4], f"round {round_no}")
+        await _round(pool, projects, config)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    pool.shutdown()
+
+    metrics.update({f"lag_{key}": value for key, value in summarize(samples).items() if key.endswith("_ms")})
+    metrics["elapsed_ms"] = round(elapsed * 1000, 3)
+    metrics["projects_per_s"] = round(len(projects) * rounds / elapsed, 2)
+    return metrics
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    params = {"projects": 4, "files": 400, "rounds": 2, "workers": 2} if quick else {"projects": 8, "files": 3000, "rounds": 5, "workers": 4}
+    paths = [make_repo(workdir, f"pool_{i}", files=params["files"], depth=3) for i in range(params["projects"])]
+    results = []
+    for mode in ("thread", "process"):
+        metrics = asyncio.run(_run_mode(mode, paths, params["rounds"], params["workers"]))
+        results.append(result("process_pool", {**params, "mode": mode}, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,62 @@
+"""
+ScannerService.scan_directory over the change set of a synthetic tree.
+
+The change set mixes small text files, oversized binaries, files with blocked
+extensions and files holding credentials, as a large first backup would. Every
+case runs with and without strip_secrets (content scanning).
+
+Usage (from the backend directory):
+    python benchmarks/bench_scanner.py [--quick] [--output scanner.json]
+"""
+import os
+from typing import Any, Dict, List
+from common import generate_tree, measure, result, run_standalone
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.models.project import ProjectConfig
+    from app.services.scanner_service import ScannerService
+
+    if quick:
+        cases = [{"files": 500, "depth": 3, "binaries": 2, "blocked": 20, "secrets": 5}]
+    else:
+        cases = [
+            {"files": 2000, "depth": 3, "binaries": 0, "blocked": 0, "secrets": 0},
+            {"files": 20000, "depth": 6, "binaries": 5, "blocked": 500, "secrets": 50},
+        ]
+
+    results = []
+    for n, case in enumerate(cases):
+        root = os.path.join(workdir, f"scan_{n}")
+        changed = generate_tree(root, files=case["files"], depth=case["depth"],
+                                binaries=case["binaries"], binary_size=2 * 1024 * 1024)
+        for i in range(case["blocked"]):
+            rel = f"archive_{i}.zip"
+            with open(os.path.join(root, rel), "w") as f:
+                f.write("PK\\x03\\x04")
+            changed.append(rel)
+        for i in range(case["secrets"]):
+            rel = f"settings_{i}.py"
+            with open(os.path.join(root, rel), "w") as f:
+                f.write(f'GITHUB_TOKEN = "ghp_{i:04d}abcdefghijklmnopqrstuvwxyz012345"\n')
+            changed.append(rel)
+
+        for strip_secrets in (False, True):
+            # 1 MB limit so the generated binaries trip the size check
+            config = ProjectConfig(max_file_size_mb=1, strip_secrets=strip_secrets)
+            results.extend(_measure(ScannerService, root, config, changed, {**case, "strip_secrets": strip_secrets}, quick))
+    return results
+
+def _measure(ScannerService, root: str, config, changed: List[str], params: Dict[str, Any], quick: bool) -> List[Dict[str, Any]]:
+    results = []
+    # cold: every scan starts from empty caches; warm: repeated scans of an unchanged tree
+    for cache in ("cold", "warm"):
+        # Older versions have no cache: both variants then measure the same thing
+        clear = getattr(ScannerService, "clear_cache", None)
+        setup = (lambda i: clear()) if cache == "cold" and clear else None
+        metrics = measure(lambda: ScannerService.scan_directory(root, config, changed), repeat=3 if quick else 10, setup=setup)
+        metrics["files_per_s"] = round(len(changed) / (metrics["mean_ms"] / 1000), 1) if metrics["mean_ms"] else 0.0
+        results.append(result("scan_directory", {**params, "cache": cache}, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,102 @@
+"""
+Backend startup: `uvicorn main:app` is started as a subprocess against a sandbox
+DB with N auto-push projects, and /health is polled until it answers (requests
+are served) and until it reports ready (every project has its watcher).
+Also measures the cold `import main` on its own.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py [--quick] [--output startup.json]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+from common import BACKEND_DIR, generate_tree, register_projects, result, run_standalone, summarize
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _env() -> Dict[str, str]:
+    return {**os.environ, "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")}
+
+def _health(port: int) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None
+
+def _import_ms(workdir: str) -> float:
+    code = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_env(), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def _start_server(workdir: str, timeout: float = 120.0) -> Dict[str, Any]:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    serving_ms = None
+    try:
+        while time.perf_counter() - started < timeout:
+            health = _health(port)
+            now = (time.perf_counter() - started) * 1000
+            if health is not None:
+                if serving_ms is None:
+                    serving_ms = now
+                if health.get("ready"):
+                    return {"health_ms": round(serving_ms, 3), "ready_ms": round(now, 3),
+                            "watchers_attached": health["watchers"]["attached"]}
+            time.sleep(0.005)
+        raise RuntimeError(f"backend not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def _reset_db():
+    from sqlmodel import Session, delete
+    from app.core.database import engine, create_db_and_tables
+    from app.models.project import Project
+    create_db_and_tables()
+    with Session(engine) as session:
+        session.exec(delete(Project))
+        session.commit()
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    cases = [{"projects": 10, "files": 100}] if quick else [{"projects": 20, "files": 300}, {"projects": 100, "files": 300}]
+    repeat = 1 if quick else 3
+    results = []
+
+    imports = [_import_ms(workdir) for _ in range(repeat)]
+    results.append(result("startup_import", {}, {f"import_{k}": v for k, v in summarize(imports).items() if k.endswith("_ms")}))
+
+    for i, case in enumerate(cases):
+        paths = []
+        for j in range(case["projects"]):
+            path = os.path.join(workdir, f"startup_{i}", f"project_{j}")
+            # Watching walks the tree, so the directory count matters more than the file count
+            generate_tree(path, files=case["files"], depth=3, file_size=32, seed=j)
+            paths.append(path)
+        # Projects registered by other benchmarks of the same run would be watched too
+        _reset_db()
+        register_projects(paths)
+        runs = [_start_server(workdir) for _ in range(repeat)]
+        _reset_db()
+        metrics: Dict[str, Any] = {}
+        for key in ("health_ms", "ready_ms"):
+            metrics[key] = summarize([r[key] for r in runs])["p50_ms"]
+        metrics["watchers_attached"] = runs[-1]["watchers_attached"]
+        results.append(result("startup", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
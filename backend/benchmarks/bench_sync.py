@@ -0,0 +1,53 @@
+"""
+GitService._sync_sync (add + commit + push to a local bare remote).
+
+Every iteration first modifies a slice of the tracked files and drops a few new
+files into the tree, so each sync has real work to do. Besides the end-to-end
+timing the per-stage means reported by the sync itself are included.
+
+Usage (from the backend directory):
+    python benchmarks/bench_sync.py [--quick] [--output sync.json]
+"""
+import os
+import statistics
+from typing import Any, Dict, List
+from common import make_repo, measure, result, run_standalone, touch_files, tracked_files
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    from app.services.git_service import GitService
+
+    if quick:
+        cases = [{"files": 200, "binaries": 0, "modified": 10, "new": 5}]
+    else:
+        cases = [
+            {"files": 1000, "binaries": 0, "modified": 10, "new": 5},
+            {"files": 5000, "binaries": 0, "modified": 500, "new": 100},
+            {"files": 1000, "binaries": 3, "modified": 10, "new": 5},
+        ]
+
+    results = []
+    for n, case in enumerate(cases):
+        path = make_repo(workdir, f"sync_{n}", files=case["files"], binaries=case["binaries"])
+        tracked = tracked_files(path)[:case["modified"]]
+        stage_stats: List[Dict[str, Any]] = []
+
+        def setup(i: int):
+            touch_files(path, tracked, f"iteration {i}")
+            for j in range(case["new"]):
+                with open(os.path.join(path, f"new_{i}_{j}.txt"), "w") as f:
+                    f.write(f"new file {i} {j}\n")
+
+        def sync():
+            stats: Dict[str, Any] = {}
+            GitService._sync_sync(path, "bench", stats)
+            stage_stats.append(stats)
+
+        metrics = measure(sync, repeat=3 if quick else 10, setup=setup)
+        for stage in ("add_ms", "commit_ms", "push_ms"):
+            metrics[f"{stage[:-3]}_mean_ms"] = round(statistics.fmean(s.get(stage, 0.0) for s in stage_stats), 3)
+        metrics["bytes_pushed_mean"] = int(statistics.fmean(s.get("bytes_pushed", 0) for s in stage_stats))
+        results.append(result("sync", case, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,96 @@
+"""
+Watcher event throughput.
+
+- handler_dispatch: synthetic watchdog events pushed straight through
+  DebounceHandler (filtering + WatcherService._on_file_change), i.e. the
+  per-event cost on the observer thread.
+- filesystem: real files written into a watched tree, measuring how fast the
+  observer delivers them to the handler.
+
+Usage (from the backend directory):
+    python benchmarks/bench_watcher.py [--quick] [--output watcher.json]
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List
+from common import generate_tree, result, run_standalone
+
+def _dispatch_case(events: int) -> Dict[str, Any]:
+    from watchdog.events import FileCreatedEvent, FileModifiedEvent
+    from app.services.watcher_service import DebounceHandler, WatcherService
+
+    watcher = WatcherService()
+    handler = DebounceHandler(1, watcher._on_file_change)
+    # 1 in 4 events is something the filters drop
+    paths = ["/p/src/module_{}.py", "/p/docs/page_{}.md", "/p/node_modules/pkg/index_{}.js", "/p/assets/img_{}.png"]
+    batch = [
+        (FileModifiedEvent if i % 2 else FileCreatedEvent)(paths[i % len(paths)].format(i))
+        for i in range(events)
+    ]
+    started = time.perf_counter()
+    for event in batch:
+        handler.dispatch(event)
+    elapsed = time.perf_counter() - started
+    watcher.stop()
+    return {"events": events, "elapsed_ms": round(elapsed * 1000, 3), "events_per_s": round(events / elapsed, 1)}
+
+def _filesystem_case(workdir: str, files: int, timeout: float = 30.0) -> Dict[str, Any]:
+    from watchdog.observers import Observer
+    from app.services.watcher_service import DebounceHandler
+
+    root = os.path.join(workdir, "watched")
+    generate_tree(root, files=200, depth=3)
+    target = os.path.join(root, "burst")
+    os.makedirs(target)
+
+    delivered = 0
+    last_delivery = 0.0
+    done = threading.Event()
+
+    def on_change(project_id: int):
+        nonlocal delivered, last_delivery
+        delivered += 1
+        last_delivery = time.perf_counter()
+        if delivered >= files:
+            done.set()
+
+    observer = Observer()
+    observer.schedule(DebounceHandler(1, on_change), root, recursive=True)
+    observer.start()
+    try:
+        time.sleep(0.2)
+        started = time.perf_counter()
+        for i in range(files):
+            with open(os.path.join(target, f"burst_{i}.txt"), "w") as f:
+                f.write("x\n")
+        written = time.perf_counter()
+        done.wait(timeout)
+        # Let the tail of the burst (modify events after create) drain
+        time.sleep(0.5)
+    finally:
+        observer.stop()
+        observer.join()
+
+    elapsed = (last_delivery or written) - started
+    return {
+        "files": files,
+        "delivered": delivered,
+        "write_ms": round((written - started) * 1000, 3),
+        "delivery_ms": round(elapsed * 1000, 3),
+        "events_per_s": round(delivered / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    results = []
+    events = 20000 if quick else 200000
+    metrics = _dispatch_case(events)
+    results.append(result("watcher_dispatch", {"events": events}, metrics))
+
+    files = 500 if quick else 5000
+    metrics = _filesystem_case(workdir, files)
+    results.append(result("watcher_filesystem", {"files": files}, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
@@ -0,0 +1,62 @@
+"""
+WebSocket log fan-out through LogManager.broadcast.
+
+Clients are in-memory stand-ins whose send_text just yields to the event loop,
+so the numbers measure the broadcast path itself (serialisation, iteration,
+tracing), not the network.
+
+Usage (from the backend directory):
+    python benchmarks/bench_websocket.py [--quick] [--output websocket.json]
+"""
+import asyncio
+import time
+from typing import Any, Dict, List
+from common import result, run_standalone, summarize
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.received += 1
+        await asyncio.sleep(0)
+
+async def _fanout(global_clients: int, project_clients: int, messages: int) -> Dict[str, Any]:
+    from app.services.logger import LogManager
+
+    manager = LogManager()
+    clients = [FakeWebSocket() for _ in range(global_clients + project_clients)]
+    for ws in clients[:global_clients]:
+        await manager.connect(ws)
+    for ws in clients[global_clients:]:
+        await manager.connect(ws, project_id=1)
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(messages):
+        before = time.perf_counter()
+        await manager.broadcast(f"Sync detected {i} changes", "info", 1)
+        samples.append((time.perf_counter() - before) * 1000)
+    elapsed = time.perf_counter() - started
+
+    sends = sum(ws.received for ws in clients)
+    metrics = summarize(samples)
+    metrics["messages_per_s"] = round(messages / elapsed, 1)
+    metrics["sends_per_s"] = round(sends / elapsed, 1)
+    return metrics
+
+def run(workdir: str, quick: bool = False) -> List[Dict[str, Any]]:
+    messages = 200 if quick else 2000
+    cases = [(1, 0), (10, 10), (100, 100)] if not quick else [(1, 0), (10, 10)]
+    results = []
+    for global_clients, project_clients in cases:
+        metrics = asyncio.run(_fanout(global_clients, project_clients, messages))
+        params = {"global_clients": global_clients, "project_clients": project_clients, "messages": messages}
+        results.append(result("websocket_fanout", params, metrics))
+    return results
+
+if __name__ == "__main__":
+    run_standalone(run, __doc__)
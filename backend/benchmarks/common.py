@@ -0,0 +1,230 @@
+"""
+Shared helpers for the benchmark suite: sandboxing, synthetic repositories,
+timing and machine-readable results.
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+def enter_sandbox(prefix: str = "codeark-bench-") -> str:
+    """
+    Create a temp directory, chdir into it and make the backend importable.
+
+    Must run before any `app.*` import touches the database: the SQLite file
+    name is relative to the working directory, so every run gets a fresh DB.
+    """
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(workdir)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return workdir
+
+def git(*args: str, cwd: Optional[str] = None) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True, env=GIT_ENV)
+    return result.stdout
+
+def generate_tree(
+    root: str,
+    files: int = 200,
+    depth: int = 3,
+    fanout: int = 4,
+    file_size: int = 512,
+    binaries: int = 0,
+    binary_size: int = 1024 * 1024,
+    seed: int = 42,
+) -> List[str]:
+    """
+    Write `files` text files spread over a directory tree `depth` levels deep
+    with `fanout` sub directories per level, plus `binaries` random binary files.
+    Returns the relative paths written.
+    """
+    rng = random.Random(seed)
+    dirs = [""]
+    frontier = [""]
+    for _ in range(depth):
+        frontier = [os.path.join(d, f"dir{i}") for d in frontier for i in range(fanout)]
+        dirs.extend(frontier)
+    for d in dirs:
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+
+    written = []
+    line = "lorem ipsum dolor sit amet consectetur adipiscing elit\n"
+    body = (line * (file_size // len(line) + 1))[:file_size]
+    for i in range(files):
+        rel = os.path.join(rng.choice(dirs), f"file_{i}.txt")
+        with open(os.path.join(root, rel), "w") as f:
+            # Unique first line so content-addressed caches see distinct files
+            f.write(f"# file {i}\n{body}")
+        written.append(rel)
+    for i in range(binaries):
+        rel = os.path.join(rng.choice(dirs), f"blob_{i}.bin")
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(rng.randbytes(binary_size))
+        written.append(rel)
+    return written
+
+def add_untracked(root: str, count: int, prefix: str = "untracked") -> List[str]:
+    os.makedirs(os.path.join(root, prefix), exist_ok=True)
+    written = []
+    for i in range(count):
+        rel = os.path.join(prefix, f"new_{i}.txt")
+        with open(os.path.join(root, rel), "w") as f:
+            f.write(f"untracked {i}\n")
+        written.append(rel)
+    return written
+
+def tracked_files(root: str, pattern: str = "*.txt") -> List[str]:
+    return git("ls-files", "-z", pattern, cwd=root).split("\0")[:-1]
+
+def touch_files(root: str, rel_paths: List[str], tag: str):
+    for rel in rel_paths:
+        with open(os.path.join(root, rel), "a") as f:
+            f.write(f"{tag}\n")
+
+def make_repo(root: str, name: str, **tree_kwargs) -> str:
+    """Working tree with an initial commit and a local bare `origin` it pushes to"""
+    remote = os.path.join(root, f"{name}.git")
+    work = os.path.join(root, name)
+    git("init", "--bare", "-q", remote)
+    git("init", "-q", "-b", "main", work)
+    git("config", "user.email", "bench@example.com", cwd=work)
+    git("config", "user.name", "bench", cwd=work)
+    generate_tree(work, **tree_kwargs)
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "init", cwd=work)
+    git("remote", "add", "origin", remote, cwd=work)
+    git("push", "-q", "origin", "main", cwd=work)
+    return work
+
+def register_projects(paths: List[str], sync_mode: str = "interval") -> List[int]:
+    """Insert Project rows for the given working trees (sandbox DB)"""
+    from sqlmodel import Session
+    from app.core.database import engine, create_db_and_tables
+    from app.models.project import Project, ProjectConfig
+    # Register every table with the metadata before create_all
+    import app.models.settings, app.models.sync_run  # noqa: F401
+
+    create_db_and_tables()
+    ids = []
+    with Session(engine) as session:
+        for path in paths:
+            project = Project(name=os.path.basename(path), path=path, remote_url="local")
+            project.set_config(ProjectConfig(auto_push=True, sync_mode=sync_mode))
+            session.add(project)
+            session.commit()
+            session.refresh(project)
+            ids.append(project.id)
+    return ids
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    n = len(ordered)
+    if not n:
+        return {}
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[n // 2], 3),
+        "p95_ms": round(ordered[min(n - 1, int(n * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+        "samples": n,
+    }
+
+def measure(func: Callable[[], Any], repeat: int = 5, warmup: int = 1, setup: Optional[Callable[[int], Any]] = None) -> Dict[str, float]:
+    """Time `func` `repeat` times (after `warmup` untimed runs); `setup(i)` runs untimed before each call"""
+    for i in range(warmup):
+        if setup:
+            setup(-1 - i)
+        func()
+    samples = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+def result(name: str, params: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "params": params, "metrics": metrics}
+
+def environment() -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def write_results(results: List[Dict[str, Any]], output: Optional[str]) -> Dict[str, Any]:
+    document = {"environment": environment(), "results": results}
+    text = json.dumps(document, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return document
+
+def _key(entry: Dict[str, Any]) -> str:
+    return entry["name"] + json.dumps(entry["params"], sort_keys=True)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """
+    Lines describing metrics that regressed by more than `threshold`.
+
+    `*_ms` metrics are lower-is-better, `*_per_s` metrics higher-is-better.
+    Single-sample extremes (min/max) are too noisy to gate on and are skipped.
+    """
+    previous = {_key(entry): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in current.get("results", []):
+        old = previous.get(_key(entry))
+        if not old:
+            continue
+        for metric, value in entry["metrics"].items():
+            if metric.endswith(("min_ms", "max_ms")):
+                continue
+            base = old["metrics"].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(base, (int, float)) or not base:
+                continue
+            change = (value - base) / base
+            if metric.endswith("_ms") and change > threshold:
+                regressions.append(f"{entry['name']} {metric}: {base} -> {value} (+{change:.0%})")
+            elif metric.endswith("_per_s") and -change > threshold:
+                regressions.append(f"{entry['name']} {metric}: {base} -> {value} ({change:.0%})")
+    return regressions
+
+def run_standalone(run: Callable[..., List[Dict[str, Any]]], description: str):
+    """Entry point shared by the individual bench_*.py scripts"""
+    import argparse
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = enter_sandbox()
+    write_results(run(workdir, quick=args.quick), output)
@@ -0,0 +1,85 @@
+"""
+Run the benchmark suite and emit one JSON document.
+
+Every run happens in a fresh temp directory (own SQLite DB, synthetic repos
+with local bare remotes), so results are reproducible and nothing touches the
+real database. Pass --baseline with an earlier output to flag regressions; the
+exit code is 1 when any metric got worse by more than --threshold.
+
+Usage (from the backend directory):
+    python benchmarks/run_all.py --quick
+    python benchmarks/run_all.py --output bench-new.json --baseline bench-old.json
+    python benchmarks/run_all.py --only git_status,sync
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import bench_disk_usage
+import bench_event_loop_lag
+import bench_event_storm
+import bench_git_status
+import bench_ignore
+import bench_import
+import bench_polling
+import bench_process_pool
+import bench_scanner
+import bench_startup
+import bench_sync
+import bench_watcher
+import bench_websocket
+from common import compare, enter_sandbox, write_results
+
+BENCHMARKS = {
+    "git_status": bench_git_status.run,
+    "sync": bench_sync.run,
+    "scanner": bench_scanner.run,
+    "watcher": bench_watcher.run,
+    "websocket": bench_websocket.run,
+    "event_loop_lag": bench_event_loop_lag.run,
+    "event_storm": bench_event_storm.run,
+    "disk_usage": bench_disk_usage.run,
+    "ignore": bench_ignore.run,
+    "import": bench_import.run,
+    "startup": bench_startup.run,
+    "polling": bench_polling.run,
+    "process_pool": bench_process_pool.run,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--only", help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change treated as a regression")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    # Resolve user paths before moving into the sandbox
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = enter_sandbox()
+    results = []
+    for name in selected:
+        started = time.perf_counter()
+        results.extend(BENCHMARKS[name](workdir, quick=args.quick))
+        print(f"[bench] {name} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    document = write_results(results, output)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(document, baseline, args.threshold)
+        for line in regressions:
+            print(f"[regression] {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
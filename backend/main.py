@@ -1,18 +1,33 @@
+from app.core.startup import startup
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import uvicorn
 
-from app.core.database import create_db_and_tables
-from app.routers import projects, websockets, settings
+from app.core.database import create_db_and_tables, db_executor
+from app.core.metrics import registry as metrics_registry, QUEUE_DEPTH
+from app.services.project_store import ProjectStore
+from app.routers import projects, websockets, settings, traces, jobs, watcher
 from app.services.watcher_service import watcher_service
+from app.services.sync_history import sync_history
+from app.services.job_service import job_service
+from app.services.git_service import sync_executor
+from app.services.worker_pool import worker_pool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    ProjectStore.backfill_config_columns()
+    startup.mark("database")
+    # Watchers are attached in the background; /health reports when they are all in place
     watcher_service.start()
+    sync_history.start()
+    startup.mark("serving")
     yield
+    job_service.shutdown()
     watcher_service.stop()
+    worker_pool.shutdown()
+    await sync_history.stop()
 
 app = FastAPI(title="TuTu's Code Ark Backend", lifespan=lifespan)
 
@@ -23,15 +38,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.include_router(projects.router, prefix="/projects", tags=["projects"])
 app.include_router(websockets.router, tags=["websockets"])
 app.include_router(settings.router, prefix="/settings", tags=["settings"])
+app.include_router(traces.router, prefix="/traces", tags=["traces"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+app.include_router(watcher.router, prefix="/watcher", tags=["watcher"])
+
+QUEUE_DEPTH.set_function(lambda: {
+    "db_executor": db_executor._work_queue.qsize(),
+    "sync_executor": sync_executor._work_queue.qsize(),
+    "watchdog_events": watcher_service.observer.event_queue.qsize() if watcher_service.observer is not None else 0,
+    "sync_history_buffer": sync_history.buffered,
+    "reconcile": watcher_service.reconciler.queued,
+    "worker_pool": worker_pool.pending,
+})
 
 @app.get("/health")
 async def health_check():
-    return {"status": "online", "message": "TuTu's Code Ark Backend is running"}
+    return {"status": "online", "message": "TuTu's Code Ark Backend is running", **startup.report()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
+    # `uvicorn main:app` has it loaded already; only needed when run as a script
+    import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
@@ -329,6 +329,29 @@ export const useLocaleStore = defineStore('locale', () => {
         advanced: {
           title: '高级设置',
           maxFileSize: '最大文件大小 (MB)',
+          riskyFileAction: '风险文件处理',
+          riskyActions: {
+            warn: '仅提示',
+            exclude: '排除',
+            quarantine: '隔离',
+            off: '关闭'
+          },
+          watchBackend: '变化检测方式',
+          watchBackends: {
+            auto: '自动',
+            native: '系统通知',
+            polling: '轮询'
+          },
+          pollInterval: '轮询间隔 (秒)',
+          blockedContentTypes: '按内容拦截',
+          contentTypes: {
+            archive: '压缩包',
+            executable: '可执行文件',
+            media: '音视频',
+            image: '图片',
+            document: '文档',
+            binary: '其他二进制'
+          },
           commitPrefix: 'Commit 前缀',
           ignoreHidden: '忽略隐藏文件',
           aiCommit: '使用 AI 生成提交信息',
@@ -670,6 +693,29 @@ export const useLocaleStore = defineStore('locale', () => {
         advanced: {
           title: 'Advanced Settings',
           maxFileSize: 'Max File Size (MB)',
+          riskyFileAction: 'Risky Files',
+          riskyActions: {
+            warn: 'Warn',
+            exclude: 'Exclude',
+            quarantine: 'Quarantine',
+            off: 'Off'
+          },
+          watchBackend: 'Change Detection',
+          watchBackends: {
+            auto: 'Auto',
+            native: 'Native',
+            polling: 'Polling'
+          },
+          pollInterval: 'Poll Interval (Seconds)',
+          blockedContentTypes: 'Block by Content',
+          contentTypes: {
+            archive: 'Archives',
+            executable: 'Executables',
+            media: 'Audio/Video',
+            image: 'Images',
+            document: 'Documents',
+            binary: 'Other Binary'
+          },
           commitPrefix: 'Commit Prefix',
           ignoreHidden: 'Ignore Hidden Files',
           aiCommit: 'Use AI for Commit Messages',
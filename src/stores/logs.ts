@@ -3,7 +3,7 @@ import { ref } from 'vue';
 import { useLocaleStore } from './locale';
 
 export const useLogStore = defineStore('logs', () => {
-  const logs = ref<Array<{ time: string; msg: string; level: string; project_id?: number }>>([]);
+  const logs = ref<Array<{ time: string; msg: string; level: string; project_id?: number; type?: string; stage?: string }>>([]);
   const isConnected = ref(false);
   let ws: WebSocket | null = null;
 
@@ -18,6 +18,12 @@ export const useLogStore = defineStore('logs', () => {
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
+        // Git progress of the same stage updates its line in place
+        const last = logs.value[logs.value.length - 1];
+        if (data.type === 'progress' && last?.type === 'progress' && last.stage === data.stage && last.project_id === data.project_id) {
+          logs.value[logs.value.length - 1] = data;
+          return;
+        }
         logs.value.push(data);
         if (logs.value.length > 100) logs.value.shift();
       } catch (e) {
@@ -8,10 +8,17 @@ export interface ProjectConfig {
     sync_fixed_time: string;
     max_file_size_mb: number;
     blocked_extensions: string[];
+    blocked_content_types: string[];
     ignore_hidden: boolean;
     ai_commit_message: boolean;
     default_commit_prefix: string;
     is_private: boolean;
+    strip_secrets: boolean;
+    risky_file_action: 'warn' | 'exclude' | 'quarantine' | 'off';
+    scan_budget_ms: number;
+    watch_backend: 'auto' | 'native' | 'polling';
+    poll_interval: number;
+    poll_budget_ms: number;
 }
 
 export interface Project {
@@ -25,6 +32,76 @@ export interface Project {
     config?: ProjectConfig;
 }
 
+export interface DiskUsageSubtree {
+    path: string;
+    kind: 'untracked' | 'changed';
+    bytes: number;
+    files: number;
+    size_display: string;
+    suggestion: string | null;  // .gitignore pattern covering the subtree, if one applies
+    largest?: { path: string; bytes: number; size_display: string }[];
+}
+
+export interface DiskUsageReport {
+    total_bytes: number;
+    total_files: number;
+    total_display: string;
+    live: boolean;
+    built_at: number | null;
+    updated_at: number | null;
+    subtrees: DiskUsageSubtree[];
+}
+
+export interface ProjectStatus {
+    project_id: number;
+    cached: boolean;
+    count?: number;
+    changed_files?: string[];
+    error?: string;
+}
+
+export interface WatchAllocation {
+    limit: number | null;
+    budget: number | null;
+    used: number;
+    in_use: number;
+    native: number;
+    polling: number;
+    projects: {
+        project_id: number;
+        mode: 'native' | 'polling';
+        watches: number | null;
+        reason: 'over_budget' | 'too_large' | 'limit_reached' | 'configured' | 'remote_fs' | null;
+        last_active: number | null;
+        poll: {
+            interval: number;
+            cpu_budget_ms: number;
+            rounds: number;
+            baseline: boolean;
+            last_round_ms: number | null;
+            last_changes: number;
+            directories: number;
+            files: number;
+        } | null;
+    }[];
+}
+
+export interface Job {
+    id: string;
+    kind: string;
+    project_id: number | null;
+    status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+    stage: string | null;
+    progress: number | null;
+    cancel_requested: boolean;
+    result: any;
+    error: string | null;
+    status_code: number | null;
+    created_at: string;
+    started_at: string | null;
+    finished_at: string | null;
+}
+
 export interface AutoInitData {
     path: string;
     name: string;
@@ -58,17 +135,65 @@ export const useProjectStore = defineStore('projects', () => {
         throw new Error((await res.json()).detail);
     };
     
-    const autoInitProject = async (data: AutoInitData) => {
+    // Poll a background job until it finishes; resolves with its result, throws its error
+    const waitForJob = async (jobId: string, onUpdate?: (job: Job) => void, interval: number = 1000): Promise<any> => {
+        while (true) {
+            const res = await fetch(`/api/jobs/${jobId}`);
+            if (!res.ok) {
+                throw new Error((await res.json()).detail || 'Job not found');
+            }
+            const job: Job = await res.json();
+            onUpdate?.(job);
+            if (job.status === 'succeeded') {
+                return job.result;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Job failed');
+            }
+            if (job.status === 'cancelled') {
+                throw new Error('Cancelled');
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    }
+
+    const cancelJob = async (jobId: string): Promise<Job> => {
+        const res = await fetch(`/api/jobs/${jobId}/cancel`, { method: 'POST' });
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to cancel job');
+        }
+        return await res.json();
+    }
+
+    const autoInitProject = async (data: AutoInitData, onUpdate?: (job: Job) => void) => {
         const res = await fetch('/api/projects/auto-init', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(data)
         });
-        if (res.ok) {
-            await fetchProjects();
-            return await res.json();
+        if (!res.ok) {
+            throw new Error((await res.json()).detail);
         }
-        throw new Error((await res.json()).detail);
+        const { job_id } = await res.json();
+        const project = await waitForJob(job_id, onUpdate);
+        await fetchProjects();
+        return project;
+    }
+
+    // Register every Git repository below a folder; resolves with the import report
+    const importProjects = async (root: string, lang: string = 'zh', onUpdate?: (job: Job) => void) => {
+        const res = await fetch('/api/projects/import', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ root, lang })
+        });
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to import');
+        }
+        const { job_id } = await res.json();
+        const report = await waitForJob(job_id, onUpdate);
+        await fetchProjects();
+        return report;
     }
 
     const getConfig = async (id: number) => {
@@ -96,8 +221,9 @@ export const useProjectStore = defineStore('projects', () => {
          return await res.json();
     }
     
-    const ignoreFiles = async (id: number, files: string[]) => {
-        const res = await fetch(`/api/projects/${id}/ignore`, {
+    // `fold` lets the backend write "dir/" and "dir/*.ext", which also ignores files added there later
+    const ignoreFiles = async (id: number, files: string[], fold: boolean = false) => {
+        const res = await fetch(`/api/projects/${id}/ignore?fold=${fold}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(files)
@@ -105,13 +231,65 @@ export const useProjectStore = defineStore('projects', () => {
         return res.ok;
     }
     
-    const manualPush = async (id: number, lang: string = 'zh') => {
+    // Files the pre-commit scan keeps out of backups through .git/info/exclude
+    const getQuarantined = async (id: number): Promise<string[]> => {
+        const res = await fetch(`/api/projects/${id}/quarantine`);
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to load quarantined files');
+        }
+        return (await res.json()).files;
+    }
+
+    // Without `files` every quarantined file is released
+    const releaseQuarantined = async (id: number, files?: string[]): Promise<string[]> => {
+        const res = await fetch(`/api/projects/${id}/quarantine/release`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ files: files ?? null })
+        });
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to release quarantined files');
+        }
+        return (await res.json()).released;
+    }
+
+    // One request for every card on the dashboard; served from the backend's status cache
+    const getStatuses = async (ids?: number[], files: boolean = false): Promise<ProjectStatus[]> => {
+        const params = new URLSearchParams();
+        ids?.forEach(id => params.append('ids', String(id)));
+        if (files) params.set('files', 'true');
+        const res = await fetch(`/api/projects/status?${params}`);
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to load status');
+        }
+        return await res.json();
+    }
+
+    // Which projects have inotify watches and which fell back to polling
+    const getWatchAllocation = async (): Promise<WatchAllocation> => {
+        const res = await fetch('/api/watcher/allocation');
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to load watch allocation');
+        }
+        return await res.json();
+    }
+
+    const getDiskUsage = async (id: number, top: number = 20): Promise<DiskUsageReport> => {
+        const res = await fetch(`/api/projects/${id}/disk-usage?top=${top}`);
+        if (!res.ok) {
+            throw new Error((await res.json()).detail || 'Failed to load disk usage');
+        }
+        return await res.json();
+    }
+    
+    const manualPush = async (id: number, lang: string = 'zh', onUpdate?: (job: Job) => void) => {
         const res = await fetch(`/api/projects/${id}/manual-push?lang=${lang}`, { method: 'POST' });
         if (!res.ok) {
             throw new Error((await res.json()).detail || 'Failed to push');
         }
-        return await res.json();
+        const { job_id } = await res.json();
+        return await waitForJob(job_id, onUpdate);
     }
 
-    return { projects, fetchProjects, addProject, autoInitProject, getConfig, updateConfig, scanProject, ignoreFiles, manualPush };
+    return { projects, fetchProjects, addProject, autoInitProject, importProjects, getConfig, updateConfig, scanProject, ignoreFiles, getQuarantined, releaseQuarantined, manualPush, getDiskUsage, getStatuses, getWatchAllocation, waitForJob, cancelJob };
 });